@@ -0,0 +1,65 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import COPY_WORKERS
+from src.copyengine import copy_tree
+
+
+def make_tree(root: str, small_files: int, small_size: int, large_files: int, large_size: int):
+    # Mimics a wine runner: lots of small DLLs and a few big libraries
+    for i in range(small_files):
+        subdir = os.path.join(root, f'lib{i % 32}')
+        os.makedirs(subdir, exist_ok=True)
+        with open(os.path.join(subdir, f'file{i}.dll'), 'wb') as f:
+            f.write(os.urandom(small_size))
+
+    for i in range(large_files):
+        with open(os.path.join(root, f'large{i}.so'), 'wb') as f:
+            for _ in range(large_size // (1024 * 1024)):
+                f.write(os.urandom(1024 * 1024))
+
+
+def drop_target(path: str):
+    shutil.rmtree(path, True)
+
+
+def bench(label: str, func, src: str, dst: str, total: int):
+    drop_target(dst)
+    start = time.perf_counter()
+    func(src, dst)
+    elapsed = time.perf_counter() - start
+    print(f'  {label:<24} {elapsed:8.3f} s  {total / elapsed / 1024 / 1024:9.1f} MiB/s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='shutil.copytree vs the copy engine')
+    parser.add_argument('dirs', nargs='*', help='directories to run in, e.g. a tmpfs and an ext4 mount')
+    parser.add_argument('--small-files', type=int, default=4000)
+    parser.add_argument('--small-size', type=int, default=64 * 1024)
+    parser.add_argument('--large-files', type=int, default=4)
+    parser.add_argument('--large-size', type=int, default=128 * 1024 * 1024)
+    args = parser.parse_args()
+
+    dirs = args.dirs or [path for path in ['/dev/shm', tempfile.gettempdir()] if os.path.isdir(path)]
+    total = args.small_files * args.small_size + args.large_files * (args.large_size // (1024 * 1024)) * 1024 * 1024
+
+    for base_dir in dirs:
+        with tempfile.TemporaryDirectory(dir=base_dir) as tmp:
+            src = os.path.join(tmp, 'src')
+            dst = os.path.join(tmp, 'dst')
+            make_tree(src, args.small_files, args.small_size, args.large_files, args.large_size)
+
+            print(f'{base_dir}: {total / 1024 / 1024:.0f} MiB in {args.small_files + args.large_files} files')
+            bench('shutil.copytree', lambda s, d: shutil.copytree(s, d, symlinks=True), src, dst, total)
+            bench('engine, 1 worker', lambda s, d: copy_tree(s, d, workers=1), src, dst, total)
+            bench(f'engine, {COPY_WORKERS} workers', lambda s, d: copy_tree(s, d), src, dst, total)
+
+
+if __name__ == '__main__':
+    main()
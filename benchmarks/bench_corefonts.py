@@ -0,0 +1,65 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import WINE_RUNNER_DIR, WINETRICKS_BIN, CABEXTRACT_BIN
+from src.corefonts import COREFONTS_PACKAGES, FONT_REGISTRY_KEYS, find_local_corefonts_package, install_fonts
+from src.registry import RegistryTransaction
+
+
+def get_env(prefix: str, runner: str) -> dict:
+    env = os.environ.copy()
+    env['WINEPREFIX'] = prefix
+    env['WINEDEBUG'] = '-all'
+    env['PATH'] = f'{runner}/bin:{os.path.dirname(WINETRICKS_BIN)}:{env.get("PATH", os.defpath)}'
+    return env
+
+
+def bench_winetricks(prefix: str, runner: str) -> float:
+    start = time.perf_counter()
+    subprocess.run([WINETRICKS_BIN, '-q', 'corefonts'], env=get_env(prefix, runner), check=True)
+    subprocess.run(['wineserver', '-w'], env=get_env(prefix, runner))
+    return time.perf_counter() - start
+
+
+def bench_native(prefix: str, runner: str) -> float:
+    package_paths = [find_local_corefonts_package(name) for name in COREFONTS_PACKAGES]
+    if None in package_paths:
+        raise SystemExit('Run ./prepare.sh first, the corefonts packages are missing')
+
+    start = time.perf_counter()
+    registry_values = install_fonts(package_paths, os.path.join(prefix, 'drive_c/windows/Fonts'), CABEXTRACT_BIN)
+
+    registry = RegistryTransaction()
+    for key in FONT_REGISTRY_KEYS:
+        registry.set_values(key, registry_values)
+
+    reg_path = os.path.join(prefix, 'corefonts.reg')
+    registry.write(reg_path)
+
+    subprocess.run(['wine', 'regedit', reg_path], env=get_env(prefix, runner), check=True)
+    subprocess.run(['wineserver', '-w'], env=get_env(prefix, runner))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='winetricks corefonts vs the native installer')
+    parser.add_argument('prefix', help='an initialized wineprefix, it is copied and left untouched')
+    parser.add_argument('--runner', default=WINE_RUNNER_DIR)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, bench in [('winetricks', bench_winetricks), ('native', bench_native)]:
+            prefix = os.path.join(tmp, label)
+            shutil.copytree(args.prefix, prefix, symlinks=True)
+            print(f'{label:<12} {bench(prefix, args.runner):8.2f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+import os
+import sys
+import time
+import socket
+import argparse
+import tempfile
+import threading
+import statistics
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from src.singleinstance import RequestServer, send_request, get_socket_path
+
+
+def start_server(received: list, stopped: list) -> tuple:
+    lock = threading.Lock()
+
+    def on_request(args: list):
+        with lock:
+            received.append(args)
+
+    server = RequestServer(on_request)
+    if not server.acquire():
+        raise RuntimeError('Another process already serves the socket')
+
+    thread = threading.Thread(target=server.serve, args=(lambda: bool(stopped),))
+    thread.start()
+    return server, thread
+
+
+def burst_threads(count: int) -> list:
+    # All clients connect at once from one process
+    timings = [None] * count
+    barrier = threading.Barrier(count)
+
+    def client(i: int):
+        barrier.wait()
+        start = time.perf_counter()
+        if send_request([f'/tmp/burst{i}.aep']):
+            timings[i] = time.perf_counter() - start
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return timings
+
+
+def burst_processes(count: int, env: dict, prefix: str = 'launch') -> list:
+    # Like double clicks: every launch is a fresh interpreter running main.py
+    timings = []
+    processes = []
+    for i in range(count):
+        processes.append((time.perf_counter(), subprocess.Popen(
+            [sys.executable, 'main.py', f'/tmp/{prefix}{i}.aep'], cwd=ROOT_DIR, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )))
+    for start, process in processes:
+        process.wait()
+        timings.append(time.perf_counter() - start if process.returncode == 0 else None)
+    return timings
+
+
+def report(label: str, timings: list, received: list, prefix: str):
+    ok = [timing for timing in timings if timing is not None]
+    got = sum(1 for args in received if args and os.path.basename(args[0]).startswith(prefix))
+    print(f'{label}: {len(ok)}/{len(timings)} accepted, {got} received, '
+          f'median {statistics.median(ok) * 1000:.1f} ms, max {max(ok) * 1000:.1f} ms')
+    return len(ok) == len(timings) == got
+
+
+def check_stale_socket() -> bool:
+    # A socket file nobody listens on, as a crashed Aegnux leaves it
+    path = get_socket_path()
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(str(path))
+    sock.close()
+
+    start = time.perf_counter()
+    refused = not send_request(['/tmp/stale.aep'])
+    elapsed = time.perf_counter() - start
+
+    server = RequestServer(lambda args: None)
+    replaced = server.acquire()
+    server.close()
+    print(f'stale socket: refused {refused} in {elapsed * 1000:.1f} ms, replaced by a new server {replaced}')
+    return refused and replaced
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Single instance socket under bursts of launches')
+    parser.add_argument('--threads', type=int, default=200, help='concurrent in-process clients')
+    parser.add_argument('--processes', type=int, default=20, help='concurrent main.py launches')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as runtime_dir:
+        os.environ['XDG_RUNTIME_DIR'] = runtime_dir
+        passed = check_stale_socket()
+
+        received = []
+        stopped = []
+        server, thread = start_server(received, stopped)
+        try:
+            passed &= report('single launch', burst_processes(1, os.environ.copy(), 'single'), received, 'single')
+            passed &= report('thread burst', burst_threads(args.threads), received, 'burst')
+            passed &= report('process burst', burst_processes(args.processes, os.environ.copy()), received, 'launch')
+        finally:
+            stopped.append(True)
+            server.wakeup()
+
+        thread.join(5)
+        server.close()
+
+    print('OK' if passed else 'FAILED')
+    return 0 if passed else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
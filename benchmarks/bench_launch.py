@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Stands in for the runner's wine and records when it was started
+FAKE_WINE = '''#!/bin/sh
+date +%s.%N > "$FAKE_WINE_MARK"
+'''
+
+
+def make_installation(data_home: str):
+    aegnux_dir = os.path.join(data_home, 'aegnux')
+    for path in ['AE', 'wineprefix', 'tools/bin', 'runner/bin']:
+        os.makedirs(os.path.join(aegnux_dir, path), exist_ok=True)
+
+    with open(os.path.join(aegnux_dir, 'installed'), 'w') as f:
+        f.write('bench')
+
+    wine_path = os.path.join(aegnux_dir, 'runner/bin/wine')
+    with open(wine_path, 'w') as f:
+        f.write(FAKE_WINE)
+    os.chmod(wine_path, 0o755)
+
+
+def time_to_spawn(env: dict, mark: str, aep: str) -> float:
+    # From invoking main.py to the moment wine runs. The fake wine
+    # exits right away, which also ends the GUI path
+    if os.path.exists(mark):
+        os.remove(mark)
+
+    start = time.time()
+    subprocess.run([sys.executable, 'main.py', aep], cwd=ROOT_DIR, env=env, timeout=60,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    if not os.path.exists(mark):
+        raise RuntimeError('wine was never started, is PySide6 installed for the GUI path?')
+
+    with open(mark) as f:
+        return float(f.read()) - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Invocation to wine spawn, fast launcher vs GUI')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_home = os.path.join(tmp, 'data')
+        make_installation(data_home)
+        mark = os.path.join(tmp, 'spawned')
+        aep = os.path.join(tmp, 'project.aep')
+
+        env = os.environ.copy()
+        env['XDG_DATA_HOME'] = data_home
+        env['XDG_STATE_HOME'] = data_home
+        env['FAKE_WINE_MARK'] = mark
+        env['QT_QPA_PLATFORM'] = 'offscreen'
+
+        for label, fast_launch in [('fast launcher', '1'), ('GUI', '0')]:
+            env['AEGNUX_FAST_LAUNCH'] = fast_launch
+            try:
+                time_to_spawn(env, mark, aep)
+                timings = [time_to_spawn(env, mark, aep) for _ in range(args.runs)]
+            except RuntimeError as e:
+                print(f'{label:<14} {e}')
+                continue
+            print(f'{label:<14} median {statistics.median(timings) * 1000:7.1f} ms, min {min(timings) * 1000:7.1f} ms, max {max(timings) * 1000:7.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.renderqueue import (
+    RenderJob, RenderQueue, RenderQueueRunner,
+    make_chunk_jobs, get_chunk_size, get_group_report, format_group_report
+)
+
+FAKE_AERENDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_aerender.py')
+
+
+def run_split(tmp: str, frames: int, workers: int, chunk: int | None) -> dict:
+    queue = RenderQueue(os.path.join(tmp, f'queue-{workers}.json'))
+    output_dir = os.path.join(tmp, f'out-{workers}')
+    os.makedirs(output_dir)
+
+    job = RenderJob('bench.aep', 'Comp 1', os.path.join(output_dir, 'frame_[#####].png'), start_frame=0, end_frame=frames - 1)
+    chunks = make_chunk_jobs(job, chunk or get_chunk_size(0, frames - 1, workers))
+    queue.add_many(chunks)
+
+    RenderQueueRunner(queue, workers).run()
+    return get_group_report(queue.list(), chunks[0].group)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Split render scaling against the worker count')
+    parser.add_argument('--frames', type=int, default=240)
+    parser.add_argument('--workers', default='1,2,4', help='comma separated worker counts')
+    parser.add_argument('--chunk', type=int, help='frames per chunk, derived from the worker count if omitted')
+    parser.add_argument('--aerender', default=FAKE_AERENDER, help='aerender stand-in, the fake one by default')
+    args = parser.parse_args()
+
+    # Real AE needs an .aep and the wine prefix, the fake one only needs
+    # its FAKE_AERENDER_DELAY and FAKE_AERENDER_STARTUP
+    os.environ['AEGNUX_AERENDER'] = args.aerender
+    os.environ.setdefault('FAKE_AERENDER_DELAY', '0.01')
+    os.environ.setdefault('FAKE_AERENDER_STARTUP', '0.2')
+
+    base_fps = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in [int(value) for value in args.workers.split(',')]:
+            start = time.perf_counter()
+            report = run_split(tmp, args.frames, workers, args.chunk)
+            elapsed = time.perf_counter() - start
+
+            base_fps = base_fps or report['fps'] / workers
+            efficiency = report['fps'] / (workers * base_fps) if base_fps else 0
+            print(f'{workers} workers: {elapsed:6.2f} s, scaling efficiency {efficiency * 100:5.1f}%')
+            print(f'  {format_group_report(report)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+import os
+import re
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Time to first paint of a fresh process, including the interpreter itself
+STARTUP_BUDGET_MS = 1000
+# Modules the window must not import before it is needed
+LAZY_MODULES = ['requests', 'src.processthread', 'src.installationthread', 'src.pluginthread']
+
+IMPORTTIME_PATTERN = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def child():
+    # Runs in the measured process: builds the window offscreen and
+    # reports when the first paint event arrives
+    start = time.perf_counter()
+    sys.path.insert(0, ROOT_DIR)
+    os.chdir(ROOT_DIR)
+
+    from PySide6.QtWidgets import QApplication
+    from PySide6.QtCore import QObject, QEvent, QTimer
+    from translations import load_strings
+    from src.mainwindow import MainWindow
+    imported = time.perf_counter()
+
+    load_strings()
+    app = QApplication([sys.argv[0]])
+    window = MainWindow()
+    constructed = time.perf_counter()
+
+    class PaintWatcher(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Type.Paint:
+                painted = time.perf_counter()
+                print(f'{(imported - start) * 1000:.1f} {(constructed - start) * 1000:.1f} {(painted - start) * 1000:.1f}', flush=True)
+                QTimer.singleShot(0, app.quit)
+                window.removeEventFilter(self)
+            return False
+
+    watcher = PaintWatcher()
+    window.installEventFilter(watcher)
+    window.show()
+    QTimer.singleShot(10000, app.quit)
+    app.exec()
+
+
+def get_env(data_home: str) -> dict:
+    env = os.environ.copy()
+    env['QT_QPA_PLATFORM'] = 'offscreen'
+    # A fresh data dir keeps runs comparable, nothing is installed there
+    env['XDG_DATA_HOME'] = data_home
+    env['XDG_STATE_HOME'] = data_home
+    return env
+
+
+def measure_first_paint(env: dict) -> tuple:
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child'],
+        env=env, capture_output=True, text=True, timeout=60
+    )
+    wall = (time.perf_counter() - start) * 1000
+
+    lines = result.stdout.split()
+    if result.returncode != 0 or len(lines) < 3:
+        raise RuntimeError(f'Startup run failed:\n{result.stderr}')
+
+    imported, constructed, painted = (float(value) for value in lines[:3])
+    return wall, imported, constructed, painted
+
+
+def measure_imports(env: dict, top: int) -> tuple:
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import src.app'],
+        env=env, cwd=ROOT_DIR, capture_output=True, text=True, timeout=60
+    )
+    # A failed import would otherwise look like a clean, fully lazy startup
+    if result.returncode != 0:
+        raise RuntimeError(f'Importing src.app failed:\n{result.stderr}')
+
+    modules = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_PATTERN.match(line)
+        if match is not None:
+            modules.append((int(match.group(2)), len(match.group(3)), match.group(4)))
+
+    imported = {name for _, _, name in modules}
+    eager = [name for name in LAZY_MODULES if name in imported]
+
+    # Top level imports only, their cumulative time covers the children
+    roots = sorted((module for module in modules if module[1] <= 1), reverse=True)[:top]
+    return roots, eager
+
+
+def main():
+    if '--child' in sys.argv:
+        child()
+        return 0
+
+    parser = argparse.ArgumentParser(description='GUI startup time, -X importtime and time to first paint')
+    parser.add_argument('-n', '--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help='slowest top level imports to show')
+    parser.add_argument('--budget-ms', type=float, default=STARTUP_BUDGET_MS, help='median time to first paint allowed')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_home:
+        env = get_env(data_home)
+
+        roots, eager = measure_imports(env, args.top)
+        print('Slowest top level imports of src.app (cumulative):')
+        for cumulative, _, name in roots:
+            print(f'  {cumulative / 1000:8.1f} ms  {name}')
+
+        # The first run warms the page cache and .pyc files
+        measure_first_paint(env)
+        runs = [measure_first_paint(env) for _ in range(args.runs)]
+
+    print(f'First paint over {args.runs} runs (median ms):')
+    for i, label in enumerate(['process to first paint', 'imports done', 'window built', 'first paint in process']):
+        print(f'  {label:<24} {statistics.median(run[i] for run in runs):8.1f}')
+
+    failed = False
+    wall = statistics.median(run[0] for run in runs)
+    if wall > args.budget_ms:
+        print(f'Over budget: {wall:.1f} ms > {args.budget_ms:.0f} ms')
+        failed = True
+    if eager:
+        print(f'Imported at startup but should be lazy: {", ".join(eager)}')
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+import os
+import sys
+import time
+import shutil
+import tarfile
+import hashlib
+import tempfile
+import argparse
+import threading
+import functools
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from src.archives import iter_extract_tar_stream
+from src.artifactcache import hash_file
+
+
+class ThrottledHandler(SimpleHTTPRequestHandler):
+    # rate in bytes/s, 0 serves as fast as loopback allows
+    rate = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def copyfile(self, source, outputfile):
+        if not self.rate:
+            return super().copyfile(source, outputfile)
+
+        chunk_size = 64 * 1024
+        start = time.perf_counter()
+        sent = 0
+        while data := source.read(chunk_size):
+            outputfile.write(data)
+            sent += len(data)
+            delay = sent / self.rate - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+
+
+def make_synthetic_tar(path: str, files: int, file_size: int, compression: str):
+    with tempfile.TemporaryDirectory() as src:
+        for i in range(files):
+            # Distinct payloads, a repeated one compresses to almost nothing
+            file_path = os.path.join(src, f'nvidia-libs/dir{i % 20:02}/file{i:05}.dll')
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, 'wb') as f:
+                f.write(os.urandom(file_size // 2) + b'\0' * (file_size - file_size // 2))
+
+        with tarfile.open(path, f'w:{compression}') as tar_ref:
+            tar_ref.add(os.path.join(src, 'nvidia-libs'), 'nvidia-libs')
+
+
+def fingerprint_dir(root: str) -> str:
+    sha = hashlib.sha256()
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            sha.update(f'{os.path.relpath(path, root)}:{hash_file(path)}\n'.encode())
+    return sha.hexdigest()
+
+
+def download_then_unpack(url: str, tmp: str, out: str):
+    # The old path: the whole archive hits the disk before tarfile reads it
+    download_path = os.path.join(tmp, 'download.part')
+    with requests.get(url, stream=True) as r:
+        r.raise_for_status()
+        with open(download_path, 'wb') as f:
+            for chunk in r.iter_content(1024 * 1024):
+                f.write(chunk)
+
+    with tarfile.open(download_path) as tar_ref:
+        tar_ref.extractall(out)
+    return download_path
+
+
+def stream_unpack(url: str, tmp: str, out: str):
+    # Same calls as ProcessThread.stream_unpack_tar, minus the Qt signals
+    tee_path = os.path.join(tmp, 'tee.part')
+    with requests.get(url, stream=True) as r, open(tee_path, 'wb') as tee:
+        r.raise_for_status()
+        r.raw.decode_content = True
+        for _ in iter_extract_tar_stream(r.raw, out, tee):
+            pass
+    return tee_path
+
+
+def measure(label: str, func, url: str, tmp: str, out: str):
+    start = time.perf_counter()
+    archive_path = func(url, tmp, out)
+    elapsed = time.perf_counter() - start
+
+    print(f'{label:<24} {elapsed:8.3f} s')
+    return elapsed, archive_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Download-then-unpack vs streaming TAR extraction over HTTP')
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--file-size', type=int, default=64 * 1024)
+    parser.add_argument('--compression', choices=['xz', 'gz', 'bz2'], default='xz')
+    parser.add_argument('--rate', type=float, default=0, help='simulated link speed in MB/s, 0 for unlimited')
+    parser.add_argument('--tmpdir', default=None)
+    args = parser.parse_args()
+
+    ThrottledHandler.rate = args.rate * 1024 * 1024
+
+    with tempfile.TemporaryDirectory(dir=args.tmpdir) as tmp:
+        serve_dir = os.path.join(tmp, 'serve')
+        os.makedirs(serve_dir)
+        tar_path = os.path.join(serve_dir, f'nvidia-libs.tar.{args.compression}')
+        make_synthetic_tar(tar_path, args.files, args.file_size, args.compression)
+        print(f'{args.files} files x {args.file_size} B, {os.path.getsize(tar_path)} B {args.compression} archive')
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(ThrottledHandler, directory=serve_dir))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_address[1]}/{os.path.basename(tar_path)}'
+
+        try:
+            download_out = os.path.join(tmp, 'download')
+            stream_out = os.path.join(tmp, 'stream')
+
+            download, _ = measure('download then unpack', download_then_unpack, url, tmp, download_out)
+            stream, tee_path = measure('streaming', stream_unpack, url, tmp, stream_out)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        # The streamed tree and the tee copy (what goes into the artifact cache) must be exact
+        if fingerprint_dir(stream_out) != fingerprint_dir(download_out):
+            sys.exit('FAIL: streamed extraction differs from the downloaded one')
+        if hash_file(tee_path) != hash_file(tar_path):
+            sys.exit('FAIL: tee copy differs from the served archive')
+
+        print(f'speedup: {download / stream:.2f}x')
+        shutil.rmtree(download_out)
+        shutil.rmtree(stream_out)
+
+
+if __name__ == '__main__':
+    main()
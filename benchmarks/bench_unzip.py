@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+import shutil
+import zipfile
+import tempfile
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.archives import get_zip_file_members, iter_extract_zip_serial, iter_extract_zip_parallel
+from src.config import UNZIP_WORKERS
+
+
+def make_synthetic_zip(path: str, files: int, file_size: int):
+    payload = os.urandom(file_size // 2) + b'\0' * (file_size - file_size // 2)
+
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zip_ref:
+        for i in range(files):
+            zip_ref.writestr(f'AE/Support Files/dir{i % 100:03}/file{i:06}.dat', payload)
+
+
+def measure(label: str, extraction, workdir: str):
+    start = time.perf_counter()
+    for _ in extraction:
+        pass
+    elapsed = time.perf_counter() - start
+
+    print(f'{label:<24} {elapsed:8.3f} s')
+    shutil.rmtree(workdir)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serial vs parallel ZIP extraction')
+    parser.add_argument('--files', type=int, default=20000)
+    parser.add_argument('--file-size', type=int, default=4096)
+    parser.add_argument('--workers', type=int, default=UNZIP_WORKERS)
+    parser.add_argument('--tmpdir', default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.tmpdir) as tmp:
+        zip_path = os.path.join(tmp, 'synthetic.zip')
+        make_synthetic_zip(zip_path, args.files, args.file_size)
+        print(f'{args.files} files x {args.file_size} B, {args.workers} workers')
+
+        members = get_zip_file_members(zip_path)
+        out = os.path.join(tmp, 'out')
+
+        serial = measure('serial', iter_extract_zip_serial(zip_path, out, members), out)
+        parallel = measure('parallel', iter_extract_zip_parallel(zip_path, out, members, args.workers), out)
+
+        print(f'speedup: {serial / parallel:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
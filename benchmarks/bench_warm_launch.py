@@ -0,0 +1,66 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import WINE_RUNNER_DIR
+
+
+def get_env(prefix: str, runner: str) -> dict:
+    env = os.environ.copy()
+    env['WINEPREFIX'] = prefix
+    env['WINEDEBUG'] = '-all'
+    env['PATH'] = f'{runner}/bin:{env.get("PATH", os.defpath)}'
+    return env
+
+
+def time_to_spawn(env: dict) -> float:
+    # Time until a Windows process inside the prefix is up and writes to stdout
+    start = time.perf_counter()
+    process = subprocess.Popen(['wine', 'cmd', '/c', 'echo', 'ready'], env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    process.stdout.readline()
+    elapsed = time.perf_counter() - start
+    process.wait()
+    return elapsed
+
+
+def bench_cold(env: dict, runs: int) -> list:
+    timings = []
+    for _ in range(runs):
+        subprocess.run(['wineserver', '-k'], env=env)
+        subprocess.run(['wineserver', '-w'], env=env)
+        timings.append(time_to_spawn(env))
+    return timings
+
+
+def bench_warm(env: dict, runs: int) -> list:
+    subprocess.run(['wineserver', '-k'], env=env)
+    subprocess.run(['wineserver', '-w'], env=env)
+    subprocess.run(['wineserver', '-p60'], env=env)
+    time_to_spawn(env)
+
+    timings = [time_to_spawn(env) for _ in range(runs)]
+    subprocess.run(['wineserver', '-k'], env=env)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='cold vs warm wineserver time-to-process-spawn')
+    parser.add_argument('prefix', help='an initialized wineprefix')
+    parser.add_argument('--runner', default=WINE_RUNNER_DIR)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    env = get_env(os.path.abspath(args.prefix), args.runner)
+
+    for label, bench in [('cold', bench_cold), ('warm', bench_warm)]:
+        timings = bench(env, args.runs)
+        print(f'{label:<6} median {statistics.median(timings):6.3f} s, min {min(timings):6.3f} s, max {max(timings):6.3f} s')
+
+
+if __name__ == '__main__':
+    main()
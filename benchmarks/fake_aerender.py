@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# Stands in for wine + aerender.exe: AEGNUX_AERENDER=benchmarks/fake_aerender.py
+# FAKE_AERENDER_FRAMES    frames to render when -s/-e are not given (default 48)
+# FAKE_AERENDER_DELAY     seconds per frame (default 0.01)
+# FAKE_AERENDER_STARTUP   seconds before the first frame, like AE loading the project (default 0)
+# FAKE_AERENDER_FAIL_FILE fail while this file holds a positive number, decrementing it
+# FAKE_AERENDER_SKIP      comma separated frames to leave out of an image sequence
+# An -output with [###] gets one small file per frame
+import os
+import re
+import sys
+import time
+
+
+def get_arg(args: list, name: str, default=None):
+    if name in args:
+        return args[args.index(name) + 1]
+    return default
+
+
+def should_fail() -> bool:
+    fail_file = os.getenv('FAKE_AERENDER_FAIL_FILE')
+    if not fail_file or not os.path.exists(fail_file):
+        return False
+
+    with open(fail_file) as f:
+        remaining = int(f.read().strip() or 0)
+    if remaining <= 0:
+        return False
+
+    with open(fail_file, 'w') as f:
+        f.write(str(remaining - 1))
+    return True
+
+
+def main():
+    args = sys.argv[1:]
+    frame_rate = 24
+    start = int(get_arg(args, '-s', 0))
+    end = int(get_arg(args, '-e', start + int(os.getenv('FAKE_AERENDER_FRAMES', 48)) - 1))
+    delay = float(os.getenv('FAKE_AERENDER_DELAY', 0.01))
+    comp = get_arg(args, '-comp', 'Comp 1')
+    output = get_arg(args, '-output')
+    if output is not None:
+        output = output.removeprefix('Z:')
+    skip = {int(frame) for frame in os.getenv('FAKE_AERENDER_SKIP', '').split(',') if frame.strip()}
+
+    duration = end - start + 1
+    print(f'PROGRESS:  Starting composition “{comp}”.')
+    print(f'PROGRESS:  Start: 0:00:{start // frame_rate:02}:{start % frame_rate:02}')
+    print(f'PROGRESS:  Duration: 0:00:{duration // frame_rate:02}:{duration % frame_rate:02}')
+    print(f'PROGRESS:  Frame Rate: {frame_rate:.2f} (comp)')
+    sys.stdout.flush()
+
+    time.sleep(float(os.getenv('FAKE_AERENDER_STARTUP', 0)))
+    fail = should_fail()
+    for frame in range(start, end + 1):
+        if fail and frame - start >= duration // 2:
+            print('aerender ERROR: Fake failure halfway through the render')
+            return 1
+        time.sleep(delay)
+        if output is not None and frame not in skip:
+            frame_path = re.sub(r'\[(#+)\]', lambda match: str(frame).zfill(len(match.group(1))), output, count=1)
+            if frame_path != output:
+                with open(frame_path, 'wb') as f:
+                    f.write(b'frame')
+        print(f'PROGRESS:  0:00:{frame // frame_rate:02}:{frame % frame_rate:02} ({frame - start + 1}): 0 Seconds')
+        sys.stdout.flush()
+
+    print(f'PROGRESS:  Finished composition “{comp}”.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,26 @@
-from src.app import main
+import sys
 
 if __name__ == "__main__":
+    if '--warm' in sys.argv:
+        from src.warmserver import warm_up
+        exit(warm_up())
+
+    if '--logs' in sys.argv:
+        from src.logsearch import main as search_logs
+        exit(search_logs(sys.argv[sys.argv.index('--logs') + 1:]))
+
+    if '--render' in sys.argv:
+        from src.rendercli import main as render
+        exit(render(sys.argv[sys.argv.index('--render') + 1:]))
+
+    # A running Aegnux window takes over, this process is done in milliseconds
+    from src.singleinstance import send_request
+    if send_request(sys.argv[1:]):
+        exit(0)
+
+    # Opening an .aep or a misterhorsepm:// link execs wine without loading Qt
+    from src.fastlaunch import try_fast_launch
+    try_fast_launch()
+
+    from src.app import main
     exit(main())
\ No newline at end of file
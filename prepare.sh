@@ -59,5 +59,14 @@ echo Downloading dxvk...
 curl -LO https://github.com/doitsujin/dxvk/releases/download/v2.7.1/dxvk-2.7.1.tar.gz
 mv dxvk-2.7.1.tar.gz ./assets/dxvk.tar.gz
 
+
+# Download corefonts packages
+echo Downloading corefonts...
+mkdir -p ./assets/corefonts
+for font in andale32 arial32 arialb32 comic32 courie32 georgi32 impact32 times32 trebuc32 verdan32 webdin32; do
+    curl -L -o ./assets/corefonts/$font.exe https://github.com/pushcx/corefonts/raw/master/$font.exe
+done
+
+
 echo --------------------------------------------
 echo Done!
\ No newline at end of file
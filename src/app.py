@@ -3,6 +3,7 @@ from PySide6.QtWidgets import QApplication
 from PySide6.QtGui import QIcon
 from src.mainwindow import MainWindow
 from src.config import DESKTOP_FILE_NAME, AE_ICON_PATH
+from src.utils import check_aegnux_installed
 from translations import load_strings
 
 def main():
@@ -14,13 +15,15 @@ def main():
     show_window = True
     quit_after_handling_args = False
 
-    for arg in sys.argv:
+    # Without an installation there is nothing to open, show the installer
+    for arg in sys.argv if check_aegnux_installed() else []:
         if 'misterhorsepm://' in arg or '.aep' in arg:
             show_window = False
             quit_after_handling_args = True
             break
 
     mainWindow = MainWindow(quit_after_handling_args)
+    app.aboutToQuit.connect(mainWindow.stop_request_server)
     
     if show_window:
         mainWindow.show()
@@ -0,0 +1,208 @@
+import os
+import shutil
+import zipfile
+import tarfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from src.config import UNZIP_WORKERS, UNZIP_BATCH_SIZE, UNZIP_PARALLEL_MIN_FILES, COPY_CHUNK_SIZE
+
+_worker_zip = None
+
+
+def _init_zip_worker(zip_file_path: str):
+    # Every worker keeps its own handle so reads never fight over one file offset
+    global _worker_zip
+    _worker_zip = zipfile.ZipFile(zip_file_path, 'r')
+
+
+def _extract_zip_batch(names: list, extract_to_path: str) -> int:
+    for name in names:
+        _worker_zip.extract(name, extract_to_path)
+    return len(names)
+
+
+def get_zip_file_members(zip_file_path: str) -> list:
+    with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
+        members = [m for m in zip_ref.infolist() if not m.is_dir()]
+
+    members.sort(key=lambda m: m.header_offset)
+    return members
+
+
+def get_member_path(name: str, extract_to_path: str) -> str:
+    # Same cleanup ZipFile.extract applies: no drive, no absolute paths and
+    # no '..', so every member lands inside extract_to_path
+    name = name.replace('/', os.path.sep)
+    if os.path.altsep:
+        name = name.replace(os.path.altsep, os.path.sep)
+    name = os.path.splitdrive(name)[1]
+    parts = [part for part in name.split(os.path.sep) if part not in ('', os.path.curdir, os.path.pardir)]
+    return os.path.join(extract_to_path, *parts)
+
+
+def _iter_extract_member(zip_ref: zipfile.ZipFile, file_info: zipfile.ZipInfo, extract_to_path: str):
+    # Yields after every chunk, so a cancel doesn't wait for a large member.
+    # Closing the generator early removes the partial file
+    target_path = get_member_path(file_info.filename, extract_to_path)
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+
+    done = False
+    try:
+        with zip_ref.open(file_info) as src_f, open(target_path, 'wb') as dst_f:
+            while True:
+                chunk = src_f.read(COPY_CHUNK_SIZE)
+                if not chunk:
+                    break
+                dst_f.write(chunk)
+                yield
+        done = True
+    finally:
+        if not done and os.path.exists(target_path):
+            os.remove(target_path)
+
+
+def split_into_batches(members: list, batch_size: int) -> list:
+    return [
+        [m.filename for m in members[i:i + batch_size]]
+        for i in range(0, len(members), batch_size)
+    ]
+
+
+def iter_extract_zip_serial(zip_file_path: str, extract_to_path: str, members: list | None = None):
+    if members is None:
+        members = get_zip_file_members(zip_file_path)
+
+    os.makedirs(extract_to_path, exist_ok=True)
+
+    with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
+        for extracted_files, file_info in enumerate(members):
+            for _ in _iter_extract_member(zip_ref, file_info, extract_to_path):
+                yield extracted_files, len(members)
+            yield extracted_files + 1, len(members)
+
+
+def iter_extract_zip_parallel(
+        zip_file_path: str, extract_to_path: str,
+        members: list | None = None, workers: int = UNZIP_WORKERS,
+        batch_size: int = UNZIP_BATCH_SIZE
+    ):
+    # Batches follow the archive offset order, so every worker reads a contiguous
+    # region of the file. Closing the generator cancels the pending batches.
+    if members is None:
+        members = get_zip_file_members(zip_file_path)
+
+    total_files = len(members)
+    os.makedirs(extract_to_path, exist_ok=True)
+
+    if total_files == 0:
+        return
+
+    # Parent directories are created upfront, otherwise workers race on makedirs
+    parent_dirs = {os.path.dirname(get_member_path(m.filename, extract_to_path)) for m in members}
+    for parent_dir in parent_dirs:
+        os.makedirs(parent_dir, exist_ok=True)
+
+    batches = split_into_batches(members, batch_size)
+    workers = max(1, min(workers, len(batches)))
+
+    # We're usually called from a QThread, forking a threaded Qt process is unsafe
+    mp_context = multiprocessing.get_context('spawn')
+
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=mp_context,
+        initializer=_init_zip_worker,
+        initargs=(zip_file_path,)
+    )
+
+    extracted_files = 0
+
+    try:
+        pending = {executor.submit(_extract_zip_batch, batch, extract_to_path) for batch in batches}
+
+        while pending:
+            done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            for future in done:
+                extracted_files += future.result()
+
+            yield extracted_files, total_files
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def iter_extract_zip(zip_file_path: str, extract_to_path: str, workers: int = UNZIP_WORKERS, names: set | None = None):
+    # names limits the extraction to those entries
+    members = get_zip_file_members(zip_file_path)
+    if names is not None:
+        members = [m for m in members if m.filename in names]
+
+    if workers <= 1 or len(members) < UNZIP_PARALLEL_MIN_FILES:
+        return iter_extract_zip_serial(zip_file_path, extract_to_path, members)
+
+    return iter_extract_zip_parallel(zip_file_path, extract_to_path, members, workers)
+
+
+def extract_zip_entry(zip_ref: zipfile.ZipFile, file_info: zipfile.ZipInfo, destination):
+    # Written next to the destination and renamed over it, an interrupted
+    # extraction never leaves half a file where the old one was
+    destination = os.fspath(destination)
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    tmp_path = f'{destination}.{os.getpid()}.tmp'
+
+    try:
+        with zip_ref.open(file_info) as src_f, open(tmp_path, 'wb') as dst_f:
+            shutil.copyfileobj(src_f, dst_f, COPY_CHUNK_SIZE)
+        os.replace(tmp_path, destination)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def iter_extract_zip_routed(zip_file_path: str, targets: list):
+    # Extracts (ZipInfo, destination) pairs straight to their final paths
+    # instead of mirroring the archive layout under one directory
+    with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
+        for extracted_files, (file_info, destination) in enumerate(targets, start=1):
+            extract_zip_entry(zip_ref, file_info, destination)
+            yield extracted_files, len(targets)
+
+
+class CountingReader:
+    def __init__(self, fileobj, tee=None):
+        self.fileobj = fileobj
+        self.tee = tee
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.fileobj.read(size)
+        self.bytes_read += len(data)
+        if self.tee is not None:
+            self.tee.write(data)
+        return data
+
+    def drain(self, chunk_size: int = 1024 * 1024):
+        while self.read(chunk_size):
+            pass
+
+
+def iter_extract_tar_stream(fileobj, extract_to_path: str, tee=None):
+    # Stream mode ('r|*') decompresses exactly once and never seeks backwards,
+    # so the archive can be consumed straight from a socket while it arrives
+    reader = CountingReader(fileobj, tee)
+    os.makedirs(extract_to_path, exist_ok=True)
+
+    extracted_files = 0
+
+    with tarfile.open(fileobj=reader, mode='r|*') as tar_ref:
+        for member in tar_ref:
+            if not member.isfile():
+                continue
+
+            tar_ref.extract(member, extract_to_path)
+            extracted_files += 1
+            yield extracted_files, reader.bytes_read
+
+    # tarfile stops at the end-of-archive marker, the tee copy needs the padding too
+    if tee is not None:
+        reader.drain()
@@ -0,0 +1,204 @@
+import os
+import json
+import time
+import fcntl
+import shutil
+import hashlib
+import tempfile
+from pathlib import Path
+from contextlib import contextmanager
+from src.config import ARTIFACT_CACHE_MAX_SIZE, HASH_CHUNK_SIZE
+
+
+def hash_file(path) -> str:
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(HASH_CHUNK_SIZE)
+            if not data:
+                break
+            sha.update(data)
+    return sha.hexdigest()
+
+
+def get_aegnux_cache_dir() -> Path:
+    cache_dir = os.getenv('AEGNUX_CACHE_DIR')
+    if cache_dir is None:
+        cache_home = os.getenv('XDG_CACHE_HOME', os.path.expanduser('~/.cache'))
+        cache_dir = Path(cache_home).joinpath('aegnux')
+
+    return Path(cache_dir)
+
+
+def get_artifact_cache_dir() -> Path:
+    artifacts_dir = get_aegnux_cache_dir().joinpath('artifacts')
+    os.makedirs(artifacts_dir, exist_ok=True)
+
+    return artifacts_dir
+
+
+class ArtifactCache:
+    # Objects are stored as objects/<sha[:2]>/<sha256>. The index maps
+    # artifact keys (URLs, asset names) to hashes and keeps LRU timestamps.
+    # Every index update happens under an flock, so several users or
+    # processes can share one cache directory.
+
+    def __init__(self, root: Path | None = None, max_size: int = ARTIFACT_CACHE_MAX_SIZE):
+        self.root = Path(root) if root is not None else get_artifact_cache_dir()
+        self.max_size = max_size
+        self.objects_dir = self.root.joinpath('objects')
+        self.index_path = self.root.joinpath('index.json')
+        self.lock_path = self.root.joinpath('.lock')
+
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+    @contextmanager
+    def _locked_index(self):
+        with open(self.lock_path, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                index = self._read_index()
+                yield index
+                self._write_index(index)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _read_index(self) -> dict:
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+
+        index.setdefault('keys', {})
+        index.setdefault('objects', {})
+        index.setdefault('files', {})
+        return index
+
+    def _write_index(self, index: dict):
+        tmp_path = self.index_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_path)
+
+    def get_object_path(self, sha256: str) -> Path:
+        return self.objects_dir.joinpath(sha256[:2], sha256)
+
+    def get_object_signature(self, object_path: Path) -> list:
+        stat = object_path.stat()
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def file_digest(self, path) -> str:
+        # Memoized by (size, mtime), bundled assets don't get rehashed on every install
+        path = Path(path).resolve()
+        stat = path.stat()
+        signature = [stat.st_size, stat.st_mtime_ns]
+
+        with self._locked_index() as index:
+            known = index['files'].get(path.as_posix())
+            if known is not None and known['signature'] == signature:
+                return known['sha256']
+
+        sha256 = hash_file(path)
+
+        with self._locked_index() as index:
+            index['files'][path.as_posix()] = {'signature': signature, 'sha256': sha256}
+
+        return sha256
+
+    def lookup(self, key: str, expected_sha256: str | None = None) -> Path | None:
+        with self._locked_index() as index:
+            sha256 = expected_sha256 or index['keys'].get(key)
+            if sha256 is None or sha256 not in index['objects']:
+                return None
+
+            object_path = self.get_object_path(sha256)
+            try:
+                signature = self.get_object_signature(object_path)
+            except FileNotFoundError:
+                index['objects'].pop(sha256, None)
+                return None
+            known_signature = index['objects'][sha256].get('signature')
+
+        # Objects are hashed when stored, a hit only rehashes if the file changed since
+        if signature != known_signature and hash_file(object_path) != sha256:
+            self.discard(sha256)
+            return None
+
+        with self._locked_index() as index:
+            if sha256 in index['objects']:
+                index['objects'][sha256]['last_used'] = time.time()
+                index['objects'][sha256]['signature'] = signature
+                index['keys'][key] = sha256
+
+        return object_path
+
+    def store(self, key: str, path, move: bool = False, expected_sha256: str | None = None) -> Path:
+        sha256 = hash_file(path)
+        if expected_sha256 is not None and sha256 != expected_sha256:
+            raise ValueError(f'Hash mismatch for {key}: expected {expected_sha256}, got {sha256}')
+
+        object_path = self.get_object_path(sha256)
+        os.makedirs(object_path.parent, exist_ok=True)
+
+        if not object_path.exists():
+            # Unique per writer, two installs may store the same object at once
+            tmp_fd, tmp_path = tempfile.mkstemp(dir=object_path.parent, prefix=f'.{sha256}.', suffix='.tmp')
+            os.close(tmp_fd)
+            try:
+                if move:
+                    shutil.move(path, tmp_path)
+                else:
+                    shutil.copyfile(path, tmp_path)
+                os.chmod(tmp_path, 0o644)
+                os.replace(tmp_path, object_path)
+            except BaseException:
+                try:
+                    os.remove(tmp_path)
+                except FileNotFoundError:
+                    pass
+                raise
+        elif move:
+            os.remove(path)
+
+        signature = self.get_object_signature(object_path)
+        with self._locked_index() as index:
+            index['keys'][key] = sha256
+            index['objects'][sha256] = {
+                'size': signature[0],
+                'signature': signature,
+                'last_used': time.time()
+            }
+            self._evict(index, keep=sha256)
+
+        return object_path
+
+    def discard(self, sha256: str):
+        with self._locked_index() as index:
+            index['objects'].pop(sha256, None)
+            for key in [k for k, v in index['keys'].items() if v == sha256]:
+                del index['keys'][key]
+
+        try:
+            os.remove(self.get_object_path(sha256))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self, index: dict, keep: str | None = None):
+        objects = index['objects']
+        total_size = sum(o['size'] for o in objects.values())
+
+        for sha256 in sorted(objects, key=lambda s: objects[s]['last_used']):
+            if total_size <= self.max_size:
+                break
+            if sha256 == keep:
+                continue
+
+            total_size -= objects.pop(sha256)['size']
+            for key in [k for k, v in index['keys'].items() if v == sha256]:
+                del index['keys'][key]
+
+            try:
+                os.remove(self.get_object_path(sha256))
+            except FileNotFoundError:
+                pass
@@ -1,6 +1,13 @@
 import os
+from src.types import Resource
 
 LOG_THROTTLE_SECONDS=0.1
+LOG_BATCH_SECONDS = 1 / 60
+LOG_FRAME_INTERVAL_MS = 16
+LOG_BUFFER_MAX_LINES = 50000
+LOG_VIEW_MAX_LINES = 5000
+PROCESS_READ_SIZE = 64 * 1024
+PROCESS_MAX_LINE_LENGTH = 64 * 1024
 DESKTOP_FILE_NAME='com.relative.Aegnux'
 
 BASE_DIR = os.getcwd()
@@ -26,4 +33,65 @@ AE_PLUGINS_URL = 'i dont support piracy either'
 
 AE_FILENAME = '/tmp/ae2024.zip'
 
-DOWNLOAD_CHUNK_SIZE=1024
\ No newline at end of file
+NVIDIA_LIBS_URL = 'https://github.com/SveSop/nvidia-libs/releases/download/v0.8.5/nvidia-libs-v0.8.5.tar.xz'
+
+DOWNLOAD_CHUNK_SIZE=1024 * 1024
+DOWNLOAD_CONNECTIONS=4
+DOWNLOAD_SEGMENT_SIZE=16 * 1024 * 1024
+DOWNLOAD_RETRIES=3
+DOWNLOAD_PROBE_TIMEOUT=15
+
+UNZIP_WORKERS = os.cpu_count() or 1
+UNZIP_BATCH_SIZE = 64
+UNZIP_PARALLEL_MIN_FILES = 256
+
+ARTIFACT_CACHE_MAX_SIZE = 20 * 1024 * 1024 * 1024
+HASH_CHUNK_SIZE = 1024 * 1024
+
+COPY_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+COPY_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Silent plugin installers run side by side in the shared prefix, the
+# interactive ones stay one at a time since they need the user
+PLUGIN_INSTALLER_CONCURRENCY = 4
+PLUGIN_INSTALLER_TIMEOUT = 10 * 60
+INTERACTIVE_PLUGIN_INSTALLERS = ['E3D.exe', 'saber.exe']
+
+ENABLE_PREFIX_TEMPLATE = True
+# auto, reflink, hardlink or copy
+PREFIX_CLONE_MODE = 'auto'
+PREFIX_TEMPLATE_FORMAT = 1
+
+STEP_GRAPH_WORKERS = 4
+STEP_RESOURCE_LIMITS = {
+    Resource.CPU: 2,
+    Resource.DISK: 2,
+    Resource.WINESERVER: 1
+}
+
+USE_NATIVE_COREFONTS = True
+COREFONTS_URL = 'https://github.com/pushcx/corefonts/raw/master'
+COREFONTS_DIR = BASE_DIR + '/assets/corefonts'
+
+# Seconds a warm wineserver stays alive after the last wine process exits
+WARM_WINESERVER_IDLE_TIMEOUT = 30 * 60
+
+SESSION_LOG_BLOCK_SIZE = 256 * 1024
+SESSION_LOG_FLUSH_SECONDS = 5
+SESSION_LOG_MAX_FILE_SIZE = 256 * 1024 * 1024
+SESSION_LOG_MAX_AGE_DAYS = 14
+SESSION_LOG_MAX_TOTAL_SIZE = 2 * 1024 * 1024 * 1024
+
+AERENDER_EXE = 'aerender.exe'
+RENDER_CONCURRENCY = 2
+RENDER_MAX_RETRIES = 2
+# Last lines of aerender output kept with a job for error reports
+RENDER_LOG_TAIL_LINES = 20
+# A split render cuts its frame range into this many chunks per worker, so
+# a worker that finishes early pulls more instead of idling
+RENDER_CHUNKS_PER_WORKER = 4
+
+# Later launches hand their arguments to the running Aegnux over a local socket
+IPC_TIMEOUT = 2
+IPC_BACKLOG = 64
+IPC_MAX_REQUEST_SIZE = 64 * 1024
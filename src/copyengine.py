@@ -0,0 +1,234 @@
+import os
+import errno
+import fcntl
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from src.config import COPY_WORKERS, COPY_CHUNK_SIZE
+
+FICLONE = 0x40049409
+
+# Errors meaning "this kernel/filesystem can't do it", not a real I/O failure
+UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL}
+
+# (method, src device, dst device) combinations that already failed once
+_unsupported = set()
+
+
+def reflink_file(src: str, dst: str) -> bool:
+    try:
+        with open(src, 'rb') as src_f, open(dst, 'wb') as dst_f:
+            fcntl.ioctl(dst_f.fileno(), FICLONE, src_f.fileno())
+    except OSError:
+        if os.path.exists(dst):
+            os.remove(dst)
+        return False
+
+    shutil.copystat(src, dst)
+    return True
+
+
+def _try_reflink(src_fd: int, dst_fd: int, devices: tuple) -> bool:
+    if ('reflink',) + devices in _unsupported:
+        return False
+
+    try:
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+        return True
+    except OSError as e:
+        if e.errno not in UNSUPPORTED_ERRNOS:
+            raise
+        _unsupported.add(('reflink',) + devices)
+        return False
+
+
+def _copy_range(method: str, src_fd: int, dst_fd: int, offset: int, size: int, devices: tuple, on_bytes) -> int:
+    # Copies with copy_file_range or sendfile starting at offset, returns
+    # the offset reached. Stops early, without raising, if unsupported
+    if (method,) + devices in _unsupported:
+        return offset
+
+    if method == 'sendfile':
+        # sendfile writes at the current position of dst_fd
+        os.lseek(dst_fd, offset, os.SEEK_SET)
+
+    while offset < size:
+        count = min(size - offset, COPY_CHUNK_SIZE)
+        try:
+            if method == 'copy_file_range':
+                copied = os.copy_file_range(src_fd, dst_fd, count, offset, offset)
+            else:
+                copied = os.sendfile(dst_fd, src_fd, offset, count)
+        except OSError as e:
+            if e.errno not in UNSUPPORTED_ERRNOS:
+                raise
+            _unsupported.add((method,) + devices)
+            break
+
+        if copied == 0:
+            break
+        offset += copied
+        on_bytes(copied)
+
+    return offset
+
+
+def _copy_buffered(src_fd: int, dst_fd: int, offset: int, on_bytes) -> int:
+    while True:
+        data = os.pread(src_fd, COPY_CHUNK_SIZE, offset)
+        if not data:
+            return offset
+
+        view = memoryview(data)
+        while view:
+            written = os.pwrite(dst_fd, view, offset)
+            view = view[written:]
+            offset += written
+        on_bytes(len(data))
+
+
+def _copy_fd(src_fd: int, dst_fd: int, on_bytes) -> int:
+    size = os.fstat(src_fd).st_size
+    devices = (os.fstat(src_fd).st_dev, os.fstat(dst_fd).st_dev)
+
+    if size > 0 and _try_reflink(src_fd, dst_fd, devices):
+        on_bytes(size)
+        offset = size
+    else:
+        offset = 0
+        if hasattr(os, 'copy_file_range'):
+            offset = _copy_range('copy_file_range', src_fd, dst_fd, offset, size, devices, on_bytes)
+        if offset < size:
+            offset = _copy_range('sendfile', src_fd, dst_fd, offset, size, devices, on_bytes)
+        # Also picks up anything appended since fstat
+        offset = _copy_buffered(src_fd, dst_fd, offset, on_bytes)
+
+    return offset
+
+
+def copy_file(src, dst, on_bytes=None) -> int:
+    # Like shutil.copy2: reflink, then copy_file_range, then sendfile, then
+    # a plain read/write loop. on_bytes(n) is called as data lands in dst
+    on_bytes = on_bytes if on_bytes is not None else (lambda n: None)
+
+    # Written aside and renamed over dst: dst may be a hardlink of src (or
+    # of a template or the runner store), opening it for writing would
+    # truncate the shared file
+    dst = os.fspath(dst)
+    tmp_fd, tmp_path = tempfile.mkstemp(prefix=f'.{os.path.basename(dst)}.', suffix='.tmp', dir=os.path.dirname(dst) or '.')
+
+    try:
+        with os.fdopen(tmp_fd, 'wb') as dst_f, open(src, 'rb') as src_f:
+            offset = _copy_fd(src_f.fileno(), dst_f.fileno(), on_bytes)
+
+        shutil.copystat(src, tmp_path)
+        os.replace(tmp_path, dst)
+    except BaseException:
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return offset
+
+
+def _copy_symlink(src: str, dst: str):
+    if os.path.lexists(dst):
+        os.remove(dst)
+    os.symlink(os.readlink(src), dst)
+
+
+def plan_tree_copy(src_dir: str, dst_dir: str) -> tuple:
+    # Creates the directory structure and symlinks up front and returns
+    # (files to copy as (src, dst, size), directories to copystat afterwards)
+    files = []
+    dirs = []
+
+    for dirpath, dirnames, filenames in os.walk(src_dir):
+        target_dir = os.path.normpath(os.path.join(dst_dir, os.path.relpath(dirpath, src_dir)))
+        os.makedirs(target_dir, exist_ok=True)
+        dirs.append((dirpath, target_dir))
+
+        # os.walk doesn't descend into symlinked dirs, but lists them in dirnames
+        for name in dirnames + filenames:
+            src = os.path.join(dirpath, name)
+            dst = os.path.join(target_dir, name)
+
+            if os.path.islink(src):
+                _copy_symlink(src, dst)
+            elif not os.path.isdir(src):
+                files.append((src, dst, os.path.getsize(src)))
+
+    return files, dirs
+
+
+def iter_copy_tree(src_dir, dst_dir, workers: int = COPY_WORKERS, hardlink: bool = False):
+    # Copies src_dir into dst_dir (existing files are overwritten) on a
+    # thread pool and yields (copied bytes, total bytes). Closing the
+    # generator stops the copy once the running files are done
+    src_dir = os.fspath(src_dir)
+    dst_dir = os.fspath(dst_dir)
+
+    files, dirs = plan_tree_copy(src_dir, dst_dir)
+    total = sum(size for _, _, size in files)
+
+    lock = threading.Lock()
+    stop = threading.Event()
+    copied = [0]
+
+    def on_bytes(count: int):
+        with lock:
+            copied[0] += count
+
+    def copy_one(src: str, dst: str, size: int):
+        if stop.is_set():
+            return
+
+        if hardlink:
+            try:
+                if os.path.lexists(dst):
+                    os.remove(dst)
+                os.link(src, dst)
+                on_bytes(size)
+                return
+            except OSError:
+                pass
+
+        copy_file(src, dst, on_bytes)
+
+    # Biggest files first, so one large file doesn't trail at the end
+    files.sort(key=lambda entry: entry[2], reverse=True)
+
+    executor = ThreadPoolExecutor(max_workers=max(1, workers))
+    futures = {executor.submit(copy_one, *entry) for entry in files}
+
+    try:
+        while futures:
+            done, futures = wait(futures, timeout=0.1, return_when=FIRST_EXCEPTION)
+            for future in done:
+                future.result()
+            yield copied[0], total
+    finally:
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    for src, dst in reversed(dirs):
+        shutil.copystat(src, dst)
+
+    yield total, total
+
+
+def copy_tree(src_dir, dst_dir, workers: int = COPY_WORKERS, hardlink: bool = False) -> int:
+    total = 0
+    for _, total in iter_copy_tree(src_dir, dst_dir, workers, hardlink):
+        pass
+    return total
+
+
+def copy_path(src, dst, workers: int = COPY_WORKERS) -> int:
+    if os.path.islink(src):
+        _copy_symlink(os.fspath(src), os.fspath(dst))
+        return 0
+    if os.path.isdir(src):
+        return copy_tree(src, dst, workers)
+    return copy_file(src, dst)
@@ -0,0 +1,197 @@
+import os
+import struct
+import zlib
+import tempfile
+import subprocess
+from pathlib import Path
+from src.config import COREFONTS_URL, COREFONTS_DIR
+
+COREFONTS_PACKAGES = [
+    'andale32.exe', 'arial32.exe', 'arialb32.exe', 'comic32.exe',
+    'courie32.exe', 'georgi32.exe', 'impact32.exe', 'times32.exe',
+    'trebuc32.exe', 'verdan32.exe', 'webdin32.exe'
+]
+
+FONT_NAMES = {
+    'andalemo.ttf': 'Andale Mono',
+    'arial.ttf': 'Arial',
+    'arialbd.ttf': 'Arial Bold',
+    'arialbi.ttf': 'Arial Bold Italic',
+    'ariali.ttf': 'Arial Italic',
+    'ariblk.ttf': 'Arial Black',
+    'comic.ttf': 'Comic Sans MS',
+    'comicbd.ttf': 'Comic Sans MS Bold',
+    'cour.ttf': 'Courier New',
+    'courbd.ttf': 'Courier New Bold',
+    'courbi.ttf': 'Courier New Bold Italic',
+    'couri.ttf': 'Courier New Italic',
+    'georgia.ttf': 'Georgia',
+    'georgiab.ttf': 'Georgia Bold',
+    'georgiai.ttf': 'Georgia Italic',
+    'georgiaz.ttf': 'Georgia Bold Italic',
+    'impact.ttf': 'Impact',
+    'times.ttf': 'Times New Roman',
+    'timesbd.ttf': 'Times New Roman Bold',
+    'timesbi.ttf': 'Times New Roman Bold Italic',
+    'timesi.ttf': 'Times New Roman Italic',
+    'trebuc.ttf': 'Trebuchet MS',
+    'trebucbd.ttf': 'Trebuchet MS Bold',
+    'trebucbi.ttf': 'Trebuchet MS Bold Italic',
+    'trebucit.ttf': 'Trebuchet MS Italic',
+    'verdana.ttf': 'Verdana',
+    'verdanab.ttf': 'Verdana Bold',
+    'verdanai.ttf': 'Verdana Italic',
+    'verdanaz.ttf': 'Verdana Bold Italic',
+    'webdings.ttf': 'Webdings'
+}
+
+FONT_REGISTRY_KEYS = [
+    'HKEY_LOCAL_MACHINE\\Software\\Microsoft\\Windows NT\\CurrentVersion\\Fonts',
+    'HKEY_LOCAL_MACHINE\\Software\\Microsoft\\Windows\\CurrentVersion\\Fonts'
+]
+
+CAB_SIGNATURE = b'MSCF'
+CAB_FLAG_PREV_CABINET = 0x0001
+CAB_FLAG_NEXT_CABINET = 0x0002
+CAB_FLAG_RESERVE_PRESENT = 0x0004
+CAB_COMPRESS_NONE = 0
+CAB_COMPRESS_MSZIP = 1
+
+
+class UnsupportedCabinet(Exception):
+    pass
+
+
+def get_corefonts_package_url(name: str) -> str:
+    return f'{COREFONTS_URL}/{name}'
+
+
+def find_local_corefonts_package(name: str) -> Path | None:
+    path = Path(COREFONTS_DIR).joinpath(name)
+    return path if path.exists() else None
+
+
+def _read_cstring(data: bytes, offset: int) -> tuple:
+    end = data.index(b'\0', offset)
+    return data[offset:end], end + 1
+
+
+def find_cabinet(data: bytes) -> int:
+    # The packages are self-extracting .exe files with the cabinet appended
+    offset = data.find(CAB_SIGNATURE)
+    while offset != -1:
+        reserved1, size = struct.unpack_from('<II', data, offset + 4)
+        if reserved1 == 0 and 0 < size <= len(data) - offset:
+            return offset
+        offset = data.find(CAB_SIGNATURE, offset + 1)
+
+    raise UnsupportedCabinet('No cabinet found')
+
+
+def read_cabinet(data: bytes) -> dict:
+    base = find_cabinet(data)
+    cab = data[base:]
+
+    (_, _, _, _, coff_files, _, _, _,
+     folders_count, files_count, flags, _, _) = struct.unpack_from('<4sIIIIIBBHHHHH', cab, 0)
+
+    offset = 36
+    folder_reserve = data_reserve = 0
+
+    if flags & CAB_FLAG_RESERVE_PRESENT:
+        header_reserve, folder_reserve, data_reserve = struct.unpack_from('<HBB', cab, offset)
+        offset += 4 + header_reserve
+
+    if flags & (CAB_FLAG_PREV_CABINET | CAB_FLAG_NEXT_CABINET):
+        raise UnsupportedCabinet('Multi-part cabinets are not supported')
+
+    folders = []
+    for _ in range(folders_count):
+        cab_start, data_count, compression = struct.unpack_from('<IHH', cab, offset)
+        folders.append((cab_start, data_count, compression & 0x000F))
+        offset += 8 + folder_reserve
+
+    folder_data = [_read_folder(cab, folder, data_reserve) for folder in folders]
+
+    files = {}
+    offset = coff_files
+    for _ in range(files_count):
+        size, folder_offset, folder_index = struct.unpack_from('<IIH', cab, offset)
+        name, offset = _read_cstring(cab, offset + 16)
+        name = name.decode('utf-8', errors='replace').replace('\\', '/')
+        files[name] = folder_data[folder_index][folder_offset:folder_offset + size]
+
+    return files
+
+
+def _read_folder(cab: bytes, folder: tuple, data_reserve: int) -> bytes:
+    cab_start, data_count, compression = folder
+
+    if compression not in (CAB_COMPRESS_NONE, CAB_COMPRESS_MSZIP):
+        raise UnsupportedCabinet(f'Unsupported compression type {compression}')
+
+    output = bytearray()
+    offset = cab_start
+
+    for _ in range(data_count):
+        _, compressed_size, _ = struct.unpack_from('<IHH', cab, offset)
+        offset += 8 + data_reserve
+        block = cab[offset:offset + compressed_size]
+        offset += compressed_size
+
+        if compression == CAB_COMPRESS_NONE:
+            output += block
+            continue
+
+        if block[:2] != b'CK':
+            raise UnsupportedCabinet('Broken MSZIP block')
+
+        # Every MSZIP block is a raw deflate stream primed with the previous 32K of output
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS, zdict=bytes(output[-32768:]))
+        output += decompressor.decompress(block[2:]) + decompressor.flush()
+
+    return bytes(output)
+
+
+def extract_fonts_with_cabextract(package_path, cabextract_bin: str) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        subprocess.run(
+            [cabextract_bin, '-q', '-L', '-F', '*.ttf', '-d', tmp, os.fspath(package_path)],
+            check=True
+        )
+        return {name: Path(tmp, name).read_bytes() for name in os.listdir(tmp)}
+
+
+def extract_fonts(package_path, cabextract_bin: str | None = None) -> dict:
+    data = Path(package_path).read_bytes()
+
+    try:
+        files = read_cabinet(data)
+    except UnsupportedCabinet:
+        if cabextract_bin is None:
+            raise
+        files = extract_fonts_with_cabextract(package_path, cabextract_bin)
+
+    return {
+        os.path.basename(name).lower(): content
+        for name, content in files.items()
+        if name.lower().endswith('.ttf')
+    }
+
+
+def get_font_display_name(filename: str) -> str:
+    return FONT_NAMES.get(filename, Path(filename).stem.capitalize()) + ' (TrueType)'
+
+
+def install_fonts(package_paths: list, fonts_dir, cabextract_bin: str | None = None) -> dict:
+    # Returns the registry values to write, {display name: file name}
+    os.makedirs(fonts_dir, exist_ok=True)
+    registry_values = {}
+
+    for package_path in package_paths:
+        for filename, content in extract_fonts(package_path, cabextract_bin).items():
+            Path(fonts_dir).joinpath(filename).write_bytes(content)
+            registry_values[get_font_display_name(filename)] = filename
+
+    return registry_values
+
@@ -0,0 +1,193 @@
+import os
+import json
+import time
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from src.config import (
+    DOWNLOAD_CHUNK_SIZE, DOWNLOAD_CONNECTIONS,
+    DOWNLOAD_SEGMENT_SIZE, DOWNLOAD_RETRIES, DOWNLOAD_PROBE_TIMEOUT
+)
+
+
+class DownloadCancelled(Exception):
+    pass
+
+
+def get_download_state_path(filename: str) -> str:
+    return f'{filename}.aegnux-download'
+
+
+class SegmentedDownload:
+    def __init__(self, url: str, filename: str, connections: int = DOWNLOAD_CONNECTIONS):
+        self.url = url
+        self.filename = str(filename)
+        self.state_path = get_download_state_path(self.filename)
+        self.connections = connections
+
+        self.total = 0
+        self.etag = None
+        self.segments = []
+        self.resumed_bytes = 0
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._next_segment = 0
+
+    @property
+    def downloaded(self) -> int:
+        return sum(segment[2] for segment in self.segments)
+
+    def probe(self) -> bool:
+        # Returns True if the server supports ranged requests. Some servers
+        # reject HEAD but serve GET (405, 403 on presigned URLs), those get
+        # the single stream download
+        try:
+            r = requests.head(self.url, allow_redirects=True, timeout=DOWNLOAD_PROBE_TIMEOUT)
+        except requests.RequestException:
+            return False
+        if not r.ok:
+            return False
+
+        self.url = r.url
+        self.total = int(r.headers.get('content-length', 0))
+        self.etag = r.headers.get('etag')
+
+        return self.total > 0 and r.headers.get('accept-ranges', '').lower() == 'bytes'
+
+    def load_state(self) -> bool:
+        if not os.path.exists(self.state_path) or not os.path.exists(self.filename):
+            return False
+
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if state.get('total') != self.total or state.get('etag') != self.etag:
+            return False
+
+        self.segments = [list(segment) for segment in state['segments']]
+        self.resumed_bytes = self.downloaded
+        return True
+
+    def save_state(self):
+        with self._lock:
+            state = {
+                'url': self.url,
+                'total': self.total,
+                'etag': self.etag,
+                'segments': [list(segment) for segment in self.segments]
+            }
+
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def plan_segments(self):
+        self.segments = [
+            [start, min(start + DOWNLOAD_SEGMENT_SIZE, self.total) - 1, 0]
+            for start in range(0, self.total, DOWNLOAD_SEGMENT_SIZE)
+        ]
+
+    def preallocate(self):
+        fd = os.open(self.filename, os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            if hasattr(os, 'posix_fallocate'):
+                try:
+                    os.posix_fallocate(fd, 0, self.total)
+                    return
+                except OSError:
+                    pass
+            os.ftruncate(fd, self.total)
+        finally:
+            os.close(fd)
+
+    def _take_segment(self):
+        with self._lock:
+            while self._next_segment < len(self.segments):
+                segment = self.segments[self._next_segment]
+                self._next_segment += 1
+                start, end, done = segment
+                if start + done <= end:
+                    return segment
+        return None
+
+    def _fetch_segment(self, session: requests.Session, fd: int, segment: list):
+        start, end, _ = segment
+        offset = start + segment[2]
+
+        headers = {'Range': f'bytes={offset}-{end}'}
+        with session.get(self.url, headers=headers, stream=True, timeout=30) as r:
+            if r.status_code != 206:
+                raise IOError(f'Server ignored range request ({r.status_code})')
+
+            for data in r.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                if self._stop.is_set():
+                    raise DownloadCancelled()
+
+                os.pwrite(fd, data, offset)
+                offset += len(data)
+
+                with self._lock:
+                    segment[2] = offset - start
+
+        if start + segment[2] <= end:
+            raise IOError(f'Segment {start}-{end} ended early')
+
+    def _worker(self):
+        session = requests.Session()
+        fd = os.open(self.filename, os.O_WRONLY)
+
+        try:
+            while not self._stop.is_set():
+                segment = self._take_segment()
+                if segment is None:
+                    return
+
+                for attempt in range(DOWNLOAD_RETRIES + 1):
+                    try:
+                        self._fetch_segment(session, fd, segment)
+                        break
+                    except (requests.RequestException, IOError):
+                        if attempt == DOWNLOAD_RETRIES or self._stop.is_set():
+                            raise
+                        time.sleep(min(2 ** attempt, 10))
+        finally:
+            os.close(fd)
+            session.close()
+
+    def iter_progress(self):
+        # Yields the downloaded byte count while segments are being fetched.
+        # Closing the generator stops the workers and keeps the state file
+        if not self.load_state():
+            self.plan_segments()
+            self.preallocate()
+            self.save_state()
+
+        executor = ThreadPoolExecutor(max_workers=self.connections)
+        futures = {executor.submit(self._worker) for _ in range(self.connections)}
+        last_save_time = time.time()
+
+        try:
+            while futures:
+                done, futures = wait(futures, timeout=0.1, return_when=FIRST_EXCEPTION)
+                for future in done:
+                    future.result()
+
+                if time.time() - last_save_time >= 1:
+                    self.save_state()
+                    last_save_time = time.time()
+
+                yield self.downloaded
+        finally:
+            self._stop.set()
+            executor.shutdown(wait=True)
+
+            if self.downloaded == self.total:
+                if os.path.exists(self.state_path):
+                    os.remove(self.state_path)
+            else:
+                self.save_state()
@@ -0,0 +1,51 @@
+import os
+import sys
+from src.instances import get_instance_arg, get_instance_prefix_dir, instance_exists
+from src.utils import check_aegnux_installed, get_ae_install_dir, get_mhtb_install_dir, get_wine_bin_path_env
+
+# Set to 0 to always go through the GUI, e.g. to compare both paths
+FAST_LAUNCH_ENV = 'AEGNUX_FAST_LAUNCH'
+
+
+def get_launch_command(argv: list) -> list | None:
+    # The wine arguments for an .aep or misterhorsepm:// argument, None
+    # when there is nothing to launch or the GUI has to explain a problem
+    for arg in argv[1:]:
+        if 'misterhorsepm://' in arg:
+            mhtb_dir = get_mhtb_install_dir()
+            if mhtb_dir is None:
+                return None
+            return [f'{mhtb_dir.as_posix()}/ProductManager.exe', arg]
+
+        if '.aep' in arg:
+            return ['AfterFX.exe', 'Z:' + os.path.abspath(arg)]
+
+    return None
+
+
+def try_fast_launch(argv: list | None = None):
+    # Replaces this process with wine when AE is opened through a file or
+    # link association. Returns only if the GUI should take over
+    argv = argv if argv is not None else sys.argv
+    if os.getenv(FAST_LAUNCH_ENV) == '0' or not check_aegnux_installed():
+        return
+
+    instance = get_instance_arg(argv)
+    if instance is not None and not instance_exists(instance):
+        return
+
+    command = get_launch_command(argv)
+    if command is None:
+        return
+
+    env = os.environ.copy()
+    env['WINEPREFIX'] = get_instance_prefix_dir(instance).as_posix()
+    env['PATH'] = get_wine_bin_path_env(env.get('PATH', os.defpath))
+
+    cwd = os.getcwd()
+    try:
+        os.chdir(get_ae_install_dir())
+        os.execvpe('wine', ['wine'] + command, env)
+    except OSError as e:
+        os.chdir(cwd)
+        print(f'[ERROR] Fast launch failed, falling back to the GUI: {e}', file=sys.stderr)
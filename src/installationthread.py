@@ -4,18 +4,32 @@ import shutil
 import tarfile
 import traceback
 from src.config import (
-    AE_DOWNLOAD_URL, AE_FILENAME, DXVK_REG, FONTSMOOTH_REG, 
+    AE_DOWNLOAD_URL, AE_FILENAME, DXVK_REG, FONTSMOOTH_REG, NVIDIA_LIBS_URL,
     WINE_RUNNER_DIR, WINETRICKS_BIN, 
     CABEXTRACT_BIN, WINE_STYLE_REG,
-    VCR_ZIP, MSXML_ZIP, GDIPLUS_DLL, DXVK_TAR
+    VCR_ZIP, MSXML_ZIP, GDIPLUS_DLL, DXVK_TAR,
+    ENABLE_PREFIX_TEMPLATE, USE_NATIVE_COREFONTS
 )
 from src.processthread import ProcessThread
+from src.registry import RegistryTransaction
+from src.stepgraph import StepGraph
+from src.types import Resource
+from src.artifactcache import ArtifactCache
+from src.runnerstore import get_runner_version, ensure_runner
+from src.corefonts import (
+    COREFONTS_PACKAGES, FONT_REGISTRY_KEYS, find_local_corefonts_package,
+    get_corefonts_package_url, install_fonts
+)
+from src.prefixtemplate import (
+    compute_template_key, has_template,
+    clone_prefix_from_template, snapshot_prefix
+)
 from src.utils import (
     DownloadMethod, get_aegnux_installation_dir, 
-    get_ae_install_dir, get_wine_runner_dir, is_nvidia_present,
+    get_ae_install_dir, is_nvidia_present,
     get_winetricks_bin, get_wineprefix_dir, get_cabextract_bin,
     get_vcr_dir_path, get_msxml_dir_path, mark_aegnux_as_installed,
-    get_cep_dir
+    get_cep_dir, invalidate_layout
 )
 
 class InstallationThread(ProcessThread):
@@ -30,104 +44,233 @@ class InstallationThread(ProcessThread):
     
     def cleanup(self):
         self.log_signal.emit(f'[CLEANUP] Removing temporary AE .zip file')
-        if self.download_method == DownloadMethod.ONLINE:
+        if self.download_method == DownloadMethod.ONLINE and os.path.exists(AE_FILENAME):
             os.remove(AE_FILENAME)
 
     def run(self):
+        self.reset_run_state()
         try:
             self.try_cleanup_installation()
+            self.cache = ArtifactCache()
+            self.registry = RegistryTransaction()
             
-            self.progress_signal.emit(10)
+            self.progress_signal.emit(5)
 
-            if self.download_method == DownloadMethod.ONLINE:
-                self.download_file_to(AE_DOWNLOAD_URL, AE_FILENAME)
-                self.ae_filename = AE_FILENAME
-            
-            self.progress_signal.emit(15)
+            self.register_bundled_assets()
+            self.runner_version = get_runner_version(WINE_RUNNER_DIR)
 
-            self.unpack_ae()
-            
-            self.progress_signal.emit(20)
+            graph = self.build_step_graph()
 
-            self.log_signal.emit(f'[DEBUG] Copying Wine Runner from {WINE_RUNNER_DIR}...')
-            shutil.copytree(WINE_RUNNER_DIR, get_wine_runner_dir(), dirs_exist_ok=True)
-            
-            self.progress_signal.emit(30)
+            if not graph.run(self.on_step_done, lambda: self._is_cancelled):
+                self.report_stopped()
+                return
 
-            self.log_signal.emit(f'[DEBUG] Copying winetricks to {get_winetricks_bin()}...')
-            shutil.copy(WINETRICKS_BIN, get_winetricks_bin())
-            
-            self.progress_signal.emit(35)
+            self.cleanup()
 
-            self.log_signal.emit(f'[DEBUG] Copying cabextract to {get_cabextract_bin()}...')
-            shutil.copy(CABEXTRACT_BIN, get_cabextract_bin())
+            mark_aegnux_as_installed()
             
-            self.progress_signal.emit(40)
-
-            self.log_signal.emit(f'[DEBUG] Initializing wineprefix in {get_wineprefix_dir()}...')
-            self.run_command(['wineboot'], in_prefix=True)
+            self.progress_signal.emit(100)
             
-            self.progress_signal.emit(50)
+            self.finished_signal.emit(True)
+        except Exception as e:
+            traceback.print_exc()
+            self.log_signal.emit(f'[ERROR] {e}')
+            self.finished_signal.emit(False)
 
-            self.log_signal.emit(f'[DEBUG] Tweaking visual settings in prefix')
-            self.run_command(['wine', 'regedit', WINE_STYLE_REG], in_prefix=True)
-            
-            self.progress_signal.emit(55)
+    def on_step_done(self, name: str, done_weight: int, total_weight: int):
+        self.log_signal.emit(f'[STEP] {name} done')
+        self.progress_signal.emit(5 + done_weight * 94 // total_weight)
 
-            self.log_signal.emit(f'[DEBUG] [WORKAROUND] Killing wineserver')
-            self.run_command(['wineserver', '-k'], in_prefix=True)
-            
-            self.progress_signal.emit(60)
+    def build_step_graph(self) -> StepGraph:
+        graph = StepGraph()
 
-            tweaks = ['corefonts']
-            for tweak in tweaks:
-                self.log_signal.emit(f'[DEBUG] Installing {tweak} with winetricks')
-                self.run_command(['winetricks', '-q', tweak], in_prefix=True)
-                self.progress_signal.emit(60 + tweaks.index(tweak) * 2)
-            
-            self.install_dxvk()
-            
-            self.progress_signal.emit(70)
+        if self.download_method == DownloadMethod.ONLINE:
+            graph.add('fetch_ae', self.fetch_ae_zip, resource=Resource.DISK, weight=10)
+        else:
+            graph.add('fetch_ae', lambda: True, weight=0)
 
-            self.install_vcr()
-            
-            self.progress_signal.emit(85)
+        graph.add('unpack_ae', self.unpack_ae, ['fetch_ae'], Resource.CPU, 15)
+        graph.add('runner', self.link_runner, [], Resource.DISK, 8)
+        graph.add('copy_winetricks', self.copy_winetricks, ['runner'], Resource.DISK, 1)
+        graph.add('copy_cabextract', self.copy_cabextract, ['runner'], Resource.DISK, 1)
 
-            self.install_msxml3()
+        template_key = self.get_template_key() if ENABLE_PREFIX_TEMPLATE else None
 
-            self.install_gdiplus()
+        if template_key is not None and has_template(template_key):
+            graph.add('prefix', lambda: self.clone_prefix_template(template_key), [], Resource.DISK, 10)
+        else:
+            self.add_prepare_prefix_steps(graph)
 
-            self.log_signal.emit(f'[DEBUG] Applying fontsmooth settings')
-            self.run_command(
-                ['wine', 'regedit', FONTSMOOTH_REG], 
-                in_prefix=True
-            )
+            if template_key is not None:
+                graph.add('prefix', lambda: self.save_prefix_template(template_key), ['commit_registry'], Resource.WINESERVER, 5)
+            else:
+                graph.add('prefix', lambda: True, ['commit_registry'], weight=0)
 
-            if is_nvidia_present():
-                self.log_signal.emit("[INFO] Starting NVIDIA libs installation...")
-                self.install_nvidia_libs()
-            
-            try:
-                self.log_signal.emit(f"[INFO] Created CEP directory in {get_cep_dir()}")
-            except:
-                pass
+        if is_nvidia_present():
+            graph.add('nvidia_libs', self.install_nvidia_libs, ['prefix', 'runner'], Resource.WINESERVER, 10)
 
-            self.symlink_support_files()
-            
-            self.progress_signal.emit(99)
+        graph.add('cep_dir', self.create_cep_dir, ['prefix'], Resource.DISK, 1)
+        graph.add('symlink_support_files', self.symlink_support_files, ['prefix', 'unpack_ae'], Resource.DISK, 1)
 
-            self.cleanup()
+        return graph
+
+    def add_prepare_prefix_steps(self, graph: StepGraph):
+        # Everything touching the prefix through wine is chained explicitly,
+        # the unpacking work only depends on where it extracts to
+        graph.add('wineboot', self.init_prefix, ['runner'], Resource.WINESERVER, 10)
+        graph.add('theme', self.apply_theme, ['wineboot'], Resource.CPU, 1)
+        graph.add('corefonts', self.install_corefonts, ['theme', 'copy_winetricks', 'copy_cabextract'], Resource.WINESERVER, 15)
+
+        graph.add('extract_dxvk', self.extract_dxvk, [], Resource.CPU, 2)
+        graph.add('install_dxvk', self.install_dxvk, ['extract_dxvk', 'corefonts'], Resource.WINESERVER, 3)
+
+        graph.add('extract_vcr', self.extract_vcr, ['runner'], Resource.CPU, 2)
+        graph.add('install_vcr', self.install_vcr, ['extract_vcr', 'install_dxvk'], Resource.WINESERVER, 10)
+
+        graph.add('extract_msxml3', self.extract_msxml3, ['runner'], Resource.CPU, 1)
+        graph.add('install_msxml3', self.install_msxml3, ['extract_msxml3', 'install_vcr'], Resource.WINESERVER, 2)
+
+        graph.add('install_gdiplus', self.install_gdiplus, ['install_msxml3'], Resource.WINESERVER, 2)
+        graph.add('fontsmooth', self.apply_fontsmooth, ['install_gdiplus'], Resource.CPU, 1)
+
+        # Every registry change above is only collected, this is the single wine launch
+        graph.add('commit_registry', self.commit_registry, ['fontsmooth'], Resource.WINESERVER, 3)
+
+    def link_runner(self):
+        runner_path, added = ensure_runner(
+            WINE_RUNNER_DIR, self.runner_version, get_aegnux_installation_dir().joinpath('runner')
+        )
+        if added:
+            self.log_signal.emit(f'[RUNNER] Added {self.runner_version} to the runner store')
+        else:
+            self.log_signal.emit(f'[RUNNER] Reusing {self.runner_version} from the runner store')
+
+        self.log_signal.emit(f'[DEBUG] Wine runner linked to {runner_path}')
+
+    def copy_winetricks(self):
+        self.log_signal.emit(f'[DEBUG] Copying winetricks to {get_winetricks_bin()}...')
+        os.makedirs(get_winetricks_bin().parent, exist_ok=True)
+        shutil.copy(WINETRICKS_BIN, get_winetricks_bin())
+
+    def copy_cabextract(self):
+        self.log_signal.emit(f'[DEBUG] Copying cabextract to {get_cabextract_bin()}...')
+        os.makedirs(get_cabextract_bin().parent, exist_ok=True)
+        shutil.copy(CABEXTRACT_BIN, get_cabextract_bin())
+
+    def init_prefix(self):
+        self.log_signal.emit(f'[DEBUG] Initializing wineprefix in {get_wineprefix_dir()}...')
+        if self.run_command(['wineboot'], in_prefix=True) != 0:
+            return False
+
+        self.log_signal.emit(f'[DEBUG] [WORKAROUND] Killing wineserver')
+        self.run_command(['wineserver', '-k'], in_prefix=True)
+
+    def apply_theme(self):
+        self.log_signal.emit(f'[DEBUG] Tweaking visual settings in prefix')
+        self.registry.merge_reg_file(WINE_STYLE_REG)
+
+    def install_corefonts(self):
+        if USE_NATIVE_COREFONTS:
+            return self.install_corefonts_native()
+
+        tweaks = ['corefonts']
+        for tweak in tweaks:
+            self.log_signal.emit(f'[DEBUG] Installing {tweak} with winetricks')
+            if self.run_command(['winetricks', '-q', tweak], in_prefix=True) != 0:
+                return False
+
+    def fetch_corefonts_packages(self) -> list | None:
+        package_paths = []
+
+        for name in COREFONTS_PACKAGES:
+            local_package = find_local_corefonts_package(name)
+            if local_package is not None:
+                package_paths.append(local_package)
+                continue
+
+            url = get_corefonts_package_url(name)
+            cached_package = self.cache.lookup(url)
+            if cached_package is not None:
+                package_paths.append(cached_package)
+                continue
+
+            download_path = self.cache.root.joinpath(f'{name}-{os.getpid()}.part')
+            if not self.download_file_to(url, download_path.as_posix()):
+                return None
+            package_paths.append(self.cache.store(url, download_path, move=True))
+
+        return package_paths
+
+    def install_corefonts_native(self):
+        self.log_signal.emit(f'[DEBUG] Installing corefonts')
+        package_paths = self.fetch_corefonts_packages()
+        if package_paths is None:
+            return False
+
+        fonts_dir = get_wineprefix_dir().joinpath('drive_c/windows/Fonts')
+        registry_values = install_fonts(package_paths, fonts_dir, get_cabextract_bin().as_posix())
+        self.log_signal.emit(f'[DEBUG] Extracted {len(registry_values)} fonts to {fonts_dir}')
+
+        for key in FONT_REGISTRY_KEYS:
+            self.registry.set_values(key, registry_values)
+
+    def apply_fontsmooth(self):
+        self.log_signal.emit(f'[DEBUG] Applying fontsmooth settings')
+        self.registry.merge_reg_file(FONTSMOOTH_REG)
+
+    def commit_registry(self):
+        # Once the wineserver is gone the hives can be edited without launching
+        # wine. Stopped rather than waited for, a warm one may stay for minutes
+        self.log_signal.emit(f'[DEBUG] Stopping wineserver')
+        self.run_command(['wineserver', '-k'], in_prefix=True)
+
+        self.log_signal.emit(f'[DEBUG] Writing collected registry changes')
+        if self.apply_registry(self.registry) != 0:
+            return False
+
+    def create_cep_dir(self):
+        self.log_signal.emit(f"[INFO] Created CEP directory in {get_cep_dir()}")
+
+    def clone_prefix_template(self, template_key: str):
+        self.log_signal.emit(f'[TEMPLATE] Cloning prepared wineprefix {template_key}...')
+        clone_mode = clone_prefix_from_template(template_key, get_wineprefix_dir())
+        self.log_signal.emit(f'[TEMPLATE] Wineprefix cloned ({clone_mode})')
+
+    def get_template_key(self) -> str:
+        asset_hashes = dict(self.asset_hashes)
+        for asset in [WINE_STYLE_REG, DXVK_REG, FONTSMOOTH_REG, WINETRICKS_BIN, CABEXTRACT_BIN]:
+            asset_hashes[asset] = self.cache.file_digest(asset)
+
+        return compute_template_key(self.runner_version, asset_hashes)
+
+    def save_prefix_template(self, template_key: str):
+        self.log_signal.emit(f'[TEMPLATE] Stopping wineserver before taking a snapshot')
+        self.run_command(['wineserver', '-k'], in_prefix=True)
+
+        self.log_signal.emit(f'[TEMPLATE] Saving wineprefix template {template_key}...')
+        snapshot_prefix(get_wineprefix_dir(), template_key)
+
+    def fetch_ae_zip(self):
+        cached_zip = self.cache.lookup(AE_DOWNLOAD_URL)
+        if cached_zip is not None:
+            self.log_signal.emit(f'[CACHE] Using cached AE .zip file: {cached_zip}')
+            self.ae_filename = cached_zip.as_posix()
+            return True
+
+        if not self.download_file_to(AE_DOWNLOAD_URL, AE_FILENAME, progress_range=(5, 15)):
+            return False
+
+        self.log_signal.emit(f'[CACHE] Storing AE .zip file in {self.cache.root}')
+        self.ae_filename = self.cache.store(AE_DOWNLOAD_URL, AE_FILENAME, move=True).as_posix()
+        return True
+
+    def register_bundled_assets(self):
+        # Bundled assets are read in place, only their (memoized) hashes are needed
+        self.asset_hashes = {}
+        for asset in [DXVK_TAR, VCR_ZIP, MSXML_ZIP, GDIPLUS_DLL]:
+            self.asset_hashes[asset] = self.cache.file_digest(asset)
+            self.log_signal.emit(f'[CACHE] {os.path.basename(asset)}: {self.asset_hashes[asset]}')
 
-            mark_aegnux_as_installed()
-            
-            self.progress_signal.emit(100)
-            
-            self.finished_signal.emit(True)
-        except Exception as e:
-            traceback.print_exc()
-            self.log_signal.emit(f'[ERROR] {e}')
-            self.finished_signal.emit(False)
-    
     def symlink_support_files(self):
         ae_dir = get_ae_install_dir()
         ae_pf_dir = get_wineprefix_dir().joinpath('drive_c/Program Files/Adobe/Adobe After Effects 2024')
@@ -146,45 +289,35 @@ class InstallationThread(ProcessThread):
             shutil.rmtree(get_aegnux_installation_dir(), True)
         except:
             self.log_signal.emit(f'[WARNING] Can\'t remove existing installation.')
+        invalidate_layout()
     
-    def install_vcr(self):
+    def extract_vcr(self):
         self.log_signal.emit(f'[DEBUG] Unpacking VCR to {get_vcr_dir_path()}...')
-        self.unpack_zip(VCR_ZIP, get_vcr_dir_path().as_posix())
-        
-        self.progress_signal.emit(80)
+        return self.unpack_zip(VCR_ZIP, get_vcr_dir_path().as_posix())
 
+    def install_vcr(self):
         self.log_signal.emit(f'[DEBUG] Installing VCR')
-        self.run_command(['wine', get_vcr_dir_path().joinpath('install_all.bat').as_posix()], in_prefix=True)
+        if self.run_command(['wine', get_vcr_dir_path().joinpath('install_all.bat').as_posix()], in_prefix=True) != 0:
+            return False
     
-    def install_msxml3(self):
+    def extract_msxml3(self):
         self.log_signal.emit(f'[DEBUG] Unpacking MSXML3 to {get_msxml_dir_path()}...')
-        self.unpack_zip(MSXML_ZIP, get_msxml_dir_path().as_posix())
-        
-        self.progress_signal.emit(90)
+        return self.unpack_zip(MSXML_ZIP, get_msxml_dir_path().as_posix())
 
+    def install_msxml3(self):
         self.log_signal.emit(f'[DEBUG] Overriding MSXML3 DLL...')
         system32_dir = get_wineprefix_dir().joinpath('drive_c/windows/system32')
         shutil.copy(get_msxml_dir_path().joinpath('msxml3.dll'), system32_dir.joinpath('msxml3.dll'))
         shutil.copy(get_msxml_dir_path().joinpath('msxml3r.dll'), system32_dir.joinpath('msxml3r.dll'))
 
-        self.run_command(
-            ['wine', 'reg', 'add', 
-             'HKCU\\Software\\Wine\\DllOverrides', '/v', 
-             'msxml3', '/d', 'native,builtin', '/f'], 
-            in_prefix=True
-        )
+        self.registry.set_dll_override('msxml3')
     
     def install_gdiplus(self):
         system32_dir = get_wineprefix_dir().joinpath('drive_c/windows/system32')
         self.log_signal.emit(f'[DEBUG] Overriding gdiplus DLL...')
         shutil.copy(GDIPLUS_DLL, system32_dir.joinpath('gdiplus.dll'))
 
-        self.run_command(
-            ['wine', 'reg', 'add', 
-             'HKCU\\Software\\Wine\\DllOverrides', '/v', 
-             'gdiplus', '/d', 'native,builtin', '/f'], 
-            in_prefix=True
-        )
+        self.registry.set_dll_override('gdiplus')
     
     def get_tar_root_dir_name(self, tar_path) -> str | None:
         with tarfile.open(tar_path, 'r') as tar:
@@ -197,84 +330,95 @@ class InstallationThread(ProcessThread):
 
             return root_name
 
+    def get_dxvk_unpack_dir(self) -> Path:
+        # Outside the prefix, wineboot may still be creating it meanwhile
+        return get_aegnux_installation_dir().joinpath('.dxvk-unpack')
+
+    def extract_dxvk(self):
+        return self.unpack_tar(DXVK_TAR, self.get_dxvk_unpack_dir().as_posix())
+
     def install_dxvk(self):
         system32_dir = get_wineprefix_dir().joinpath('drive_c/windows/system32')
         syswow64_dir = get_wineprefix_dir().joinpath('drive_c/windows/syswow64')
-        self.unpack_tar(DXVK_TAR, get_wineprefix_dir())
 
         dxvk_name = self.get_tar_root_dir_name(DXVK_TAR)
-        dxvk_root_dir = get_wineprefix_dir().joinpath(dxvk_name)
+        dxvk_root_dir = self.get_dxvk_unpack_dir().joinpath(dxvk_name)
 
         self.log_signal.emit(f'[DEBUG] DXVK root dir is {dxvk_root_dir}')
 
         source_x64 = dxvk_root_dir.joinpath('x64')
         source_x32 = dxvk_root_dir.joinpath('x32')
 
-        for source in [source_x64, source_x32]:
+        for source, system_dir in [(source_x64, system32_dir), (source_x32, syswow64_dir)]:
             for item in source.iterdir():
-                system_dir = system32_dir if 'x64' in source.as_posix() else syswow64_dir
+                dest = system_dir.joinpath(item.name)
+                if item.is_dir() and dest.exists():
+                    shutil.rmtree(dest)
 
-                if item.is_file():
-                    shutil.copy2(item, system_dir.joinpath(item.name))
-                elif item.is_dir():
-                    dest = system_dir.joinpath(item.name)
-                    if dest.exists():
-                        shutil.rmtree(dest)
-                    shutil.copytree(item, dest)
+            if not self.copy_tree_to(source, system_dir):
+                return False
+
+        shutil.rmtree(self.get_dxvk_unpack_dir(), True)
 
         self.log_signal.emit(f'[DEBUG] Overriding DXVK dlls')
-        self.run_command(
-            ['wine', 'regedit', DXVK_REG], 
-            in_prefix=True
-        )
+        self.registry.merge_reg_file(DXVK_REG)
     
     def unpack_ae(self):
         self.log_signal.emit(f'[DEBUG] Unpacking AE from {self.ae_filename}...')
-        aegnux_install_dir = get_aegnux_installation_dir()
-        self.unpack_zip(self.ae_filename, aegnux_install_dir.as_posix())
+        # Unpacked aside, so searching for AfterFX.exe doesn't crawl a prefix being built
+        unpack_dir = get_aegnux_installation_dir().joinpath('.ae-unpack')
+        if not self.unpack_zip(self.ae_filename, unpack_dir.as_posix()):
+            return False
 
-        root_path = Path(aegnux_install_dir)
         target_dir = Path(get_ae_install_dir())
-        source_folder_to_delete = None
+        found = False
 
         self.log_signal.emit('[DEBUG] Searching for AfterFX.exe...')
 
-        for exe_path in root_path.rglob('AfterFX.exe'):
+        for exe_path in unpack_dir.rglob('AfterFX.exe'):
             source_dir_to_move = exe_path.parent
             self.log_signal.emit(f'[DEBUG] Found installation folder: {source_dir_to_move}')
             for item in source_dir_to_move.iterdir():
                 shutil.move(item.as_posix(), target_dir.joinpath(item.name).as_posix())
             self.log_signal.emit(f'[DEBUG] All contents moved to {target_dir}')
-            source_folder_to_delete = source_dir_to_move.parent
+            found = True
             break
 
-        if source_folder_to_delete and source_folder_to_delete != root_path:
-            self.log_signal.emit(f'[DEBUG] Removing temporary folder: {source_folder_to_delete}')
-            try:
-                shutil.rmtree(source_folder_to_delete.as_posix())
-                self.log_signal.emit('[DEBUG] Temporary folder removed successfully.')
-            except OSError as e:
-                self.log_signal.emit(f'[ERROR] Failed to remove temporary folder {source_folder_to_delete}: {e}')
-        else:
-            self.log_signal.emit('[WARNING] Installation folder not found or matched root path. No folder was deleted.')
+        if not found:
+            self.log_signal.emit('[WARNING] Installation folder not found. Nothing was moved.')
+
+        self.log_signal.emit(f'[DEBUG] Removing temporary folder: {unpack_dir}')
+        try:
+            shutil.rmtree(unpack_dir.as_posix())
+            self.log_signal.emit('[DEBUG] Temporary folder removed successfully.')
+        except OSError as e:
+            self.log_signal.emit(f'[ERROR] Failed to remove temporary folder {unpack_dir}: {e}')
 
     def install_nvidia_libs(self):
-        download_url = "https://github.com/SveSop/nvidia-libs/releases/download/v0.8.5/nvidia-libs-v0.8.5.tar.xz"
+        self.log_signal.emit("[INFO] Starting NVIDIA libs installation...")
         nvidia_libs_dir = get_wineprefix_dir().joinpath("nvidia-libs")
         os.makedirs(nvidia_libs_dir, exist_ok=True)
-        tar_file = nvidia_libs_dir.joinpath("nvidia-libs-v0.8.5.tar.xz")
-
-        self.download_file_to(download_url, tar_file)
-        self.log_signal.emit("[DEBUG] Download completed.")
-        self.log_signal.emit("[DEBUG] Extracting NVIDIA libs...")
 
         extract_dir = nvidia_libs_dir.joinpath("nvidia-libs-v0.8.5")
 
-        self.unpack_tar(tar_file, nvidia_libs_dir)
+        cached_tar = self.cache.lookup(NVIDIA_LIBS_URL)
+        if cached_tar is not None:
+            self.log_signal.emit(f"[CACHE] Using cached NVIDIA libs: {cached_tar}")
+            if not self.unpack_tar(cached_tar.as_posix(), nvidia_libs_dir.as_posix()):
+                return False
+        else:
+            self.log_signal.emit("[DEBUG] Downloading and extracting NVIDIA libs...")
+            tee_path = self.cache.root.joinpath(f'nvidia-libs-{os.getpid()}.part')
 
-        self.log_signal.emit("[DEBUG] Extraction completed.")
+            try:
+                if not self.stream_unpack_tar(NVIDIA_LIBS_URL, nvidia_libs_dir.as_posix(), tee_to=tee_path.as_posix()):
+                    return False
 
-        os.remove(tar_file)
+                self.cache.store(NVIDIA_LIBS_URL, tee_path, move=True)
+            finally:
+                tee_path.unlink(missing_ok=True)
+
+        self.log_signal.emit("[DEBUG] Extraction completed.")
 
         self.log_signal.emit("[DEBUG] Running setup script...")
 
@@ -286,8 +430,7 @@ class InstallationThread(ProcessThread):
 
         if returncode != 0:
             self.log_signal.emit(f"[ERROR] Setup script failed with return code {returncode}.")
-            self.finished_signal.emit(False)
-            return
+            return False
         
         self.log_signal.emit("[INFO] NVIDIA libs installation completed!")
             
\ No newline at end of file
@@ -0,0 +1,63 @@
+import os
+import re
+import sys
+import shutil
+from pathlib import Path
+from src.utils import get_aegnux_installation_dir, get_wineprefix_dir
+from src.winehive import is_wineserver_running
+
+INSTANCE_NAME_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$')
+
+
+def is_valid_instance_name(name: str) -> bool:
+    return INSTANCE_NAME_PATTERN.match(name) is not None
+
+
+def get_instances_dir() -> Path:
+    instances_dir = get_aegnux_installation_dir().joinpath('instances')
+    os.makedirs(instances_dir, exist_ok=True)
+
+    return instances_dir
+
+
+def get_instance_dir(name: str) -> Path:
+    if not is_valid_instance_name(name):
+        raise ValueError(f'Invalid instance name: {name}')
+    return get_instances_dir().joinpath(name)
+
+
+def get_instance_prefix_dir(name: str | None) -> Path:
+    # None is the base installation. Every instance has its own prefix and
+    # therefore its own wineserver
+    if name is None:
+        return get_wineprefix_dir()
+    return get_instance_dir(name).joinpath('wineprefix')
+
+
+def instance_exists(name: str) -> bool:
+    return get_instance_prefix_dir(name).joinpath('system.reg').exists()
+
+
+def list_instances() -> list:
+    return sorted(
+        path.name for path in get_instances_dir().iterdir()
+        if is_valid_instance_name(path.name) and path.joinpath('wineprefix', 'system.reg').exists()
+    )
+
+
+def is_instance_running(name: str | None) -> bool:
+    prefix_dir = get_instance_prefix_dir(name)
+    return prefix_dir.exists() and is_wineserver_running(prefix_dir)
+
+
+def remove_instance(name: str):
+    shutil.rmtree(get_instance_dir(name), True)
+
+
+def get_instance_arg(argv: list | None = None) -> str | None:
+    # --instance=NAME on the command line, e.g. from a .desktop entry
+    for arg in argv if argv is not None else sys.argv:
+        if arg.startswith('--instance='):
+            name = arg.split('=', 1)[1]
+            return name if is_valid_instance_name(name) else None
+    return None
@@ -0,0 +1,48 @@
+import os
+import shutil
+from src.processthread import ProcessThread
+from src.instances import get_instance_dir, instance_exists, is_instance_running
+from src.utils import get_wineprefix_dir
+
+
+class CreateInstanceThread(ProcessThread):
+    def __init__(self):
+        super().__init__()
+        self.instance_name = None
+
+    def set_instance_name(self, name: str):
+        self.instance_name = name
+
+    def run(self):
+        self.reset_run_state()
+        if instance_exists(self.instance_name):
+            self.log_signal.emit(f'[ERROR] Instance {self.instance_name} already exists')
+            self.finished_signal.emit(False)
+            return
+
+        if is_instance_running(None):
+            self.log_signal.emit('[WARNING] The base prefix is in use, its registry may be copied slightly out of date')
+
+        instance_dir = get_instance_dir(self.instance_name)
+        tmp_prefix = instance_dir.joinpath('wineprefix.tmp')
+
+        try:
+            shutil.rmtree(tmp_prefix, True)
+            os.makedirs(instance_dir, exist_ok=True)
+
+            # The copy engine reflinks where the filesystem allows it, so the clone is nearly free there
+            self.log_signal.emit(f'[INSTANCE] Cloning the base prefix into {self.instance_name}')
+            if not self.copy_tree_to(get_wineprefix_dir(), tmp_prefix, (0, 100)):
+                shutil.rmtree(instance_dir, True)
+                return
+
+            os.replace(tmp_prefix, instance_dir.joinpath('wineprefix'))
+        except OSError as e:
+            # E.g. ENOSPC, a half copied prefix is of no use
+            self.log_signal.emit(f'[ERROR] Could not create instance {self.instance_name}: {e}')
+            shutil.rmtree(instance_dir, True)
+            self.finished_signal.emit(False)
+            return
+
+        self.log_signal.emit(f'[INSTANCE] Instance {self.instance_name} is ready')
+        self.finished_signal.emit(True)
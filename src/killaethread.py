@@ -1,10 +1,12 @@
 from src.processthread import ProcessThread
 
 class KillAEThread(ProcessThread):
-    def __init__(self):
+    def __init__(self, instance: str | None = None):
         super().__init__()
+        self.instance = instance
     
     def run(self):
+        self.reset_run_state()
         self.run_command(
             ['wineserver', '-k'], 
             in_prefix=True
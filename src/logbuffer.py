@@ -0,0 +1,55 @@
+import re
+from collections import deque
+from src.config import LOG_BUFFER_MAX_LINES
+
+TAG_PATTERN = re.compile(r'^\[([A-Z][A-Z ]*)\]')
+ERROR_TAGS = {'ERROR', 'CRITICAL ERROR'}
+
+
+def get_line_tag(line: str) -> str:
+    match = TAG_PATTERN.match(line)
+    return match.group(1) if match else ''
+
+
+def is_error_line(line: str) -> bool:
+    tag = get_line_tag(line)
+    if tag in ERROR_TAGS:
+        return True
+    return tag == 'COMMAND' and 'Command failed' in line
+
+
+class LogBuffer:
+    # Ring buffer of (tag, line). Old lines fall off the front once
+    # max_lines is reached, the last error line is kept separately
+
+    def __init__(self, max_lines: int = LOG_BUFFER_MAX_LINES):
+        self.lines = deque(maxlen=max_lines)
+        self.tags = set()
+        self.last_error = None
+
+    def append(self, line: str) -> str:
+        tag = get_line_tag(line)
+        self.lines.append((tag, line))
+        self.tags.add(tag)
+
+        if is_error_line(line):
+            self.last_error = line
+        return tag
+
+    def extend(self, lines: list):
+        for line in lines:
+            self.append(line)
+
+    def get_last_line(self) -> str:
+        return self.lines[-1][1] if self.lines else ''
+
+    def get_last_error(self) -> str:
+        return self.last_error if self.last_error is not None else self.get_last_line()
+
+    def filter(self, tag: str | None = None) -> list:
+        return [line for line_tag, line in self.lines if tag is None or line_tag == tag]
+
+    def clear(self):
+        self.lines.clear()
+        self.tags.clear()
+        self.last_error = None
@@ -0,0 +1,56 @@
+import sys
+import time
+import argparse
+from datetime import datetime
+from src.sessionlog import list_log_files, read_index, search_sessions, get_session_logs_dir
+from src.utils import format_size
+
+DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_time(value: str) -> float:
+    # Accepts a relative age like 30m, 2h or 7d, or an ISO date
+    if value[-1:] in DURATION_UNITS and value[:-1].isdigit():
+        return time.time() - int(value[:-1]) * DURATION_UNITS[value[-1]]
+    return datetime.fromisoformat(value).timestamp()
+
+
+def list_sessions():
+    for log_path in list_log_files():
+        index = read_index(log_path)
+        lines = sum(entry['lines'] for entry in index)
+        tags = sorted({tag for entry in index for tag in entry['tags'] if tag})
+        print(f'{log_path.name}  {format_size(log_path.stat().st_size)}, {lines} lines, {len(index)} blocks  {" ".join(tags)}')
+
+
+def main(argv: list | None = None) -> int:
+    parser = argparse.ArgumentParser(description=f'Search the session logs in {get_session_logs_dir()}')
+    parser.add_argument('pattern', nargs='?', help='regular expression matched against the log message')
+    parser.add_argument('-t', '--tag', action='append', help='only lines with this tag, e.g. STDERR (repeatable)')
+    parser.add_argument('--since', type=parse_time, help='30m, 2h, 7d or an ISO date')
+    parser.add_argument('--until', type=parse_time, help='30m, 2h, 7d or an ISO date')
+    parser.add_argument('-s', '--session', help='only sessions whose file name contains this')
+    parser.add_argument('-l', '--list', action='store_true', help='list the stored sessions')
+    args = parser.parse_args(argv)
+
+    if args.list:
+        list_sessions()
+        return 0
+
+    tags = {tag.upper() for tag in args.tag} if args.tag else None
+    current_file = None
+
+    try:
+        for log_path, line in search_sessions(args.pattern, tags, args.since, args.until, args.session):
+            if log_path != current_file:
+                print(f'==> {log_path.name} <==')
+                current_file = log_path
+            print(line)
+    except BrokenPipeError:
+        pass
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,21 +3,21 @@ import subprocess
 import sys
 from ui.mainwindow import MainWindowUI
 from translations import gls
-from PySide6.QtCore import Slot
+from PySide6.QtCore import Slot, QTimer
 from PySide6.QtGui import QAction, QKeySequence
-from PySide6.QtWidgets import QFileDialog, QMessageBox
-from src.installationthread import InstallationThread
-from src.runaethread import RunAEThread
-from src.runexethread import RunExeThread
-from src.killaethread import KillAEThread
-from src.pluginthread import PluginThread
-from src.removeaethread import RemoveAEThread
+from PySide6.QtWidgets import QFileDialog, QMessageBox, QInputDialog
+from src.instances import (
+    list_instances, is_valid_instance_name, instance_exists,
+    is_instance_running, remove_instance, get_instance_arg
+)
+from src.warmserver import check_warm_launch_enabled, set_warm_launch_enabled
 from src.utils import (
     check_aegnux_tip_marked, get_default_terminal, get_mhtb_install_dir, get_wine_bin_path_env, 
     get_cep_dir, get_ae_plugins_dir, get_wineprefix_dir, 
     check_aegnux_installed, mark_aegnux_tip_as_shown, get_ae_install_dir, get_aegnux_installation_dir
 )
 from src.types import DownloadMethod
+from src.config import WARM_WINESERVER_IDLE_TIMEOUT
 
 
 class MainWindow(MainWindowUI):
@@ -33,23 +33,19 @@ class MainWindow(MainWindowUI):
         self.run_button.clicked.connect(self.run_ae_button_clicked)
         self.remove_aegnux_button.clicked.connect(self.remove_aegnux_button_clicked)
 
-        self.install_thread = InstallationThread()
-        self.install_thread.log_signal.connect(self._log)
-        self.install_thread.progress_signal.connect(self.progress_bar.setValue)
-        self.install_thread.finished_signal.connect(self._finished)
-
-        self.run_ae_thread = RunAEThread()
-        self.run_ae_thread.log_signal.connect(self._log)
-        self.run_ae_thread.finished_signal.connect(self._finished)
+        # Worker threads and their modules are only loaded when first used,
+        # most of them pull in requests, archives and the copy engine
+        self.threads = {}
 
-        self.kill_ae_thread = KillAEThread()
-        self.remove_ae_thread = RemoveAEThread()
-        self.remove_ae_thread.finished_signal.connect(self._finished)
+        # Threads of named instances, they run side by side with the base one
+        self.instance_threads = {}
+        # Launches forwarded to an already running AE, kept until they finish
+        self.forward_threads = []
+        # Projects requested while another task had the UI locked, the
+        # sender already quit so they are opened once the task is done
+        self.pending_aep_files = []
 
-        self.plugin_thread = PluginThread()
-        self.plugin_thread.log_signal.connect(self._log)
-        self.plugin_thread.progress_signal.connect(self.progress_bar.setValue)
-        self.plugin_thread.finished_signal.connect(self._finished)
+        self.warm_server_thread = None
 
         self.alt_t_action = QAction(self)
         self.alt_t_action.setShortcut(QKeySequence("Alt+T"))
@@ -67,8 +63,10 @@ class MainWindow(MainWindowUI):
         self.ae_action.triggered.connect(self.run_ae_button_clicked)
         self.exe_action.triggered.connect(self.run_exe_button_clicked)
         self.reg_action.triggered.connect(self.reg_button_clicked)
+        self.render_action.triggered.connect(self.render_button_clicked)
         self.plugininst_action.triggered.connect(self.install_plugins_button_clicked)
         self.kill_action.triggered.connect(self.kill_ae_button_clicked)
+        self.warm_action.toggled.connect(self.warm_action_toggled)
         self.log_action.triggered.connect(self.toggle_logs)
         self.term_action.triggered.connect(self.run_command_alt_t)
         self.wpd_action.triggered.connect(self.wineprefix_folder_clicked)
@@ -76,7 +74,71 @@ class MainWindow(MainWindowUI):
         self.aed_action.triggered.connect(self.ae_folder_clicked)
         self.aeg_action.triggered.connect(self.aegnux_folder_clicked)
         self.cep_action.triggered.connect(self.cep_folder_clicked)
+
+        # Later launches of Aegnux hand their arguments over instead of
+        # starting another window. A process that only opens a file and
+        # quits leaves this to a long lived one
+        self.request_server_thread = None
+        if not quit_after_handling_args:
+            from src.requestserverthread import RequestServerThread
+            self.request_server_thread = RequestServerThread()
+            self.request_server_thread.request_signal.connect(self.handle_open_request)
+            self.request_server_thread.try_start()
     
+    def _connect_thread(self, thread, finished=None):
+        thread.log_signal.connect(self._log)
+        thread.log_batch_signal.connect(self.logs_edit.append_lines)
+        thread.progress_signal.connect(self.progress_bar.setValue)
+        if finished is not None:
+            thread.finished_signal.connect(finished)
+        return thread
+
+    def _get_thread(self, name: str, factory, finished=None):
+        thread = self.threads.get(name)
+        if thread is None:
+            thread = self._connect_thread(factory(), finished)
+            self.threads[name] = thread
+        return thread
+
+    def get_install_thread(self):
+        from src.installationthread import InstallationThread
+        return self._get_thread('install', InstallationThread, self._finished)
+
+    def get_run_ae_thread(self):
+        from src.runaethread import RunAEThread
+        thread = self.threads.get('run_ae')
+        if thread is None:
+            thread = self._get_thread('run_ae', RunAEThread, self._finished)
+            thread.finished.connect(self._run_ae_thread_exited)
+        return thread
+
+    def get_kill_ae_thread(self):
+        from src.killaethread import KillAEThread
+        return self._get_thread('kill_ae', KillAEThread)
+
+    def get_remove_ae_thread(self):
+        from src.removeaethread import RemoveAEThread
+        return self._get_thread('remove_ae', RemoveAEThread, self._finished)
+
+    def get_create_instance_thread(self):
+        from src.instancethread import CreateInstanceThread
+        return self._get_thread('create_instance', CreateInstanceThread, self._finished)
+
+    def get_plugin_thread(self):
+        from src.pluginthread import PluginThread
+        return self._get_thread('plugin', PluginThread, self._finished)
+
+    def get_render_thread(self):
+        from src.renderthread import RenderQueueThread
+        return self._get_thread('render', RenderQueueThread, self._render_finished)
+
+    def start_exe_thread(self, name: str, command: list):
+        from src.runexethread import RunExeThread
+        thread = self._connect_thread(RunExeThread(command), self._finished)
+        self.threads[name] = thread
+        thread.start()
+        return thread
+
     def try_autoopen_mhtb(self):
         if self.ran_from_mhtb_link:
             return
@@ -93,6 +155,10 @@ class MainWindow(MainWindowUI):
         if mhtb_link == '':
             return
         
+        if not self.open_mhtb_link(mhtb_link):
+            exit(0)
+
+    def open_mhtb_link(self, mhtb_link: str) -> bool:
         mhtb_dir = get_mhtb_install_dir()
         if mhtb_dir is None:
             QMessageBox.warning(
@@ -100,16 +166,87 @@ class MainWindow(MainWindowUI):
                 gls('mhtb_not_found_title'),
                 gls('mhtb_not_found_text')
             )
-            exit(0)
+            return False
         
-        self.run_mhtb_thread = RunExeThread([f'{mhtb_dir.as_posix()}/ProductManager.exe', mhtb_link])
-        self.run_mhtb_thread.log_signal.connect(self._log)
-        self.run_mhtb_thread.finished_signal.connect(self._finished)
+        self.start_exe_thread('run_mhtb', [f'{mhtb_dir.as_posix()}/ProductManager.exe', mhtb_link])
+        return True
+
+    def forward_to_ae(self, aep_file: str, instance: str | None):
+        # AE passes a file opened from a second AfterFX.exe to the running
+        # session, so this doesn't lock the UI or wait for anything
+        from src.runexethread import RunExeThread
+        self.forward_threads = [thread for thread in self.forward_threads if thread.isRunning()]
+
+        thread = self._connect_thread(RunExeThread(['AfterFX.exe', 'Z:' + aep_file], instance))
+        self.forward_threads.append(thread)
+        thread.start()
+
+    def open_aep(self, aep_file: str, instance: str | None):
+        if instance is not None:
+            self.run_instance(instance, aep_file)
+            return
+
+        run_ae_thread = self.get_run_ae_thread()
+        if run_ae_thread.isRunning():
+            self.forward_to_ae(aep_file, None)
+            return
 
-        self.run_mhtb_thread.start()
+        if not self.run_button.isEnabled():
+            self._log(f'[IPC] Busy with another task, {aep_file} opens when it is done')
+            self.pending_aep_files.append(aep_file)
+            return
+
+        run_ae_thread.clear_aep_file_arg()
+        run_ae_thread.set_instance(None)
+        run_ae_thread.add_aep_file_arg(aep_file)
+        self.run_ae_button_clicked()
+
+    def open_pending_aep_files(self):
+        if not self.pending_aep_files or not self.run_button.isEnabled():
+            return
+
+        if not check_aegnux_installed():
+            self._log(f'[IPC] AE is not installed, dropping {len(self.pending_aep_files)} queued projects')
+            self.pending_aep_files.clear()
+            return
+
+        # The first one starts AE, the rest are forwarded to it
+        pending_aep_files, self.pending_aep_files = self.pending_aep_files, []
+        for aep_file in pending_aep_files:
+            self.open_aep(aep_file, None)
+
+    def stop_request_server(self):
+        if self.request_server_thread is not None and self.request_server_thread.isRunning():
+            self.request_server_thread.cancel()
+            self.request_server_thread.wait(1000)
+
+    @Slot(list)
+    def handle_open_request(self, args: list):
+        self._log(f'[IPC] Request from another launch: {" ".join(args) or "(no arguments)"}')
+
+        mhtb_link = next((arg for arg in args if 'misterhorsepm://' in arg), None)
+        aep_file = next((arg for arg in args if '.aep' in arg), None)
+
+        if (mhtb_link or aep_file) and not check_aegnux_installed():
+            self._log('[IPC] AE is not installed, nothing to open')
+            mhtb_link = aep_file = None
+
+        if mhtb_link is not None:
+            self.open_mhtb_link(mhtb_link)
+        elif aep_file is not None:
+            instance = get_instance_arg(args)
+            if instance is not None and not instance_exists(instance):
+                self._log(f'[IPC] No such instance: {instance}')
+                return
+            self.open_aep(aep_file, instance)
+        else:
+            self.showNormal()
+            self.raise_()
+            self.activateWindow()
     
     def try_autoopen_aep(self):
-        self.run_ae_thread.clear_aep_file_arg()
+        if 'run_ae' in self.threads:
+            self.threads['run_ae'].clear_aep_file_arg()
         if self.ran_from_aep_file:
             return
         
@@ -125,9 +262,34 @@ class MainWindow(MainWindowUI):
         if aep_file == '':
             return
         
-        self.run_ae_thread.add_aep_file_arg(aep_file)
+        run_ae_thread = self.get_run_ae_thread()
+        run_ae_thread.set_instance(get_instance_arg())
+        run_ae_thread.add_aep_file_arg(aep_file)
         self.run_ae_button_clicked()
 
+    def try_start_warm_wineserver(self):
+        # Also brings the server back after a wineserver -k or its idle timeout
+        if not check_warm_launch_enabled():
+            return
+
+        if self.warm_server_thread is None:
+            from src.warmserverthread import WarmServerThread
+            self.warm_server_thread = WarmServerThread()
+            self.warm_server_thread.log_signal.connect(self._log)
+
+        self.warm_server_thread.request()
+
+    def reset_run_ae_instance(self):
+        # An instance picked for one launch (--instance, IPC) must not stick to the next.
+        # A run still holding it is reset once its thread exits
+        run_ae_thread = self.threads.get('run_ae')
+        if run_ae_thread is not None and not run_ae_thread.isRunning():
+            run_ae_thread.set_instance(None)
+
+    @Slot()
+    def _run_ae_thread_exited(self):
+        self.reset_run_ae_instance()
+
     def init_installation(self):
         if check_aegnux_installed():
             self.install_button.hide()
@@ -135,10 +297,14 @@ class MainWindow(MainWindowUI):
             self.remove_aegnux_button.show()
 
             self.runMenu.setEnabled(True)
+            self.instancesMenu.setEnabled(True)
+            self.rebuild_instances_menu()
             self.browseMenu.setEnabled(True)
             self.kill_action.setEnabled(True)
             self.plugininst_action.setEnabled(True)
             self.term_action.setEnabled(True)
+            # Spawning wine can wait until the window has painted
+            QTimer.singleShot(0, self.try_start_warm_wineserver)
             self.try_autoopen_aep()
             self.try_autoopen_mhtb()
 
@@ -148,6 +314,7 @@ class MainWindow(MainWindowUI):
             self.remove_aegnux_button.hide()
 
             self.runMenu.setEnabled(False)
+            self.instancesMenu.setEnabled(False)
             self.browseMenu.setEnabled(False)
             self.kill_action.setEnabled(False)
             self.term_action.setEnabled(False)
@@ -159,6 +326,13 @@ class MainWindow(MainWindowUI):
         self.exe_action = self.runMenu.addAction(gls('exe_action'))
         self.plugininst_action = self.runMenu.addAction(gls('plugininst_action'))
         self.reg_action = self.runMenu.addAction(gls('reg_action'))
+        self.render_action = self.runMenu.addAction(gls('render_action'))
+        self.runMenu.addSeparator()
+        self.warm_action = self.runMenu.addAction(gls('warm_action'))
+        self.warm_action.setCheckable(True)
+        self.warm_action.setChecked(check_warm_launch_enabled())
+
+        self.instancesMenu = self.menuBar().addMenu(gls('instances_menu'))
 
         self.browseMenu = self.menuBar().addMenu(gls('browse_menu'))
         self.wpd_action = self.browseMenu.addAction(gls('wpd_action'))
@@ -172,12 +346,35 @@ class MainWindow(MainWindowUI):
         self.log_action = self.debugMenu.addAction(gls('log_action'))
         self.term_action = self.debugMenu.addAction(gls('term_action'))
 
+    def rebuild_instances_menu(self):
+        self.instancesMenu.clear()
+
+        new_instance_action = self.instancesMenu.addAction(gls('new_instance_action'))
+        new_instance_action.triggered.connect(self.new_instance_clicked)
+
+        names = list_instances()
+        if names:
+            self.instancesMenu.addSeparator()
+
+        for name in names:
+            instance_menu = self.instancesMenu.addMenu(name)
+            run_action = instance_menu.addAction(gls('instance_run_action'))
+            run_action.triggered.connect(lambda checked=False, n=name: self.run_instance(n))
+            kill_action = instance_menu.addAction(gls('instance_kill_action'))
+            kill_action.triggered.connect(lambda checked=False, n=name: self.kill_instance(n))
+            remove_action = instance_menu.addAction(gls('instance_remove_action'))
+            remove_action.triggered.connect(lambda checked=False, n=name: self.remove_instance_clicked(n))
+
     def lock_ui(self, lock: bool = True):
         self.install_button.setEnabled(not lock)
         self.run_button.setEnabled(not lock)
         self.remove_aegnux_button.setEnabled(not lock)
 
         self.runMenu.setEnabled(not lock)
+        self.instancesMenu.setEnabled(not lock)
+
+        if lock:
+            self.logs_edit.reset_last_error()
     
     @Slot()
     def toggle_logs(self):
@@ -194,12 +391,15 @@ class MainWindow(MainWindowUI):
         self.lock_ui(False)
         self.progress_bar.hide()
         self.init_installation()
+        self.reset_run_ae_instance()
+        # After any error dialog below has been dealt with
+        QTimer.singleShot(0, self.open_pending_aep_files)
 
         if not success:
             QMessageBox.critical(
                 self,
                 gls('error'),
-                self.logs_edit.toPlainText().split('\n')[-2]
+                self.logs_edit.get_last_error()
             )
             return
 
@@ -210,7 +410,7 @@ class MainWindow(MainWindowUI):
 
     @Slot(str)
     def _log(self, message: str):
-        self.logs_edit.append(message + '\n')
+        self.logs_edit.append_line(message)
     
     @Slot()
     def install_button_clicked(self):
@@ -221,7 +421,8 @@ class MainWindow(MainWindowUI):
         if method == DownloadMethod.CANCEL:
             return
         
-        self.install_thread.set_download_method(method)
+        install_thread = self.get_install_thread()
+        install_thread.set_download_method(method)
 
         if method == DownloadMethod.OFFLINE:
             QMessageBox.warning(
@@ -239,11 +440,11 @@ class MainWindow(MainWindowUI):
             if filename == '':
                 return
             
-            self.install_thread.set_offline_filename(filename)
+            install_thread.set_offline_filename(filename)
         
         self.lock_ui()
         self.progress_bar.show()
-        self.install_thread.start()
+        install_thread.start()
     
     @Slot()
     def install_plugins_button_clicked(self):
@@ -261,17 +462,33 @@ class MainWindow(MainWindowUI):
         )
         if filename == '':
             return
-        
-        self.plugin_thread.set_plugin_zip_filename(filename)
+
+        # Installing a new version of a pack removes what the old one left
+        from src.pluginmanifest import PluginManifest
+        replaced = PluginManifest().get_replaced_archive(filename)
+        replace_versions = True
+        if replaced is not None:
+            reply = QMessageBox.question(
+                self, gls('plugin_replace_title'),
+                gls('plugin_replace_text').format(old=replaced, new=os.path.basename(filename)),
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No | QMessageBox.StandardButton.Cancel,
+                QMessageBox.StandardButton.Cancel
+            )
+            if reply == QMessageBox.StandardButton.Cancel:
+                return
+            replace_versions = reply == QMessageBox.StandardButton.Yes
+
+        plugin_thread = self.get_plugin_thread()
+        plugin_thread.set_plugin_zip_filename(filename, replace_versions)
         
         self.lock_ui()
         self.progress_bar.show()
-        self.plugin_thread.start()
+        plugin_thread.start()
     
     @Slot()
     def run_ae_button_clicked(self):
         self.lock_ui()
-        self.run_ae_thread.start()
+        self.get_run_ae_thread().start()
     
     @Slot()
     def run_exe_button_clicked(self):
@@ -284,12 +501,8 @@ class MainWindow(MainWindowUI):
         if filename == '':
             return
 
-        self.run_exe_thread = RunExeThread([filename])
-        self.run_exe_thread.log_signal.connect(self._log)
-        self.run_exe_thread.finished_signal.connect(self._finished)
-
         self.lock_ui()
-        self.run_exe_thread.start()
+        self.start_exe_thread('run_exe', [filename])
     
     @Slot()
     def reg_button_clicked(self):
@@ -302,21 +515,124 @@ class MainWindow(MainWindowUI):
         if filename == '':
             return
 
-        self.reg_thread = RunExeThread(['regedit', filename])
-        self.reg_thread.log_signal.connect(self._log)
-        self.reg_thread.finished_signal.connect(self._finished)
-
         self.lock_ui()
-        self.reg_thread.start()
+        self.start_exe_thread('reg', ['regedit', filename])
     
+    @Slot(bool)
+    def warm_action_toggled(self, enabled: bool):
+        set_warm_launch_enabled(enabled)
+
+        if enabled:
+            self.try_start_warm_wineserver()
+            return
+
+        # Not killed: AE, installers or regedit may still run in the prefix.
+        # The server was started with -p<timeout> and exits once it's idle
+        self._log(f'[WARM] Warm launch disabled, the wineserver exits after {WARM_WINESERVER_IDLE_TIMEOUT // 60} idle minutes')
+
+    @Slot()
+    def new_instance_clicked(self):
+        name, ok = QInputDialog.getText(self, gls('new_instance_title'), gls('new_instance_text'))
+        if not ok or name == '':
+            return
+
+        if not is_valid_instance_name(name) or instance_exists(name):
+            QMessageBox.warning(self, gls('error'), gls('invalid_instance_name'))
+            return
+
+        create_instance_thread = self.get_create_instance_thread()
+        create_instance_thread.set_instance_name(name)
+
+        self.lock_ui()
+        self.progress_bar.show()
+        create_instance_thread.start()
+
+    def run_instance(self, name: str, aep_file: str | None = None):
+        thread = self.instance_threads.get(('run', name))
+        if thread is not None and thread.isRunning():
+            if aep_file is not None:
+                self.forward_to_ae(aep_file, name)
+                return
+            self._log(f'[INSTANCE] AE is already running in {name}')
+            return
+
+        from src.runaethread import RunAEThread
+        thread = self._connect_thread(
+            RunAEThread(name), lambda success, n=name: self._log(f'[INSTANCE] AE in {n} exited')
+        )
+        if aep_file is not None:
+            thread.add_aep_file_arg(aep_file)
+        self.instance_threads[('run', name)] = thread
+        thread.start()
+
+    def kill_instance(self, name: str):
+        from src.killaethread import KillAEThread
+        thread = self._connect_thread(KillAEThread(name))
+        self.instance_threads[('kill', name)] = thread
+        thread.start()
+
+    def remove_instance_clicked(self, name: str):
+        if is_instance_running(name):
+            QMessageBox.warning(self, gls('error'), gls('instance_running_text'))
+            return
+
+        reply = QMessageBox.question(
+            self, gls('instance_remove_action'),
+            gls('instance_remove_text').format(name=name),
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.No
+        )
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+
+        remove_instance(name)
+        self.rebuild_instances_menu()
+
+    @Slot()
+    def render_button_clicked(self):
+        project, _ = QFileDialog.getOpenFileName(
+            self,
+            gls('render_project_title'),
+            "",
+            "AE Projects (*.aep);;All Files (*)"
+        )
+        if project == '':
+            return
+
+        # An empty composition renders the project's own render queue
+        comp, ok = QInputDialog.getText(self, gls('render_action'), gls('render_comp_text'))
+        if not ok:
+            return
+
+        output = ''
+        if comp != '':
+            output, _ = QFileDialog.getSaveFileName(self, gls('render_output_title'), "", "All Files (*)")
+            if output == '':
+                return
+
+        from src.renderqueue import RenderJob
+        render_thread = self.get_render_thread()
+        job = render_thread.queue.add(RenderJob(project, comp or None, output or None))
+        self._log(f'[RENDER] Queued {job.describe()} as {job.id}')
+
+        if not render_thread.isRunning():
+            self.progress_bar.show()
+            render_thread.start()
+
+    @Slot(bool)
+    def _render_finished(self, success: bool):
+        self.progress_bar.hide()
+        if not success:
+            QMessageBox.warning(self, gls('error'), self.logs_edit.get_last_error())
+
     @Slot()
     def kill_ae_button_clicked(self):
-        self.kill_ae_thread.start()
+        self.get_kill_ae_thread().start()
     
     @Slot()
     def remove_aegnux_button_clicked(self):
         self.lock_ui()
-        self.remove_ae_thread.start()
+        self.get_remove_ae_thread().start()
     
     @Slot()
     def plugins_folder_clicked(self):
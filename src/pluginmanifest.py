@@ -0,0 +1,183 @@
+import os
+import re
+import json
+import zipfile
+from pathlib import Path
+from src.utils import get_aegnux_installation_dir
+
+MANIFEST_VERSION = 3
+
+# 'Private-Plugins v1.2.zip' and 'private_plugins-1.3.zip' are one pack.
+# Only an explicit version goes, 'Plugins-Part1' and 'disk2' stay distinct
+PACK_VERSION_PATTERN = re.compile(r'[\s_.-]+(v\d+(\.\d+)*|\d+(\.\d+)+)$')
+
+
+def get_plugin_manifest_path() -> Path:
+    return get_aegnux_installation_dir().joinpath('plugin_manifest.json')
+
+
+def get_archive_entries(zip_file_path: str) -> dict:
+    # Name -> ZipInfo. The central directory already has every entry's
+    # CRC and size, so nothing needs extracting to tell what changed
+    with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
+        return {info.filename: info for info in zip_ref.infolist() if not info.is_dir()}
+
+
+def get_pack_id(zip_file_path: str, keep_version: bool = False) -> str:
+    # Versions of a pack replace each other, other packs are left alone.
+    # keep_version makes an archive its own pack, next to older versions
+    name = os.path.splitext(os.path.basename(zip_file_path))[0].lower()
+    if not keep_version:
+        name = PACK_VERSION_PATTERN.sub('', name) or name
+    return name.replace('_', '-').replace(' ', '-')
+
+
+def route_entry(name: str, routes: list) -> Path | None:
+    # Routes are (archive prefix, destination). A prefix ending in / maps
+    # a directory, anything else a single file
+    for prefix, destination in routes:
+        if prefix.endswith('/'):
+            if name.startswith(prefix) and len(name) > len(prefix):
+                # Entries are written straight to these paths, nothing may
+                # climb out of the destination
+                parts = name[len(prefix):].split('/')
+                if any(part in ('', '.', '..') or '\\' in part for part in parts):
+                    return None
+                return Path(destination).joinpath(*parts)
+        elif name == prefix:
+            return Path(destination)
+    return None
+
+
+class PluginSyncPlan:
+    def __init__(self):
+        self.writes = []
+        self.removals = []
+        self.unchanged = 0
+
+
+class PluginManifest:
+    # What the last plugin installs wrote: every destination file with the
+    # archive entry it came from, and every installer that ran cleanly
+
+    def __init__(self, path: Path | None = None):
+        self.path = Path(path) if path is not None else get_plugin_manifest_path()
+        self.files = {}
+        self.installers = {}
+        self.packs = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        # Records from version 1 have no pack and are never removed
+        if data.get('version') in (1, 2, MANIFEST_VERSION):
+            self.files = data.get('files', {})
+            self.installers = data.get('installers', {})
+            self.packs = data.get('packs', {})
+
+    def save(self):
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'version': MANIFEST_VERSION,
+                'files': self.files,
+                'installers': self.installers,
+                'packs': self.packs
+            }, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def is_file_current(self, destination, info: zipfile.ZipInfo) -> bool:
+        # Same entry content as last time and nobody touched the file since
+        record = self.files.get(str(destination))
+        if record is None or record['crc'] != info.CRC or record['size'] != info.file_size:
+            return False
+
+        try:
+            stat = os.stat(destination)
+        except OSError:
+            return False
+        return stat.st_size == record['size'] and stat.st_mtime_ns == record['mtime_ns']
+
+    def record_file(self, destination, info: zipfile.ZipInfo, pack: str | None = None):
+        stat = os.stat(destination)
+        self.files[str(destination)] = {
+            'pack': pack,
+            'entry': info.filename,
+            'crc': info.CRC,
+            'size': info.file_size,
+            'mtime_ns': stat.st_mtime_ns
+        }
+
+    def forget_file(self, destination):
+        self.files.pop(str(destination), None)
+
+    def is_installer_current(self, name: str, info: zipfile.ZipInfo) -> bool:
+        record = self.installers.get(name)
+        return record is not None and record['crc'] == info.CRC and record['size'] == info.file_size
+
+    def record_installer(self, name: str, info: zipfile.ZipInfo):
+        self.installers[name] = {'crc': info.CRC, 'size': info.file_size}
+
+    def record_pack(self, pack: str, zip_file_path: str):
+        self.packs[pack] = os.path.basename(zip_file_path)
+
+    def get_replaced_archive(self, zip_file_path: str) -> str | None:
+        # The archive an earlier version of this pack was installed from, if
+        # installing this one would remove the files that one left
+        pack = get_pack_id(zip_file_path)
+        if not any(record.get('pack') == pack for record in self.files.values()):
+            return None
+
+        archive = self.packs.get(pack)
+        if archive == os.path.basename(zip_file_path):
+            return None
+        return archive or pack
+
+    def plan_sync(self, entries: dict, routes: list, pack: str | None = None) -> PluginSyncPlan:
+        # Which entries to write where, and which files an earlier version
+        # of the same pack installed that this one doesn't have anymore
+        plan = PluginSyncPlan()
+        destinations = set()
+
+        for name, info in entries.items():
+            destination = route_entry(name, routes)
+            if destination is None:
+                continue
+
+            destinations.add(str(destination))
+            if self.is_file_current(destination, info):
+                plan.unchanged += 1
+            else:
+                plan.writes.append((info, destination))
+
+        plan.removals = [
+            Path(path) for path, record in self.files.items()
+            if pack is not None and record.get('pack') == pack and path not in destinations
+        ]
+        return plan
+
+
+def remove_installed_file(path: Path, stop_dirs: list):
+    # Removes a file and the directories it leaves empty, up to the route roots
+    path = os.path.normpath(path)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+    stop_dirs = {os.path.normpath(stop_dir) for stop_dir in stop_dirs}
+    parent = os.path.dirname(path)
+    if not any(parent.startswith(stop_dir + os.sep) or parent == stop_dir for stop_dir in stop_dirs):
+        return
+
+    while parent not in stop_dirs:
+        try:
+            os.rmdir(parent)
+        except OSError:
+            break
+        parent = os.path.dirname(parent)
@@ -1,162 +1,217 @@
-import os
-import shutil
+import time
+import tempfile
+from pathlib import Path
 from src.processthread import ProcessThread
-from src.utils import get_private_plugins_unpack_path, get_ae_plugins_dir, get_wineprefix_dir
+from src.registry import RegistryTransaction
+from src.archives import iter_extract_zip_routed
+from src.pluginmanifest import PluginManifest, get_archive_entries, get_pack_id, route_entry, remove_installed_file
+from src.utils import get_ae_plugins_dir, get_wineprefix_dir, get_aegnux_installation_dir
+from src.config import (
+    PLUGIN_INSTALLER_CONCURRENCY, PLUGIN_INSTALLER_TIMEOUT,
+    INTERACTIVE_PLUGIN_INSTALLERS, LOG_THROTTLE_SECONDS
+)
+
+INSTALLER_PREFIX = 'installer/'
+CEP_REG_ENTRY = 'CEP/AddKeys.reg'
 
 
 class PluginThread(ProcessThread):
     def __init__(self):
         super().__init__()
-    
-    def set_plugin_zip_filename(self, filename: str):
+
+    def set_plugin_zip_filename(self, filename: str, replace_versions: bool = True):
+        # Without replace_versions older versions of the pack stay installed
         self.plugin_zip_filename = filename
-    
+        self.pack = get_pack_id(filename, keep_version=not replace_versions)
+
+    def get_routes(self) -> list:
+        # Where the parts of a plugin pack end up
+        cep_extensions_dir = get_wineprefix_dir().joinpath('drive_c/Program Files (x86)/Common Files/Adobe/CEP/extensions')
+        video_copilot_dir = get_ae_plugins_dir().joinpath('VideoCopilot')
+
+        return [
+            ('aex/', get_ae_plugins_dir()),
+            ('preset-backup/', get_wineprefix_dir().joinpath('drive_c/users/relative/Documents/Adobe/After Effects 2024/User Presets')),
+            ('CEP/flowv1.4.2/', cep_extensions_dir.joinpath('flowv1.4.2')),
+            ('installer/Element.aex', video_copilot_dir.joinpath('Element.aex')),
+            ('installer/Element.license', video_copilot_dir.joinpath('Element.license'))
+        ]
+
     def run(self):
-        self.log_signal.emit('[DEBUG] Unpacking plugins from the archive...')
+        # Only what changed since the last install is extracted, straight to
+        # where it belongs. The manifest remembers what earlier packs wrote
+        self.reset_run_state()
         self.progress_signal.emit(5)
-        self.remove_ppu_dir()
 
-        ppu_dir = get_private_plugins_unpack_path()
-        self.unpack_zip(self.plugin_zip_filename, ppu_dir.as_posix())
-        self.progress_signal.emit(15)
+        self.registry = RegistryTransaction()
+        self.manifest = PluginManifest()
+
+        entries = get_archive_entries(self.plugin_zip_filename)
+        routes = self.get_routes()
+        plan = self.manifest.plan_sync(entries, routes, self.pack)
+        self.log_signal.emit(
+            f'[PLUGINS] {len(plan.writes)} files to write, {plan.unchanged} unchanged, '
+            f'{len(plan.removals)} no longer in the pack'
+        )
+
+        installers = self.get_changed_installers(entries)
+
+        # Files shipped next to the installers replace what those install,
+        # so they are written after the installers ran
+        writes = [(info, destination) for info, destination in plan.writes if not info.filename.startswith(INSTALLER_PREFIX)]
+        if not self.sync_plugin_files(writes, (5, 45)):
+            return
+        self.remove_stale_files(plan.removals, routes)
+        self.manifest.record_pack(self.pack, self.plugin_zip_filename)
+
+        # Only what wine has to run goes through a temporary folder, on the
+        # same disk as the rest since installers can be large
+        with tempfile.TemporaryDirectory(prefix='plugin-installers-', dir=get_aegnux_installation_dir()) as temp_dir:
+            self.temp_dir = Path(temp_dir)
+
+            # Installers may come with files they load from their own folder
+            names = {name for name in entries if name.startswith(INSTALLER_PREFIX) and route_entry(name, routes) is None}
+            names = {name for name in names if not name.endswith('.exe') or name[len(INSTALLER_PREFIX):] in installers}
+            if CEP_REG_ENTRY in entries:
+                names.add(CEP_REG_ENTRY)
+
+            if not self.unpack_zip(self.plugin_zip_filename, temp_dir, names):
+                return
 
-        self.install_aex_plugins()
-        self.install_cep_extensions()
-        self.install_presets()
-        self.run_installers()
+            self.install_cep_extensions(CEP_REG_ENTRY in entries)
+            return_code = self.apply_registry(self.registry)
+            if return_code != 0:
+                if return_code is not None:
+                    self.log_signal.emit(f'[ERROR] Could not write the CEP registry keys, regedit returned {return_code}')
+                self.report_stopped()
+                return
+            if not self.run_installers(installers, entries):
+                return
+
+        # Checked again, a rerun installer may have overwritten them
+        writes = []
+        for name, info in entries.items():
+            destination = route_entry(name, routes) if name.startswith(INSTALLER_PREFIX) else None
+            if destination is not None and not self.manifest.is_file_current(destination, info):
+                writes.append((info, destination))
+        if not self.sync_plugin_files(writes, (85, 90)):
+            return
 
-        self.remove_ppu_dir()
         self.progress_signal.emit(95)
         self.log_signal.emit('[INFO] The plugins have been installed')
 
         self.finished_signal.emit(True)
         self.progress_signal.emit(100)
-    
-    def install_aex_plugins(self):
-        self.log_signal.emit('[DEBUG] Installing aex plugins...')
-
-        ppu_dir = get_private_plugins_unpack_path()
-        aex_src = ppu_dir.joinpath('aex')
 
-        for item in os.listdir(aex_src.as_posix()):
-            if self._is_cancelled:
-                self.cancelled.emit()
-                return
-            src_path = aex_src.joinpath(item)
-            dst_path = get_ae_plugins_dir().joinpath(item)
-
-            if os.path.isdir(src_path):
-                shutil.copytree(src_path, dst_path, dirs_exist_ok=True)
-            else:
-                shutil.copy2(src_path, dst_path)
-
-        self.log_signal.emit('[INFO] AEX plugins installed')
-        self.progress_signal.emit(30)
-    
-    def install_presets(self):
-        self.log_signal.emit('[DEBUG] Installing presets...')
-
-        ppu_dir = get_private_plugins_unpack_path()
-        preset_src = ppu_dir.joinpath('preset-backup')
-        preset_dest = get_wineprefix_dir().joinpath('drive_c/users/relative/Documents/Adobe/After Effects 2024/User Presets')
-
-        os.makedirs(preset_dest, exist_ok=True)
-        for item in os.listdir(preset_src):
-            if self._is_cancelled:
-                self.cancelled.emit()
-                return
-            src_path = preset_src.joinpath(item)
-            dst_path = preset_dest.joinpath(item)
-            if os.path.isdir(src_path):
-                shutil.copytree(src_path, dst_path, dirs_exist_ok=True)
-            else:
-                shutil.copy2(src_path, dst_path)
-
-        self.log_signal.emit("[INFO] Presets installed")
-        self.progress_signal.emit(55)
-    
-    def run_installers(self):
+    def get_changed_installers(self, entries: dict) -> list:
+        installers = []
+        for name, info in sorted(entries.items()):
+            exe = name[len(INSTALLER_PREFIX):]
+            if not name.startswith(INSTALLER_PREFIX) or not exe.endswith('.exe') or '/' in exe:
+                continue
+
+            if self.manifest.is_installer_current(exe, info):
+                self.log_signal.emit(f'[PLUGINS] {exe} is unchanged since it last ran, skipping')
+                continue
+            installers.append(exe)
+        return installers
+
+    def sync_plugin_files(self, writes: list, progress_range: tuple) -> bool:
+        self.log_signal.emit('[DEBUG] Installing plugin files...')
+        range_start, range_end = progress_range
+        last_update_time = time.time()
+
+        extraction = iter_extract_zip_routed(self.plugin_zip_filename, writes)
+        try:
+            for extracted_files, total_files in extraction:
+                info, destination = writes[extracted_files - 1]
+                self.manifest.record_file(destination, info, self.pack)
+
+                if self._is_cancelled:
+                    self.manifest.save()
+                    self.log_signal.emit('[PLUGINS] Cancelled by user.')
+                    self.cancelled.emit()
+                    self.finished_signal.emit(False)
+                    return False
+
+                current_time = time.time()
+                if current_time - last_update_time >= LOG_THROTTLE_SECONDS or extracted_files == total_files:
+                    self.log_signal.emit(f'[PLUGINS] Installed {extracted_files}/{total_files} files')
+                    self.progress_signal.emit(range_start + (range_end - range_start) * extracted_files // total_files)
+                    last_update_time = current_time
+        finally:
+            extraction.close()
+
+        self.manifest.save()
+        self.progress_signal.emit(range_end)
+        return True
+
+    def remove_stale_files(self, removals: list, routes: list):
+        route_roots = [destination for _, destination in routes]
+        for path in removals:
+            remove_installed_file(path, route_roots)
+            self.manifest.forget_file(path)
+
+        if removals:
+            self.manifest.save()
+            self.log_signal.emit(f'[PLUGINS] Removed {len(removals)} files the pack no longer has')
+
+    def run_installers(self, installers: list, entries: dict) -> bool:
         self.log_signal.emit('[DEBUG] Running installers...')
-        ppu_dir = get_private_plugins_unpack_path()
-        install_src = ppu_dir.joinpath('installer')
-
-        installers_counter = 0
-
-        for exe in os.listdir(install_src.as_posix()):
-            if exe.endswith('.exe') and exe not in ['E3D.exe', 'saber.exe']:
-                self.progress_signal.emit(55 + installers_counter * 3)
-                
-                self.log_signal.emit(f"[INFO] Installing: {exe}")
-                self.run_command(
-                    ['wine', exe, '/verysilent', '/suppressmsgboxes'], 
-                    install_src.as_posix(), True
-                )
-        
+        install_src = self.temp_dir.joinpath('installer')
+
+        silent_installers = [
+            (exe, ['wine', exe, '/verysilent', '/suppressmsgboxes'])
+            for exe in installers
+            if exe not in INTERACTIVE_PLUGIN_INSTALLERS
+        ]
+
+        self.log_signal.emit(f"[INFO] Installing {len(silent_installers)} plugins, {PLUGIN_INSTALLER_CONCURRENCY} at a time")
+        results = self.run_commands_parallel(
+            silent_installers, install_src.as_posix(), True,
+            PLUGIN_INSTALLER_CONCURRENCY, PLUGIN_INSTALLER_TIMEOUT, (55, 70)
+        )
+        if results is None:
+            return False
+
+        failed = [exe for exe, (return_code, _) in results.items() if return_code != 0]
+        if failed:
+            self.log_signal.emit(f"[WARNING] These installers did not finish cleanly: {', '.join(failed)}")
+
+        # Only clean runs count, a failed installer runs again next time
+        for exe, (return_code, _) in results.items():
+            if return_code == 0:
+                self.manifest.record_installer(exe, entries[INSTALLER_PREFIX + exe])
+        self.manifest.save()
+
         self.progress_signal.emit(70)
-        
+
         # Special handling for E3D and saber
-        for exe in ['E3D.exe', 'saber.exe']:
+        for exe in INTERACTIVE_PLUGIN_INSTALLERS:
+            if exe not in installers:
+                continue
+
             self.log_signal.emit(f"[INFO] Please manually install: {exe}")
-            self.run_command(
-                ['wine', exe], 
+            return_code = self.run_command(
+                ['wine', exe],
                 install_src.as_posix(), True
             )
-        
-        self.progress_signal.emit(85)
-        self.copy_element_files()
-        
-    def copy_element_files(self):
-        self.log_signal.emit('[DEBUG] Copying Element files...')
-
-        ppu_dir = get_private_plugins_unpack_path()
-        install_src = ppu_dir.joinpath('installer')
-
-        video_copilot_dir = get_ae_plugins_dir().joinpath("VideoCopilot")
-        element_files = [
-            ("Element.aex", "Element.aex"),
-            ("Element.license", "Element.license")
-        ]
-        
-        for src_name, dst_name in element_files:
-            src_path = install_src.joinpath(src_name)
-            if os.path.exists(src_path):
-                shutil.copy2(src_path, os.path.join(video_copilot_dir, dst_name))
-                self.log_signal.emit(f"[INFO] {src_name} copied successfully")
-        
-        self.log_signal.emit("[INFO] Element installed")
-        self.progress_signal.emit(90)
-    
-    def install_cep_extensions(self):
-        self.log_signal.emit('[DEBUG] Installing CEP extensions...')
+            # Cancelled or wine missing, run_command already reported it
+            if return_code is None:
+                return False
+            if return_code == 0:
+                self.manifest.record_installer(exe, entries[INSTALLER_PREFIX + exe])
+                self.manifest.save()
 
-        ppu_dir = get_private_plugins_unpack_path()
-        cep_dir = ppu_dir.joinpath('CEP')
+        self.progress_signal.emit(85)
+        return True
 
-        cep_reg_file = cep_dir.joinpath("AddKeys.reg")
-        self.run_command(['wine', "regedit", cep_reg_file.as_posix()], in_prefix=True)
+    def install_cep_extensions(self, has_reg_file: bool):
+        self.log_signal.emit('[DEBUG] Installing CEP extensions...')
 
-        self.install_flow()
+        # The keys go in on every install, they are cheap and may have been reset
+        if has_reg_file:
+            self.registry.merge_reg_file(self.temp_dir.joinpath(CEP_REG_ENTRY))
 
         self.log_signal.emit("[INFO] CEP extensions installed")
-        self.progress_signal.emit(45)
-    
-    def install_flow(self):
-        ppu_dir = get_private_plugins_unpack_path()
-        cep_dir = ppu_dir.joinpath('CEP')
-
-        self.log_signal.emit('[DEBUG] Installing Flow...')
-        
-        flow_src = cep_dir.joinpath("flowv1.4.2")
-        cep_dst = get_wineprefix_dir().joinpath("drive_c/Program Files (x86)/Common Files/Adobe/CEP/extensions")
-        
-        os.makedirs(cep_dst, exist_ok=True)
-        shutil.copytree(flow_src, os.path.join(cep_dst, "flowv1.4.2"), dirs_exist_ok=True)
-        self.log_signal.emit("[INFO] Flow installed")
-    
-    def remove_ppu_dir(self):
-        ppu_dir = get_private_plugins_unpack_path()
-        try:
-            shutil.rmtree(ppu_dir.as_posix())
-            self.log_signal.emit('[DEBUG] Temporary folder removed successfully.')
-        except OSError as e:
-            self.log_signal.emit(f'[WARNING] Failed to remove temporary folder {ppu_dir}: {e}')
\ No newline at end of file
+        self.progress_signal.emit(50)
@@ -0,0 +1,93 @@
+import os
+import shutil
+import getpass
+import hashlib
+from pathlib import Path
+from src.artifactcache import get_aegnux_cache_dir
+from src.copyengine import copy_tree, reflink_file
+from src.config import PREFIX_CLONE_MODE, PREFIX_TEMPLATE_FORMAT
+
+
+def get_prefix_templates_dir() -> Path:
+    templates_dir = get_aegnux_cache_dir().joinpath('templates')
+    os.makedirs(templates_dir, exist_ok=True)
+    return templates_dir
+
+
+def fingerprint_tree(root) -> str:
+    # Cheap identity of a directory tree: relative paths, sizes and mtimes
+    sha = hashlib.sha256()
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            stat = os.lstat(path)
+            sha.update(f'{os.path.relpath(path, root)}:{stat.st_size}:{stat.st_mtime_ns}\n'.encode())
+    return sha.hexdigest()
+
+
+def compute_template_key(runner_fingerprint: str, asset_hashes: dict) -> str:
+    sha = hashlib.sha256()
+    sha.update(f'format:{PREFIX_TEMPLATE_FORMAT}\n'.encode())
+    sha.update(f'runner:{runner_fingerprint}\n'.encode())
+    # A prefix bakes in the user name (drive_c/users/<user>) and the home path
+    sha.update(f'user:{getpass.getuser()}\n'.encode())
+    sha.update(f'home:{os.path.expanduser("~")}\n'.encode())
+    for name in sorted(asset_hashes):
+        sha.update(f'{os.path.basename(name)}:{asset_hashes[name]}\n'.encode())
+    return sha.hexdigest()[:32]
+
+
+def get_template_path(key: str) -> Path:
+    return get_prefix_templates_dir().joinpath(key)
+
+
+def has_template(key: str) -> bool:
+    return get_template_path(key).joinpath('wineprefix').is_dir()
+
+
+def probe_clone_mode(src_dir, dst_dir) -> str:
+    if PREFIX_CLONE_MODE != 'auto':
+        return PREFIX_CLONE_MODE
+
+    probe_src = os.path.join(src_dir, '.aegnux-reflink-probe')
+    probe_dst = os.path.join(dst_dir, '.aegnux-reflink-probe')
+
+    try:
+        with open(probe_src, 'wb') as f:
+            f.write(b'probe')
+        return 'reflink' if reflink_file(probe_src, probe_dst) else 'copy'
+    finally:
+        for probe in [probe_src, probe_dst]:
+            if os.path.exists(probe):
+                os.remove(probe)
+
+
+def clone_tree(src_dir, dst_dir, mode: str = 'copy'):
+    # The copy engine already tries a reflink first, so reflink and copy
+    # only differ in what probe_clone_mode reports
+    copy_tree(src_dir, dst_dir, hardlink=mode == 'hardlink')
+
+
+def snapshot_prefix(prefix_dir, key: str):
+    template_path = get_template_path(key)
+    tmp_path = template_path.with_name(key + '.tmp')
+
+    shutil.rmtree(tmp_path, True)
+    os.makedirs(tmp_path)
+
+    mode = probe_clone_mode(prefix_dir, tmp_path)
+    clone_tree(prefix_dir, tmp_path.joinpath('wineprefix'), 'copy' if mode == 'hardlink' else mode)
+
+    shutil.rmtree(template_path, True)
+    os.replace(tmp_path, template_path)
+
+
+def clone_prefix_from_template(key: str, prefix_dir) -> str:
+    template_prefix = get_template_path(key).joinpath('wineprefix')
+    os.makedirs(prefix_dir, exist_ok=True)
+
+    mode = probe_clone_mode(template_prefix, prefix_dir)
+    clone_tree(template_prefix, prefix_dir, mode)
+
+    return mode
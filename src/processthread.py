@@ -1,18 +1,25 @@
 import os
 import time
-import requests
-import zipfile
 import tarfile
-import subprocess
-import select
-import fcntl
-from src.utils import format_size, get_wineprefix_dir, get_wine_bin_path_env
-from src.config import DOWNLOAD_CHUNK_SIZE, LOG_THROTTLE_SECONDS
-from PySide6.QtCore import QThread, Signal
+import tempfile
+from src.sessionlog import SessionLog, rotate_logs
+from src.procsupervisor import ProcessSupervisor
+from src.registry import RegistryTransaction
+from src.winehive import apply_transaction_offline
+from src.archives import iter_extract_zip, iter_extract_tar_stream
+from src.copyengine import iter_copy_tree
+from src.instances import get_instance_prefix_dir
+from src.utils import format_size, get_wine_bin_path_env
+from src.config import DOWNLOAD_CHUNK_SIZE, LOG_THROTTLE_SECONDS, LOG_BATCH_SECONDS
+from PySide6.QtCore import QThread, Signal, Qt
+
+# Old session logs are rotated by the first thread that opens one
+_logs_rotated = False
 
 
 class ProcessThread(QThread):
     log_signal = Signal(str)
+    log_batch_signal = Signal(list)
     progress_signal = Signal(int)
     finished_signal = Signal(bool)
     cancelled = Signal()
@@ -20,11 +27,132 @@ class ProcessThread(QThread):
     def __init__(self):
         super().__init__()
         self._is_cancelled = False 
+        self._supervisor = None
+        self._pending_lines = []
+        self._last_batch_time = 0
+        self._session_log = None
+        self._finish_reported = False
+        self.instance = None
+
+        # Direct connections run in the emitting thread, the GUI thread never touches the file
+        self.log_signal.connect(self._write_session_line, Qt.ConnectionType.DirectConnection)
+        self.log_batch_signal.connect(self._write_session_lines, Qt.ConnectionType.DirectConnection)
+        self.started.connect(self._open_session_log, Qt.ConnectionType.DirectConnection)
+        self.finished.connect(self._close_session_log, Qt.ConnectionType.DirectConnection)
+        self.finished_signal.connect(self._mark_finish_reported, Qt.ConnectionType.DirectConnection)
+
+    def set_instance(self, name: str | None):
+        self.instance = name
+
+    def get_prefix_dir(self):
+        return get_instance_prefix_dir(self.instance)
 
     def cancel(self):
         self._is_cancelled = True
+        supervisor = self._supervisor
+        if supervisor is not None:
+            supervisor.wakeup()
     
-    def download_file_to(self, url: str, filename: str):
+    def reset_run_state(self):
+        # Called once at the top of run(), never per command: steps running
+        # side by side must not wipe a cancel another step hasn't seen yet
+        self._is_cancelled = False
+        self._finish_reported = False
+
+    def _mark_finish_reported(self, success: bool):
+        self._finish_reported = True
+
+    def report_stopped(self):
+        # For runs that stop early, unless a helper already told the UI
+        if self._finish_reported:
+            return
+
+        if self._is_cancelled:
+            self.log_signal.emit('[INFO] Cancelled by user.')
+            self.cancelled.emit()
+        self.finished_signal.emit(False)
+
+    def _open_session_log(self):
+        global _logs_rotated
+        try:
+            if not _logs_rotated:
+                _logs_rotated = True
+                rotate_logs()
+            self._session_log = SessionLog(type(self).__name__)
+        except OSError as e:
+            self._session_log = None
+            self.log_signal.emit(f'[ERROR] Could not open the session log: {e}')
+
+    def _close_session_log(self):
+        if self._session_log is not None:
+            self._session_log.close()
+            self._session_log = None
+
+    def _write_session_line(self, line: str):
+        if self._session_log is not None:
+            self._session_log.write(line)
+
+    def _write_session_lines(self, lines: list):
+        if self._session_log is not None:
+            self._session_log.write_lines(lines)
+
+    def _emit_download_progress(self, filename, downloaded: int, total: int, speed: float, progress_range: tuple | None):
+        if total > 0:
+            percent = int((downloaded / total) * 100)
+        else:
+            percent = 0
+
+        self.log_signal.emit(f'[DOWNLOADING] {filename} ({percent}%/{format_size(total)}), {format_size(speed)}/s')
+
+        if progress_range is not None:
+            range_start, range_end = progress_range
+            self.progress_signal.emit(range_start + (range_end - range_start) * percent // 100)
+
+    def download_file_to(self, url: str, filename: str, progress_range: tuple | None = None):
+        # requests takes a while to import and most threads never download
+        from src.downloader import SegmentedDownload
+        download = SegmentedDownload(url, filename)
+
+        if not download.probe():
+            return self._download_file_single(url, filename, progress_range)
+
+        start_time = time.time()
+        last_update_time = time.time() # throttling timer
+
+        # iter_progress loads the saved state before its first yield
+        progress = download.iter_progress()
+        resume_reported = False
+
+        try:
+            for downloaded in progress:
+                if not resume_reported:
+                    resume_reported = True
+                    if download.resumed_bytes:
+                        self.log_signal.emit(f'[DOWNLOAD] Resuming {filename} from {format_size(download.resumed_bytes)}')
+
+                if self._is_cancelled:
+                    self.log_signal.emit(f'[DOWNLOAD] Cancelled by user. Partial file kept for resuming: {filename}')
+                    self.cancelled.emit()
+                    self.finished_signal.emit(False)
+                    return False
+
+                current_time = time.time()
+                if current_time - last_update_time >= LOG_THROTTLE_SECONDS:
+                    elapsed_time = current_time - start_time
+                    fetched = downloaded - download.resumed_bytes
+                    speed = (fetched / elapsed_time) if elapsed_time > 0 else 0
+
+                    self._emit_download_progress(filename, downloaded, download.total, speed, progress_range)
+                    last_update_time = current_time
+        finally:
+            progress.close()
+
+        self.log_signal.emit(f'[DOWNLOADED] {filename} (100%/{format_size(download.total)})')
+        return True
+
+    def _download_file_single(self, url: str, filename: str, progress_range: tuple | None = None):
+        # Fallback for servers without range support, restarts from zero
+        import requests
         r = requests.get(url, stream=True)
         total = int(r.headers.get('content-length', 0))
 
@@ -40,51 +168,36 @@ class ProcessThread(QThread):
                     os.remove(filename)
                     self.cancelled.emit()
                     self.finished_signal.emit(False)
-                    return
+                    return False
 
                 f.write(data)
                 downloaded += len(data)
                 
                 current_time = time.time()
                 if current_time - last_update_time >= LOG_THROTTLE_SECONDS:
-                    if total > 0:
-                        percent = int((downloaded / total) * 100)
-                    else:
-                        percent = 0
-                    
                     elapsed_time = current_time - start_time
                     speed = (downloaded / elapsed_time) if elapsed_time > 0 else 0
 
-                    self.log_signal.emit(f'[DOWNLOADING] {filename} ({percent}%/{format_size(total)}), {format_size(speed)}/s')
+                    self._emit_download_progress(filename, downloaded, total, speed, progress_range)
                     last_update_time = current_time
-        
-        if total > 0:
-            final_percent = 100
-        else:
-            final_percent = 0
             
         self.log_signal.emit(f'[DOWNLOADED] {filename} (100%/{format_size(total)})')
+        return True
 
 
-    def unpack_zip(self, zip_file_path: str, extract_to_path: str):
+    def unpack_zip(self, zip_file_path: str, extract_to_path: str, names: set | None = None):
         self.log_signal.emit(f'[EXTRACTING] Starting ZIP extraction: {zip_file_path}')
-        with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
-            members = [m for m in zip_ref.infolist() if not m.is_dir()] 
-            total_files = len(members)
-            extracted_files = 0
-            last_update_time = time.time()
-            
-            os.makedirs(extract_to_path, exist_ok=True)
+        last_update_time = time.time()
 
-            for file_info in members:
+        extraction = iter_extract_zip(zip_file_path, extract_to_path, names=names)
+
+        try:
+            for extracted_files, total_files in extraction:
                 if self._is_cancelled:
                     self.log_signal.emit('[EXTRACTING] ZIP extraction cancelled by user.')
                     self.cancelled.emit()
                     self.finished_signal.emit(False)
-                    return
-                
-                zip_ref.extract(file_info, extract_to_path)
-                extracted_files += 1
+                    return False
 
                 current_time = time.time()
                 # Throttling logic
@@ -96,8 +209,11 @@ class ProcessThread(QThread):
 
                     self.log_signal.emit(f'[EXTRACTING] {zip_file_path}: {extracted_files}/{total_files} files ({percent}%)')
                     last_update_time = current_time
+        finally:
+            extraction.close()
         
         self.log_signal.emit(f'[EXTRACTED] ZIP finished extracting to {extract_to_path}')
+        return True
 
 
     def unpack_tar(self, tar_file_path: str, extract_to_path: str):
@@ -115,7 +231,7 @@ class ProcessThread(QThread):
                     self.log_signal.emit('[EXTRACTING] TAR extraction cancelled by user.')
                     self.cancelled.emit()
                     self.finished_signal.emit(False)
-                    return
+                    return False
                 
                 tar_ref.extract(member, extract_to_path)
                 extracted_files += 1
@@ -127,137 +243,265 @@ class ProcessThread(QThread):
                     last_update_time = current_time
         
         self.log_signal.emit(f'[EXTRACTED] TAR finished extracting to {extract_to_path}')
+        return True
 
 
-    def _set_non_blocking(self, file):
-        if os.name == 'posix':
-            fd = file.fileno()
-            fl = fcntl.fcntl(fd, fcntl.F_GETFL)
-            fcntl.fcntl(fd, fcntl.F_SETFL, fl | os.O_NONBLOCK)
+    def stream_unpack_tar(self, url: str, extract_to_path: str, tee_to: str | None = None):
+        self.log_signal.emit(f'[EXTRACTING] Streaming TAR extraction from {url}')
+        import requests
+        r = requests.get(url, stream=True)
+        r.raise_for_status()
+        r.raw.decode_content = True
 
-    def run_command(self, command: list, cwd: str = None, in_prefix: bool = False):
-        self.log_signal.emit(f'[COMMAND] Running command: {" ".join(command)}')
-        self._is_cancelled = False
+        total = int(r.headers.get('content-length', 0))
+        start_time = time.time()
+        last_update_time = time.time()
+
+        tee = open(tee_to, 'wb') if tee_to is not None else None
+        extraction = iter_extract_tar_stream(r.raw, extract_to_path, tee)
+
+        try:
+            for extracted_files, downloaded in extraction:
+                if self._is_cancelled:
+                    self.log_signal.emit('[EXTRACTING] TAR extraction cancelled by user.')
+                    self.cancelled.emit()
+                    self.finished_signal.emit(False)
+                    return False
 
+                current_time = time.time()
+                if current_time - last_update_time >= LOG_THROTTLE_SECONDS:
+                    if total > 0:
+                        percent = int((downloaded / total) * 100)
+                    else:
+                        percent = 0
+
+                    elapsed_time = current_time - start_time
+                    speed = (downloaded / elapsed_time) if elapsed_time > 0 else 0
+
+                    self.log_signal.emit(f'[EXTRACTING] {url}: {extracted_files} files ({percent}%/{format_size(total)}), {format_size(speed)}/s')
+                    last_update_time = current_time
+        finally:
+            extraction.close()
+            r.close()
+            if tee is not None:
+                tee.close()
+
+        self.log_signal.emit(f'[EXTRACTED] TAR finished extracting to {extract_to_path}')
+        return True
+
+
+    def copy_tree_to(self, src_dir, dst_dir, progress_range: tuple | None = None):
+        self.log_signal.emit(f'[COPYING] {src_dir} -> {dst_dir}')
+        start_time = time.time()
+        last_update_time = time.time()
+        copied = total = 0
+
+        copying = iter_copy_tree(src_dir, dst_dir)
+
+        try:
+            for copied, total in copying:
+                if self._is_cancelled:
+                    self.log_signal.emit('[COPYING] Copy cancelled by user.')
+                    self.cancelled.emit()
+                    self.finished_signal.emit(False)
+                    return False
+
+                current_time = time.time()
+                if current_time - last_update_time >= LOG_THROTTLE_SECONDS:
+                    percent = int((copied / total) * 100) if total > 0 else 0
+                    elapsed_time = current_time - start_time
+                    speed = (copied / elapsed_time) if elapsed_time > 0 else 0
+
+                    self.log_signal.emit(f'[COPYING] {src_dir}: {format_size(copied)}/{format_size(total)} ({percent}%), {format_size(speed)}/s')
+                    if progress_range is not None:
+                        range_start, range_end = progress_range
+                        self.progress_signal.emit(range_start + (range_end - range_start) * percent // 100)
+                    last_update_time = current_time
+        finally:
+            copying.close()
+
+        self.log_signal.emit(f'[COPIED] {format_size(total)} to {dst_dir} in {time.time() - start_time:.2f}s')
+        return True
+
+    def apply_registry(self, transaction: RegistryTransaction):
+        if transaction.is_empty():
+            return 0
+
+        if apply_transaction_offline(self.get_prefix_dir(), transaction):
+            self.log_signal.emit(f'[REGISTRY] Wrote {len(transaction.keys)} keys straight into the hive files')
+            transaction.clear()
+            return 0
+
+        with tempfile.NamedTemporaryFile(suffix='.reg', delete=False) as reg_file:
+            pass
+        transaction.write(reg_file.name)
+
+        self.log_signal.emit(f'[REGISTRY] Applying {len(transaction.keys)} keys in one go')
+
+        try:
+            return_code = self.run_command(['wine', 'regedit', reg_file.name], in_prefix=True)
+        finally:
+            os.remove(reg_file.name)
+
+        transaction.clear()
+        return return_code
+
+    def _log_process_line(self, stream_name: str, line: bytes):
+        line = line.decode('utf-8', errors='replace').strip()
+        if line:
+            self._pending_lines.append(f'[{stream_name}] {line}')
+
+    def _flush_process_lines(self, force: bool = False):
+        # Child output goes out as one signal per frame instead of one per line.
+        # Returns True while lines are still waiting for the next frame
+        if not self._pending_lines:
+            return False
+
+        current_time = time.time()
+        if force or current_time - self._last_batch_time >= LOG_BATCH_SECONDS:
+            self.log_batch_signal.emit(self._pending_lines)
+            self._pending_lines = []
+            self._last_batch_time = current_time
+            return False
+
+        return True
+
+    def get_command_env(self, in_prefix: bool) -> dict:
         env = os.environ.copy()
         if in_prefix:
-            env['WINEPREFIX'] = get_wineprefix_dir()
+            env['WINEPREFIX'] = self.get_prefix_dir()
             env['PATH'] = get_wine_bin_path_env(env.get('PATH', os.defpath))
-        
+        return env
+
+    def run_command(self, command: list, cwd: str = None, in_prefix: bool = False):
+        self.log_signal.emit(f'[COMMAND] Running command: {" ".join(command)}')
+
+        env = self.get_command_env(in_prefix)
+
+        supervisor = ProcessSupervisor()
+
         try:
-            process = subprocess.Popen(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                cwd=cwd,
-                env=env
-            )
+            process = supervisor.spawn(command, self._log_process_line, cwd=cwd, env=env)
         except FileNotFoundError:
+            supervisor.close()
             self.log_signal.emit(f'[ERROR] Command not found: {command[0]}')
             self.finished_signal.emit(False)
             return
 
-        self._set_non_blocking(process.stdout)
-        self._set_non_blocking(process.stderr)
+        self._supervisor = supervisor
 
-        stdout_buffer = b''
-        stderr_buffer = b''
-        
-        pipes = {
-            process.stdout.fileno(): ('STDOUT', stdout_buffer),
-            process.stderr.fileno(): ('STDERR', stderr_buffer)
-        }
-        
-        last_log_time = time.time()
+        try:
+            stopped = not supervisor.run(lambda: self._is_cancelled, self._flush_process_lines, LOG_BATCH_SECONDS)
+            self._flush_process_lines(force=True)
 
-        while process.poll() is None or pipes:
-            if self._is_cancelled:
+            if stopped:
                 self.log_signal.emit('[COMMAND] Process cancelled by user. Terminating...')
-                process.terminate()
-                try:
-                    process.wait(timeout=5)
-                except subprocess.TimeoutExpired:
+                if supervisor.terminate_all():
                     self.log_signal.emit('[COMMAND] Process did not terminate, killing...')
-                    process.kill()
                 self.cancelled.emit()
                 self.finished_signal.emit(False)
                 return
+        finally:
+            self._supervisor = None
+            supervisor.close()
 
-            if pipes:
-                rlist, _, _ = select.select(pipes.keys(), [], [], 0.1) 
-            else:
-                rlist = []
-
-            current_time = time.time()
-            if rlist or current_time - last_log_time >= LOG_THROTTLE_SECONDS:
-                for fd in rlist:
-                    stream_name, current_buffer_ref = pipes[fd]
-                    pipe = process.stdout if stream_name == 'STDOUT' else process.stderr
-                    
-                    try:
-                        chunk = pipe.read(1024)
-                    except BlockingIOError:
-                        chunk = b''
-                    
-                    if chunk:
-                        current_buffer = current_buffer_ref + chunk
-                        
-                        if stream_name == 'STDOUT':
-                            stdout_buffer = current_buffer
-                            pipes[fd] = (stream_name, stdout_buffer)
-                        else:
-                            stderr_buffer = current_buffer
-                            pipes[fd] = (stream_name, stderr_buffer)
-
-                    if not chunk and process.poll() is not None:
-                        del pipes[fd]
-                        break
-                
-                if current_time - last_log_time >= LOG_THROTTLE_SECONDS:
-                    if process.stdout.fileno() in pipes:
-                        stream_name, current_buffer = pipes[process.stdout.fileno()]
-                        lines = current_buffer.split(b'\n')
-                        stdout_buffer = lines.pop()
-                        pipes[process.stdout.fileno()] = (stream_name, stdout_buffer)
-                        
-                        for line_bytes in lines:
-                            line = line_bytes.decode('utf-8', errors='replace').strip()
-                            if line:
-                                self.log_signal.emit(f'[STDOUT] {line}')
-                    
-                    if process.stderr.fileno() in pipes:
-                        stream_name, current_buffer = pipes[process.stderr.fileno()]
-                        lines = current_buffer.split(b'\n')
-                        stderr_buffer = lines.pop()
-                        pipes[process.stderr.fileno()] = (stream_name, stderr_buffer)
-                        
-                        for line_bytes in lines:
-                            line = line_bytes.decode('utf-8', errors='replace').strip()
-                            if line:
-                                self.log_signal.emit(f'[STDERR] {line}')
-
-                    last_log_time = current_time
-
-            if process.poll() is not None and not pipes:
-                break
-                
-        def flush_buffer(buffer, stream_name):
-            if buffer.strip():
-                try:
-                    line = buffer.decode('utf-8', errors='replace').strip()
-                    if line:
-                        self.log_signal.emit(f'[{stream_name}] {line}')
-                except UnicodeDecodeError:
-                    pass
-        
-        flush_buffer(stdout_buffer, 'STDOUT')
-        flush_buffer(stderr_buffer, 'STDERR')
+        return_code = process.return_code
 
-        return_code = process.wait()
-        
         if return_code == 0:
             self.log_signal.emit(f'[COMMAND] Command finished successfully. Return code: {return_code}')
         else:
             self.log_signal.emit(f'[COMMAND] Command failed. Return code: {return_code}')
-        
-        return return_code
\ No newline at end of file
+
+        return return_code
+
+    def run_commands_parallel(self, commands: list, cwd: str = None, in_prefix: bool = False,
+                              limit: int = 1, timeout: float | None = None,
+                              progress_range: tuple | None = None) -> dict | None:
+        # Runs (label, command) pairs, at most limit at once. Commands past
+        # timeout seconds are terminated. Returns {label: (return code or
+        # None on timeout or spawn failure, seconds)}, None if cancelled
+        env = self.get_command_env(in_prefix)
+        pending = list(commands)
+        running = {}
+        results = {}
+        supervisor = ProcessSupervisor()
+
+        def on_line(label: str, stream_name: str, line: bytes):
+            line = line.decode('utf-8', errors='replace').strip()
+            if line:
+                self._pending_lines.append(f'[{stream_name}] {label}: {line}')
+
+        def on_exit(label: str, return_code: int):
+            supervised, start_time, timed_out = running.pop(label)
+            elapsed = time.time() - start_time
+            results[label] = (None if timed_out else return_code, elapsed)
+
+            if timed_out:
+                self.log_signal.emit(f'[ERROR] {label} timed out after {elapsed:.1f} s')
+            elif return_code == 0:
+                self.log_signal.emit(f'[COMMAND] {label} finished in {elapsed:.1f} s')
+            else:
+                self.log_signal.emit(f'[ERROR] {label} failed with code {return_code} after {elapsed:.1f} s')
+
+            if progress_range is not None:
+                range_start, range_end = progress_range
+                self.progress_signal.emit(range_start + (range_end - range_start) * len(results) // len(commands))
+            start_next()
+
+        def start_next():
+            while pending and len(running) < max(1, limit):
+                label, command = pending.pop(0)
+                self.log_signal.emit(f'[COMMAND] Running {label}: {" ".join(command)}')
+                try:
+                    supervised = supervisor.spawn(
+                        command,
+                        lambda stream_name, line, l=label: on_line(l, stream_name, line),
+                        lambda return_code, l=label: on_exit(l, return_code),
+                        cwd=cwd, env=env, new_session=True
+                    )
+                except OSError as e:
+                    self.log_signal.emit(f'[ERROR] Could not start {label}: {e}')
+                    results[label] = (None, 0)
+                    continue
+                running[label] = (supervised, time.time(), False)
+
+        def tick():
+            if timeout is not None:
+                for label, (supervised, start_time, timed_out) in list(running.items()):
+                    # An installer that already exited is only waiting to be
+                    # reaped, its return code counts
+                    if timed_out or supervised.process.poll() is not None:
+                        continue
+                    if time.time() - start_time > timeout:
+                        # Takes the installer's own children with it, the
+                        # wineserver runs in a session of its own
+                        supervised.kill()
+                        running[label] = (supervised, start_time, True)
+            # The supervisor wakes up at least once a second while
+            # cancellable, often enough for the timeouts
+            return self._flush_process_lines()
+
+        self._supervisor = supervisor
+        start_time = time.time()
+
+        try:
+            start_next()
+            stopped = not supervisor.run(lambda: self._is_cancelled, tick, LOG_BATCH_SECONDS)
+            self._flush_process_lines(force=True)
+
+            if stopped:
+                self.log_signal.emit('[COMMAND] Cancelled by user. Terminating...')
+                supervisor.terminate_all()
+                self.cancelled.emit()
+                self.finished_signal.emit(False)
+                return None
+        finally:
+            self._supervisor = None
+            supervisor.close()
+
+        busy = sum(elapsed for _, elapsed in results.values())
+        self.log_signal.emit(
+            f'[COMMAND] {len(commands)} commands took {time.time() - start_time:.1f} s '
+            f'with up to {limit} at once, {busy:.1f} s one after another'
+        )
+        return results
@@ -0,0 +1,204 @@
+import os
+import signal
+import selectors
+import subprocess
+from src.config import PROCESS_READ_SIZE, PROCESS_MAX_LINE_LENGTH
+
+
+class LineAssembler:
+    # Splits a byte stream into lines. A line longer than max_length is
+    # handed out in max_length pieces, so a stream without newlines can't
+    # grow the buffer without bound
+
+    def __init__(self, max_length: int = PROCESS_MAX_LINE_LENGTH):
+        self.max_length = max_length
+        self.buffer = bytearray()
+
+    def feed(self, chunk: bytes) -> list:
+        self.buffer += chunk
+        lines = []
+
+        start = 0
+        while True:
+            end = self.buffer.find(b'\n', start)
+            if end == -1:
+                break
+            lines.append(bytes(self.buffer[start:end]))
+            start = end + 1
+
+        while len(self.buffer) - start >= self.max_length:
+            lines.append(bytes(self.buffer[start:start + self.max_length]))
+            start += self.max_length
+
+        del self.buffer[:start]
+        return lines
+
+    def flush(self) -> list:
+        lines = [bytes(self.buffer)] if self.buffer else []
+        self.buffer.clear()
+        return lines
+
+
+class SupervisedProcess:
+    def __init__(self, process: subprocess.Popen, on_line, on_exit, new_session: bool = False):
+        self.process = process
+        self.on_line = on_line
+        self.on_exit = on_exit
+        self.new_session = new_session
+        self.open_streams = 0
+        self.return_code = None
+
+    def send_signal(self, sig: int):
+        # A process spawned in its own session is signalled with its whole
+        # group, e.g. the setup.tmp an Inno Setup launcher started
+        try:
+            if self.new_session:
+                os.killpg(self.process.pid, sig)
+            else:
+                self.process.send_signal(sig)
+        except ProcessLookupError:
+            pass
+
+    def kill(self):
+        self.send_signal(signal.SIGKILL)
+
+
+class ProcessSupervisor:
+    # Supervises any number of child processes from one selectors loop.
+    # on_line(stream_name, line) is called as soon as a line is complete,
+    # on_exit(return_code) once both pipes are closed and the process is reaped
+
+    def __init__(self):
+        self.selector = selectors.DefaultSelector()
+        self.processes = []
+        self._wakeup_read, self._wakeup_write = os.pipe()
+        os.set_blocking(self._wakeup_read, False)
+        os.set_blocking(self._wakeup_write, False)
+        self.selector.register(self._wakeup_read, selectors.EVENT_READ, None)
+
+    def spawn(self, command: list, on_line, on_exit=None, cwd=None, env=None, new_session: bool = False) -> SupervisedProcess:
+        process = subprocess.Popen(
+            command,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=cwd,
+            env=env,
+            start_new_session=new_session
+        )
+
+        supervised = SupervisedProcess(process, on_line, on_exit, new_session)
+        for stream_name, pipe in [('STDOUT', process.stdout), ('STDERR', process.stderr)]:
+            os.set_blocking(pipe.fileno(), False)
+            self.selector.register(pipe, selectors.EVENT_READ, (supervised, stream_name, LineAssembler()))
+            supervised.open_streams += 1
+
+        self.processes.append(supervised)
+        return supervised
+
+    def wakeup(self):
+        # Safe to call from other threads, interrupts a blocking select
+        try:
+            os.write(self._wakeup_write, b'\0')
+        except OSError:
+            pass
+
+    def _read(self, key, drain: bool = False):
+        # drain reads whatever is buffered and closes the stream without
+        # waiting for EOF
+        supervised, stream_name, assembler = key.data
+
+        while True:
+            try:
+                chunk = os.read(key.fd, PROCESS_READ_SIZE)
+            except BlockingIOError:
+                if not drain:
+                    return
+                chunk = b''
+
+            lines = assembler.feed(chunk) if chunk else assembler.flush()
+            for line in lines:
+                supervised.on_line(stream_name, line)
+
+            if not chunk:
+                break
+            if not drain:
+                return
+
+        self.selector.unregister(key.fileobj)
+        key.fileobj.close()
+        supervised.open_streams -= 1
+        if supervised.open_streams == 0:
+            self._reap(supervised)
+
+    def _reap_exited(self):
+        # A child may exit while something it started keeps its pipes open,
+        # e.g. the wineserver the first wine launch spawns. Everything the
+        # child wrote itself is already buffered, so EOF isn't waited for
+        for supervised in list(self.processes):
+            if supervised.process.poll() is None:
+                continue
+
+            for key in list(self.selector.get_map().values()):
+                if key.data is not None and key.data[0] is supervised:
+                    self._read(key, drain=True)
+
+    def _reap(self, supervised: SupervisedProcess):
+        supervised.return_code = supervised.process.wait()
+        self.processes.remove(supervised)
+        if supervised.on_exit is not None:
+            supervised.on_exit(supervised.return_code)
+
+    def run(self, should_stop=None, tick=None, tick_interval: float = 1):
+        # Runs until every process has exited or should_stop() returns True.
+        # While tick() returns True (work pending) it is called again within
+        # tick_interval seconds. Returns False when stopped early
+        while self.processes:
+            if should_stop is not None and should_stop():
+                return False
+
+            # Woken up every second at least, to notice exits without EOF
+            timeout = 1
+            if tick is not None and tick():
+                timeout = tick_interval
+
+            for key, _ in self.selector.select(timeout=timeout):
+                if key.data is None:
+                    try:
+                        os.read(self._wakeup_read, 1024)
+                    except BlockingIOError:
+                        pass
+                    continue
+                self._read(key)
+
+            self._reap_exited()
+
+        if tick is not None:
+            tick()
+        return True
+
+    def terminate_all(self, timeout: float = 5) -> list:
+        # Terminates the remaining processes, killing the ones that don't
+        # exit within timeout. Returns the processes that had to be killed
+        killed = []
+        for supervised in self.processes:
+            supervised.send_signal(signal.SIGTERM)
+
+        for supervised in self.processes:
+            try:
+                supervised.process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                supervised.kill()
+                supervised.process.wait()
+                killed.append(supervised)
+
+        return killed
+
+    def close(self):
+        for key in list(self.selector.get_map().values()):
+            if key.data is not None:
+                key.fileobj.close()
+        self.selector.close()
+        os.close(self._wakeup_read)
+        os.close(self._wakeup_write)
+        self.processes.clear()
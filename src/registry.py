@@ -0,0 +1,189 @@
+import threading
+
+REG_HEADER = 'Windows Registry Editor Version 5.00'
+
+HIVE_ALIASES = {
+    'HKCU': 'HKEY_CURRENT_USER',
+    'HKLM': 'HKEY_LOCAL_MACHINE',
+    'HKCR': 'HKEY_CLASSES_ROOT',
+    'HKU': 'HKEY_USERS',
+    'HKCC': 'HKEY_CURRENT_CONFIG'
+}
+
+DLL_OVERRIDES_KEY = 'HKEY_CURRENT_USER\\Software\\Wine\\DllOverrides'
+
+
+def normalize_key(key: str) -> str:
+    key = key.strip().strip('\\')
+    hive, _, rest = key.partition('\\')
+    hive = HIVE_ALIASES.get(hive.upper(), hive.upper())
+    return f'{hive}\\{rest}' if rest else hive
+
+
+def escape_reg_string(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def unescape_reg_string(value: str) -> str:
+    result = []
+    i = 0
+    while i < len(value):
+        if value[i] == '\\' and i + 1 < len(value):
+            i += 1
+            result.append({'n': '\n', 'r': '\r', '0': '\0'}.get(value[i], value[i]))
+        else:
+            result.append(value[i])
+        i += 1
+    return ''.join(result)
+
+
+def format_reg_value(value) -> str:
+    if value is None:
+        return '-'
+    if isinstance(value, bool):
+        value = int(value)
+    if isinstance(value, int):
+        return f'dword:{value:08x}'
+    return f'"{escape_reg_string(value)}"'
+
+
+def read_reg_text(path) -> str:
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    if data.startswith(b'\xff\xfe') or data.startswith(b'\xfe\xff'):
+        return data.decode('utf-16')
+    return data.decode('utf-8-sig', errors='replace')
+
+
+def split_value_line(line: str) -> tuple:
+    # Returns (name, raw data) of a '"name"=data' or '@=data' line
+    if line.startswith('@'):
+        _, _, data = line.partition('=')
+        return '', data.strip()
+
+    if not line.startswith('"'):
+        raise ValueError(f'Malformed registry value line: {line}')
+
+    i = 1
+    while i < len(line):
+        if line[i] == '\\':
+            i += 2
+            continue
+        if line[i] == '"':
+            break
+        i += 1
+
+    name = unescape_reg_string(line[1:i])
+    _, _, data = line[i + 1:].partition('=')
+    return name, data.strip()
+
+
+def iter_reg_lines(text: str):
+    pending = ''
+    for line in text.splitlines():
+        line = line.strip()
+        if line.endswith('\\') and not line.startswith('['):
+            pending += line[:-1]
+            continue
+        yield pending + line
+        pending = ''
+
+    if pending:
+        yield pending
+
+
+class RegistryTransaction:
+    # Collects registry changes from several installer steps and applies
+    # them as one .reg payload. Later writes to the same value win.
+
+    def __init__(self):
+        self.keys = {}
+        self.deleted_keys = {}
+        self._lock = threading.Lock()
+
+    def _get_key(self, key: str) -> dict:
+        key = normalize_key(key)
+        entry = self.keys.get(key.lower())
+        if entry is None:
+            entry = self.keys[key.lower()] = (key, {})
+        return entry[1]
+
+    def set_raw(self, key: str, name: str, data: str):
+        with self._lock:
+            self._get_key(key)[name] = data
+
+    def set_value(self, key: str, name: str, value):
+        self.set_raw(key, name, format_reg_value(value))
+
+    def set_values(self, key: str, values: dict):
+        for name, value in values.items():
+            self.set_value(key, name, value)
+
+    def set_dll_override(self, dll: str, mode: str = 'native,builtin'):
+        self.set_value(DLL_OVERRIDES_KEY, dll, mode)
+
+    def delete_key(self, key: str):
+        key = normalize_key(key)
+        # Subkeys set earlier go too, writing them would bring the branch back
+        prefix = key.lower() + '\\'
+        with self._lock:
+            for lower_key in [k for k in self.keys if k == key.lower() or k.startswith(prefix)]:
+                del self.keys[lower_key]
+            self.deleted_keys[key.lower()] = key
+
+    def merge_reg_text(self, text: str):
+        current_key = None
+
+        for line in iter_reg_lines(text):
+            if not line or line.startswith(';') or line.startswith('REGEDIT') or line.startswith('Windows Registry Editor'):
+                continue
+
+            if line.startswith('[') and line.endswith(']'):
+                if line.startswith('[-'):
+                    self.delete_key(line[2:-1])
+                    current_key = None
+                else:
+                    current_key = line[1:-1]
+                    with self._lock:
+                        self._get_key(current_key)
+                continue
+
+            if current_key is None:
+                continue
+
+            name, data = split_value_line(line)
+            self.set_raw(current_key, name, data)
+
+    def merge_reg_file(self, path):
+        self.merge_reg_text(read_reg_text(path))
+
+    def is_empty(self) -> bool:
+        return not self.keys and not self.deleted_keys
+
+    def render(self) -> str:
+        lines = [REG_HEADER, '']
+
+        with self._lock:
+            for key in self.deleted_keys.values():
+                lines.append(f'[-{key}]')
+                lines.append('')
+
+            for key, values in self.keys.values():
+                lines.append(f'[{key}]')
+                for name, data in values.items():
+                    lines.append(f'"{escape_reg_string(name)}"={data}' if name else f'@={data}')
+                lines.append('')
+
+        return '\r\n'.join(lines)
+
+    def write(self, path):
+        # regedit reads a version 5.00 file as UTF-16, anything else mangles
+        # non-ASCII values. 'utf-16' writes the little endian BOM it expects
+        with open(path, 'w', encoding='utf-16', newline='') as f:
+            f.write(self.render())
+
+    def clear(self):
+        with self._lock:
+            self.keys.clear()
+            self.deleted_keys.clear()
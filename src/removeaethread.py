@@ -1,5 +1,6 @@
 from src.processthread import ProcessThread
-from src.utils import get_aegnux_installation_dir
+from src.utils import get_aegnux_installation_dir, get_layout, invalidate_layout
+from src.runnerstore import prune_runners
 import shutil
 
 class RemoveAEThread(ProcessThread):
@@ -8,4 +9,7 @@ class RemoveAEThread(ProcessThread):
     
     def run(self):
         shutil.rmtree(get_aegnux_installation_dir(), True)
+        invalidate_layout()
+        # Keeps a runner an install running in another window links meanwhile
+        prune_runners(set(), [get_layout().root.joinpath('runner')])
         self.finished_signal.emit(True)
\ No newline at end of file
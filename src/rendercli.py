@@ -0,0 +1,177 @@
+import sys
+import time
+import argparse
+from src.config import RENDER_CONCURRENCY, RENDER_MAX_RETRIES
+from src.types import RenderStatus
+from src.renderqueue import (
+    RenderJob, RenderQueue, RenderQueueRunner,
+    make_chunk_jobs, get_chunk_size, get_group_report, format_group_report
+)
+from src.instances import is_valid_instance_name, instance_exists
+
+
+def print_event(event: str, job: RenderJob, queue: RenderQueue, last_print_times: dict):
+    if event == 'progress':
+        # One line per job and second is plenty on a terminal
+        if time.time() - last_print_times.get(job.id, 0) < 1:
+            return
+        last_print_times[job.id] = time.time()
+        print(f'[RENDER] {job.id} {job.describe()}: frame {job.frame}/{job.total_frames or "?"} ({job.get_percent()}%)')
+    elif event == 'started':
+        print(f'[RENDER] {job.id} {job.describe()}: started, attempt {job.attempts}/{job.max_retries + 1}')
+    elif event == 'retry':
+        print(f'[RENDER] {job.id} {job.describe()}: failed ({job.error}), retrying')
+    elif event == 'done':
+        print(f'[RENDER] {job.id} {job.describe()}: done')
+    elif event == 'failed':
+        print(f'[RENDER] {job.id} {job.describe()}: failed ({job.error})')
+    elif event == 'group_done':
+        print(f'[RENDER] Split render {job.group}: {format_group_report(get_group_report(queue.list(), job.group))}')
+    sys.stdout.flush()
+
+
+def parse_instances(value: str | None) -> list | None:
+    # "base" is the main prefix, e.g. --instances base,render1,render2
+    if not value:
+        return None
+
+    instances = []
+    for name in value.split(','):
+        name = name.strip()
+        if name == 'base':
+            instances.append(None)
+        elif is_valid_instance_name(name) and instance_exists(name):
+            instances.append(name)
+        else:
+            raise ValueError(f'No such instance: {name}')
+    return instances
+
+
+def list_jobs(queue: RenderQueue):
+    jobs = queue.list()
+    groups = []
+    for job in jobs:
+        line = f'{job.id}  {job.status.name:<9} {job.get_percent():3}%  attempts {job.attempts}  {job.describe()}'
+        if job.group:
+            line = f'{job.group}/' + line
+            if job.group not in groups:
+                groups.append(job.group)
+        if job.output:
+            line += f' -> {job.output}'
+        if job.error and job.status != RenderStatus.DONE:
+            line += f'  [{job.error}]'
+        print(line)
+
+    # Chunks still queued or running would show up as gaps
+    for group in groups:
+        if queue.is_group_finished(group):
+            print(f'Split render {group}: {format_group_report(get_group_report(jobs, group))}')
+
+
+def main(argv: list | None = None) -> int:
+    parser = argparse.ArgumentParser(description='aerender render queue')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    add_parser = commands.add_parser('add', help='queue a render job')
+    add_parser.add_argument('project', help='.aep file')
+    add_parser.add_argument('-c', '--comp', help='composition, the project render queue is used if omitted')
+    add_parser.add_argument('-o', '--output', help='output file')
+    add_parser.add_argument('--om', dest='output_module', help='output module template')
+    add_parser.add_argument('--rs', dest='render_settings', help='render settings template')
+    add_parser.add_argument('-s', '--start', type=int, dest='start_frame')
+    add_parser.add_argument('-e', '--end', type=int, dest='end_frame')
+    add_parser.add_argument('--instance', help='named instance to render in')
+    add_parser.add_argument('--retries', type=int, default=RENDER_MAX_RETRIES)
+    add_parser.add_argument('--split', type=int, metavar='WORKERS', help='split -s..-e into chunks for this many workers')
+    add_parser.add_argument('--chunk', type=int, help='frames per chunk of a split render')
+
+    commands.add_parser('list', help='show the queue')
+
+    run_parser = commands.add_parser('run', help='render every queued job')
+    run_parser.add_argument('-j', '--jobs', type=int, default=RENDER_CONCURRENCY, help='concurrent aerender processes')
+    run_parser.add_argument('--instances', help='comma separated instance per worker, base is the main prefix, overrides -j')
+
+    for command, help_text in [
+        ('retry', 'queue a failed or cancelled job or split render again'),
+        ('cancel', 'cancel a queued job or split render'),
+        ('remove', 'remove a job or split render')
+    ]:
+        command_parser = commands.add_parser(command, help=help_text)
+        command_parser.add_argument('id')
+
+    commands.add_parser('clear', help='remove finished, failed and cancelled jobs')
+
+    args = parser.parse_args(argv)
+    queue = RenderQueue()
+
+    if args.command == 'add':
+        job = RenderJob(
+            args.project, args.comp, args.output, args.output_module, args.render_settings,
+            args.start_frame, args.end_frame, args.instance, args.retries
+        )
+        if args.split is None and args.chunk is None:
+            queue.add(job)
+            print(job.id)
+            return 0
+
+        try:
+            chunk_size = args.chunk or get_chunk_size(args.start_frame or 0, args.end_frame or 0, args.split)
+            chunks = make_chunk_jobs(job, chunk_size)
+        except ValueError as e:
+            print(e)
+            return 1
+        queue.add_many(chunks)
+        print(chunks[0].group)
+        return 0
+
+    if args.command == 'list':
+        list_jobs(queue)
+        return 0
+
+    if args.command == 'run':
+        try:
+            instances = parse_instances(args.instances)
+        except ValueError as e:
+            print(e)
+            return 1
+
+        last_print_times = {}
+        finished_groups = set()
+
+        def on_event(event: str, job: RenderJob):
+            if event == 'group_done':
+                finished_groups.add(job.group)
+            print_event(event, job, queue, last_print_times)
+
+        runner = RenderQueueRunner(queue, args.jobs, on_event, instances)
+        try:
+            runner.run()
+        except KeyboardInterrupt:
+            print('[RENDER] Interrupted, running jobs will be queued again on the next run')
+            return 130
+        jobs = queue.list()
+        failed = [job for job in jobs if job.status == RenderStatus.FAILED]
+        gaps = [group for group in finished_groups if get_group_report(jobs, group)['gaps']]
+        return 1 if failed or gaps else 0
+
+    if args.command == 'retry':
+        found = queue.set_status(
+            args.id, RenderStatus.QUEUED, reset_attempts=True,
+            from_statuses={RenderStatus.FAILED, RenderStatus.CANCELLED}
+        )
+    elif args.command == 'cancel':
+        found = queue.set_status(args.id, RenderStatus.CANCELLED, from_statuses={RenderStatus.QUEUED})
+    elif args.command == 'remove':
+        found = queue.remove(args.id)
+    else:
+        print(f'Removed {queue.clear_finished()} jobs')
+        return 0
+
+    if not found:
+        print(f'No matching job: {args.id}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
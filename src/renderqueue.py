@@ -0,0 +1,576 @@
+import os
+import re
+import json
+import time
+import uuid
+import fcntl
+from pathlib import Path
+from contextlib import contextmanager
+from src.config import (
+    AERENDER_EXE, RENDER_CONCURRENCY, RENDER_MAX_RETRIES,
+    RENDER_LOG_TAIL_LINES, RENDER_CHUNKS_PER_WORKER
+)
+from src.types import RenderStatus
+from src.instances import get_instance_prefix_dir
+from src.procsupervisor import ProcessSupervisor
+from src.utils import get_aegnux_installation_dir, get_ae_install_dir, get_wine_bin_path_env
+
+FRAME_PATTERN = re.compile(r'^PROGRESS:\s+[\d:;]+\s+\((\d+)\)')
+DURATION_PATTERN = re.compile(r'^PROGRESS:\s+Duration:\s+([\d:;]+)')
+FRAME_RATE_PATTERN = re.compile(r'^PROGRESS:\s+Frame Rate:\s+([\d.]+)')
+FINISHED_PATTERN = re.compile(r'^PROGRESS:.*Finished composition')
+# Frame number placeholder of an image sequence output, e.g. out_[#####].png
+SEQUENCE_PATTERN = re.compile(r'\[(#+)\]')
+
+# How often a running job's progress is written back to the queue file
+PROGRESS_SAVE_SECONDS = 2
+
+
+def get_render_queue_path() -> Path:
+    # Outside the aegnux dir, a reinstall wipes that and would take the
+    # queued renders with it
+    state_home = os.getenv('XDG_STATE_HOME', os.path.expanduser('~/.local/state'))
+    queue_dir = Path(state_home).joinpath('aegnux')
+    os.makedirs(queue_dir, exist_ok=True)
+
+    queue_path = queue_dir.joinpath('render_queue.json')
+    legacy_path = get_aegnux_installation_dir().joinpath('render_queue.json')
+    if legacy_path.exists() and not queue_path.exists():
+        os.replace(legacy_path, queue_path)
+    return queue_path
+
+
+def timecode_to_frames(timecode: str, frame_rate: float) -> int:
+    # H:MM:SS:FF (or ; for drop frame), a plain number is already frames
+    parts = [int(part) for part in re.split(r'[:;]', timecode)]
+    if len(parts) == 1:
+        return parts[0]
+
+    hours, minutes, seconds, frames = ([0, 0, 0] + parts)[-4:]
+    return int(((hours * 60 + minutes) * 60 + seconds) * round(frame_rate)) + frames
+
+
+def is_process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def get_process_start_time(pid: int) -> int | None:
+    # Clock ticks since boot from /proc/<pid>/stat. The comm field may hold
+    # spaces and parentheses, so the fields are counted from the last ')'
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            stat = f.read()
+    except OSError:
+        return None
+    return int(stat[stat.rfind(')') + 2:].split()[19])
+
+
+def is_owner_alive(pid: int | None, start_time: int | None) -> bool:
+    # A recycled pid belongs to a process that started at another time
+    if not pid or not is_process_alive(pid):
+        return False
+    return start_time is None or get_process_start_time(pid) in (None, start_time)
+
+
+class RenderJob:
+    def __init__(self, project: str, comp: str | None = None, output: str | None = None,
+                 output_module: str | None = None, render_settings: str | None = None,
+                 start_frame: int | None = None, end_frame: int | None = None,
+                 instance: str | None = None, max_retries: int = RENDER_MAX_RETRIES):
+        self.id = uuid.uuid4().hex[:8]
+        self.project = os.path.abspath(project)
+        self.comp = comp
+        self.output = os.path.abspath(output) if output else None
+        self.output_module = output_module
+        self.render_settings = render_settings
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        self.instance = instance
+        self.max_retries = max_retries
+        # Chunks of one split render share a group id
+        self.group = None
+
+        self.status = RenderStatus.QUEUED
+        self.attempts = 0
+        self.frame = 0
+        self.total_frames = 0
+        self.error = None
+        self.owner_pid = None
+        self.owner_start_time = None
+        self.worker = None
+        self.log_tail = []
+        self.created = time.time()
+        self.updated = self.created
+        self.started = None
+        self.finished = None
+
+    def to_dict(self) -> dict:
+        data = dict(self.__dict__)
+        data['status'] = self.status.name
+        return data
+
+    @staticmethod
+    def from_dict(data: dict):
+        # The queue file is shared with other processes, only the fields a
+        # job has are taken from it
+        job = RenderJob(data['project'])
+        for name in JOB_FIELDS:
+            if name in data and name != 'status':
+                setattr(job, name, data[name])
+        job.status = RenderStatus[data['status']]
+        return job
+
+    def get_percent(self) -> int:
+        if self.total_frames <= 0:
+            return 100 if self.status == RenderStatus.DONE else 0
+        return min(100, self.frame * 100 // self.total_frames)
+
+    def describe(self) -> str:
+        target = f'{os.path.basename(self.project)}'
+        if self.comp:
+            target += f' / {self.comp}'
+        if self.group and self.start_frame is not None:
+            target += f' [{self.start_frame}-{self.end_frame}]'
+        return target
+
+    def build_args(self) -> list:
+        args = ['-project', 'Z:' + self.project]
+
+        if self.comp:
+            args += ['-comp', self.comp]
+        if self.output:
+            args += ['-output', 'Z:' + self.output]
+        if self.output_module:
+            args += ['-OMtemplate', self.output_module]
+        if self.render_settings:
+            args += ['-RStemplate', self.render_settings]
+        if self.start_frame is not None:
+            args += ['-s', str(self.start_frame)]
+        if self.end_frame is not None:
+            args += ['-e', str(self.end_frame)]
+
+        return args
+
+
+JOB_FIELDS = frozenset(RenderJob('').__dict__)
+
+
+def is_sequence_output(output: str | None) -> bool:
+    return output is not None and SEQUENCE_PATTERN.search(output) is not None
+
+
+def get_sequence_frame_path(output: str, frame: int) -> str:
+    return SEQUENCE_PATTERN.sub(lambda match: str(frame).zfill(len(match.group(1))), output, count=1)
+
+
+def split_frame_range(start_frame: int, end_frame: int, chunk_size: int) -> list:
+    chunk_size = max(1, chunk_size)
+    return [
+        (chunk_start, min(chunk_start + chunk_size - 1, end_frame))
+        for chunk_start in range(start_frame, end_frame + 1, chunk_size)
+    ]
+
+
+def get_chunk_size(start_frame: int, end_frame: int, workers: int) -> int:
+    frames = end_frame - start_frame + 1
+    return max(1, -(-frames // (max(1, workers) * RENDER_CHUNKS_PER_WORKER)))
+
+
+def make_chunk_jobs(job: RenderJob, chunk_size: int) -> list:
+    # Every chunk renders the same comp into the same sequence, aerender
+    # numbers the files by comp frame so the chunks never collide
+    if job.start_frame is None or job.end_frame is None or job.end_frame < job.start_frame:
+        raise ValueError('A split render needs a start and an end frame')
+    if not is_sequence_output(job.output):
+        raise ValueError('A split render needs an image sequence output like out_[#####].png')
+
+    group = uuid.uuid4().hex[:8]
+    chunks = []
+    for start_frame, end_frame in split_frame_range(job.start_frame, job.end_frame, chunk_size):
+        chunk = RenderJob.from_dict(job.to_dict())
+        chunk.id = uuid.uuid4().hex[:8]
+        chunk.group = group
+        chunk.start_frame = start_frame
+        chunk.end_frame = end_frame
+        chunks.append(chunk)
+    return chunks
+
+
+def find_sequence_gaps(output: str, start_frame: int, end_frame: int) -> list:
+    # Frames whose file is missing or empty
+    gaps = []
+    for frame in range(start_frame, end_frame + 1):
+        try:
+            if os.path.getsize(get_sequence_frame_path(output, frame)) > 0:
+                continue
+        except OSError:
+            pass
+        gaps.append(frame)
+    return gaps
+
+
+def format_frame_ranges(frames: list) -> str:
+    ranges = []
+    for frame in frames:
+        if ranges and ranges[-1][1] == frame - 1:
+            ranges[-1][1] = frame
+        else:
+            ranges.append([frame, frame])
+    return ', '.join(str(start) if start == end else f'{start}-{end}' for start, end in ranges)
+
+
+def get_group_report(jobs: list, group: str) -> dict | None:
+    chunks = [job for job in jobs if job.group == group]
+    if not chunks:
+        return None
+
+    start_frame = min(job.start_frame for job in chunks)
+    end_frame = max(job.end_frame for job in chunks)
+    frames = end_frame - start_frame + 1
+
+    timed = [job for job in chunks if job.started is not None and job.finished is not None]
+    seconds = max(job.finished for job in timed) - min(job.started for job in timed) if timed else 0
+    busy_seconds = sum(job.finished - job.started for job in timed)
+    workers = len({job.worker for job in timed}) or 1
+
+    # Utilization is how much of the wall time the workers spent rendering,
+    # the scaling efficiency against one worker comes from bench_render_split
+    return {
+        'group': group,
+        'chunks': len(chunks),
+        'done': sum(job.status == RenderStatus.DONE for job in chunks),
+        'frames': frames,
+        'seconds': seconds,
+        'fps': frames / seconds if seconds > 0 else 0,
+        'workers': workers,
+        'fps_per_worker': frames / busy_seconds if busy_seconds > 0 else 0,
+        'utilization': busy_seconds / (seconds * workers) if seconds > 0 else 0,
+        'gaps': find_sequence_gaps(chunks[0].output, start_frame, end_frame),
+    }
+
+
+def format_group_report(report: dict) -> str:
+    text = (
+        f'{report["frames"]} frames in {report["chunks"]} chunks on {report["workers"]} workers, '
+        f'{report["seconds"]:.1f} s, {report["fps"]:.2f} fps ({report["fps_per_worker"]:.2f} per worker), '
+        f'utilization {report["utilization"] * 100:.0f}%'
+    )
+    if report['gaps']:
+        text += f', missing frames: {format_frame_ranges(report["gaps"])}'
+    return text
+
+
+class AerenderProgress:
+    # Turns aerender's PROGRESS lines into frame numbers
+
+    def __init__(self, job: RenderJob):
+        self.job = job
+        self.frame_rate = 0
+        self.duration = None
+        self.errors = []
+        self.finished = False
+
+        if job.start_frame is not None and job.end_frame is not None:
+            job.total_frames = job.end_frame - job.start_frame + 1
+
+    def feed(self, line: str) -> bool:
+        # Returns True when the frame counter moved. The number in
+        # parentheses counts rendered frames from 1
+        match = FRAME_PATTERN.match(line)
+        if match is not None:
+            self.job.frame = max(self.job.frame, int(match.group(1)))
+            return True
+
+        if 'ERROR' in line and line.startswith('aerender'):
+            self.errors.append(line)
+            return False
+
+        # aerender prints the duration before the frame rate it depends on
+        match = DURATION_PATTERN.match(line)
+        if match is not None:
+            self.duration = match.group(1)
+            self._update_total_frames()
+            return False
+
+        match = FRAME_RATE_PATTERN.match(line)
+        if match is not None:
+            self.frame_rate = float(match.group(1))
+            self._update_total_frames()
+            return False
+
+        if FINISHED_PATTERN.match(line):
+            self.finished = True
+            if self.job.total_frames > 0:
+                self.job.frame = self.job.total_frames
+            return True
+
+        return False
+
+    def _update_total_frames(self):
+        if self.job.total_frames == 0 and self.duration is not None and self.frame_rate > 0:
+            self.job.total_frames = timecode_to_frames(self.duration, self.frame_rate)
+
+
+class RenderQueue:
+    # Jobs persist in a JSON file, every change happens under an flock so
+    # the CLI and the GUI can share one queue
+
+    def __init__(self, path: Path | None = None):
+        self.path = Path(path) if path is not None else get_render_queue_path()
+        self.lock_path = self.path.with_suffix('.lock')
+
+    @contextmanager
+    def _locked_jobs(self):
+        with open(self.lock_path, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                jobs = self._read()
+                yield jobs
+                self._write(jobs)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _read(self) -> list:
+        try:
+            with open(self.path) as f:
+                return [RenderJob.from_dict(data) for data in json.load(f)]
+        except (OSError, ValueError):
+            return []
+
+    def _write(self, jobs: list):
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump([job.to_dict() for job in jobs], f, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def list(self) -> list:
+        with self._locked_jobs() as jobs:
+            return list(jobs)
+
+    def get(self, job_id: str) -> RenderJob | None:
+        return next((job for job in self.list() if job.id.startswith(job_id)), None)
+
+    def add(self, job: RenderJob) -> RenderJob:
+        with self._locked_jobs() as jobs:
+            jobs.append(job)
+        return job
+
+    def add_many(self, new_jobs: list) -> list:
+        with self._locked_jobs() as jobs:
+            jobs.extend(new_jobs)
+        return new_jobs
+
+    def save_job(self, job: RenderJob):
+        job.updated = time.time()
+        with self._locked_jobs() as jobs:
+            for i, existing in enumerate(jobs):
+                if existing.id == job.id:
+                    jobs[i] = job
+                    break
+
+    def claim_next(self) -> RenderJob | None:
+        # Marks the oldest queued job as ours. Jobs left running by a
+        # process that died are queued again first
+        with self._locked_jobs() as jobs:
+            for job in jobs:
+                if job.status == RenderStatus.RUNNING and not is_owner_alive(job.owner_pid, job.owner_start_time):
+                    job.status = RenderStatus.QUEUED
+
+            for job in jobs:
+                if job.status == RenderStatus.QUEUED:
+                    job.status = RenderStatus.RUNNING
+                    job.owner_pid = os.getpid()
+                    job.owner_start_time = get_process_start_time(job.owner_pid)
+                    job.updated = time.time()
+                    return job
+        return None
+
+    def set_status(self, job_id: str, status: RenderStatus, reset_attempts: bool = False,
+                   from_statuses: set | None = None) -> int:
+        # job_id may also be a group id, which covers all of its chunks.
+        # Returns how many jobs changed
+        with self._locked_jobs() as jobs:
+            targets = (
+                [job for job in jobs if (job.group or '').startswith(job_id)]
+                or [job for job in jobs if job.id.startswith(job_id)][:1]
+            )
+            if from_statuses is not None:
+                targets = [job for job in targets if job.status in from_statuses]
+
+            for job in targets:
+                job.status = status
+                job.updated = time.time()
+                if reset_attempts:
+                    job.attempts = 0
+                    job.frame = 0
+                    job.error = None
+        return len(targets)
+
+    def remove(self, job_id: str) -> bool:
+        with self._locked_jobs() as jobs:
+            before = len(jobs)
+            jobs[:] = [
+                job for job in jobs
+                if not job.id.startswith(job_id) and not (job.group or '').startswith(job_id)
+            ]
+            return len(jobs) != before
+
+    def is_group_finished(self, group: str) -> bool:
+        pending = {RenderStatus.QUEUED, RenderStatus.RUNNING}
+        return all(job.status not in pending for job in self.list() if job.group == group)
+
+    def clear_finished(self) -> int:
+        finished = {RenderStatus.DONE, RenderStatus.FAILED, RenderStatus.CANCELLED}
+        with self._locked_jobs() as jobs:
+            before = len(jobs)
+            jobs[:] = [job for job in jobs if job.status not in finished]
+            return before - len(jobs)
+
+
+def get_aerender_command(job: RenderJob) -> list:
+    # AEGNUX_AERENDER replaces wine + aerender.exe, e.g. with a fake aerender for testing
+    stub = os.getenv('AEGNUX_AERENDER')
+    if stub:
+        return [stub] + job.build_args()
+    return ['wine', get_ae_install_dir().joinpath(AERENDER_EXE).as_posix()] + job.build_args()
+
+
+def get_render_env(instance: str | None) -> dict:
+    env = os.environ.copy()
+    env['WINEPREFIX'] = get_instance_prefix_dir(instance).as_posix()
+    env['PATH'] = get_wine_bin_path_env(env.get('PATH', os.defpath))
+    env.setdefault('WINEDEBUG', '-all')
+    return env
+
+
+class RenderQueueRunner:
+    # Runs queued jobs, at most concurrency at a time, from one supervisor
+    # loop. A free worker pulls the next queued job, so chunks of a split
+    # render spread over the workers as they finish. on_event(event, job)
+    # gets 'started', 'progress', 'retry', 'done', 'failed' and
+    # 'group_done' once every chunk of a split render has finished.
+    # With instances, worker N renders in instances[N] (None is the base
+    # prefix) unless the job names its own instance
+
+    def __init__(self, queue: RenderQueue, concurrency: int = RENDER_CONCURRENCY, on_event=None,
+                 instances: list | None = None):
+        self.queue = queue
+        self.instances = list(instances) if instances else [None] * max(1, concurrency)
+        self.concurrency = len(self.instances)
+        self.on_event = on_event if on_event is not None else (lambda event, job: None)
+        self.supervisor = None
+        self.running = {}
+        self.free_workers = []
+
+    def _start_next(self):
+        while self.free_workers:
+            job = self.queue.claim_next()
+            if job is None:
+                return
+
+            worker = self.free_workers.pop(0)
+            instance = job.instance if job.instance is not None else self.instances[worker]
+            job.worker = f'{worker}:{instance or "base"}'
+            job.attempts += 1
+            job.frame = 0
+            job.log_tail = []
+            job.started = time.time()
+            job.finished = None
+            progress = AerenderProgress(job)
+
+            try:
+                self.supervisor.spawn(
+                    get_aerender_command(job),
+                    lambda stream_name, line, p=progress: self._on_line(p, line),
+                    lambda return_code, p=progress, w=worker: self._on_exit(p, w, return_code),
+                    cwd=get_ae_install_dir(),
+                    env=get_render_env(instance)
+                )
+            except OSError as e:
+                self.free_workers.append(worker)
+                job.error = f'Could not start aerender: {e}'
+                job.status = RenderStatus.FAILED
+                self.queue.save_job(job)
+                self.on_event('failed', job)
+                continue
+
+            self.running[job.id] = (progress, time.time())
+            self.queue.save_job(job)
+            self.on_event('started', job)
+
+    def _on_line(self, progress: AerenderProgress, line: bytes):
+        job = progress.job
+        line = line.decode('utf-8', errors='replace').strip()
+        if not line:
+            return
+
+        job.log_tail = (job.log_tail + [line])[-RENDER_LOG_TAIL_LINES:]
+        if not progress.feed(line):
+            return
+
+        self.on_event('progress', job)
+
+        _, last_save_time = self.running[job.id]
+        if time.time() - last_save_time >= PROGRESS_SAVE_SECONDS:
+            self.queue.save_job(job)
+            self.running[job.id] = (progress, time.time())
+
+    def _on_exit(self, progress: AerenderProgress, worker: int, return_code: int):
+        job = progress.job
+        self.running.pop(job.id, None)
+        self.free_workers.append(worker)
+        job.finished = time.time()
+
+        if return_code == 0 and not progress.errors:
+            job.status = RenderStatus.DONE
+            job.error = None
+            if job.total_frames > 0:
+                job.frame = job.total_frames
+            event = 'done'
+        else:
+            job.error = progress.errors[-1] if progress.errors else f'aerender exited with code {return_code}'
+            if job.attempts <= job.max_retries:
+                job.status = RenderStatus.QUEUED
+                event = 'retry'
+            else:
+                job.status = RenderStatus.FAILED
+                event = 'failed'
+
+        self.queue.save_job(job)
+        self.on_event(event, job)
+        if job.group is not None and event != 'retry' and self.queue.is_group_finished(job.group):
+            self.on_event('group_done', job)
+        self._start_next()
+
+    def run(self, should_stop=None) -> bool:
+        # Returns False if should_stop() ended the run, the interrupted
+        # jobs are queued again so a later run picks them up
+        self.supervisor = ProcessSupervisor()
+        self.free_workers = list(range(self.concurrency))
+
+        try:
+            self._start_next()
+            if self.supervisor.run(should_stop):
+                return True
+
+            self.supervisor.terminate_all()
+            for progress, _ in list(self.running.values()):
+                progress.job.status = RenderStatus.QUEUED
+                progress.job.attempts -= 1
+                self.queue.save_job(progress.job)
+            self.running.clear()
+            return False
+        finally:
+            self.supervisor.close()
+            self.supervisor = None
+
+    def wakeup(self):
+        supervisor = self.supervisor
+        if supervisor is not None:
+            supervisor.wakeup()
@@ -0,0 +1,56 @@
+import time
+from src.processthread import ProcessThread
+from src.renderqueue import RenderQueue, RenderQueueRunner, get_group_report, format_group_report
+from src.config import RENDER_CONCURRENCY, LOG_THROTTLE_SECONDS
+from src.types import RenderStatus
+
+
+class RenderQueueThread(ProcessThread):
+    def __init__(self):
+        super().__init__()
+        self.queue = RenderQueue()
+        self.runner = None
+        self._last_progress_time = 0
+
+    def cancel(self):
+        super().cancel()
+        if self.runner is not None:
+            self.runner.wakeup()
+
+    def on_render_event(self, event: str, job):
+        if event == 'progress':
+            current_time = time.time()
+            if current_time - self._last_progress_time < LOG_THROTTLE_SECONDS:
+                return
+            self._last_progress_time = current_time
+            self.log_signal.emit(f'[RENDER] {job.describe()}: frame {job.frame}/{job.total_frames or "?"} ({job.get_percent()}%)')
+            self.progress_signal.emit(job.get_percent())
+        elif event == 'started':
+            self.log_signal.emit(f'[RENDER] {job.describe()}: started, attempt {job.attempts}/{job.max_retries + 1}')
+        elif event == 'retry':
+            self.log_signal.emit(f'[RENDER] {job.describe()}: {job.error}, retrying')
+        elif event == 'done':
+            self.log_signal.emit(f'[RENDER] {job.describe()}: done')
+        elif event == 'failed':
+            self.log_signal.emit(f'[ERROR] Render of {job.describe()} failed: {job.error}')
+        elif event == 'group_done':
+            report = get_group_report(self.queue.list(), job.group)
+            tag = '[ERROR]' if report['gaps'] else '[RENDER]'
+            self.log_signal.emit(f'{tag} Split render {job.group}: {format_group_report(report)}')
+
+    def run(self):
+        self._is_cancelled = False
+        self.runner = RenderQueueRunner(self.queue, RENDER_CONCURRENCY, self.on_render_event)
+
+        try:
+            if not self.runner.run(lambda: self._is_cancelled):
+                self.log_signal.emit('[RENDER] Render queue stopped, unfinished jobs stay queued')
+                self.cancelled.emit()
+                self.finished_signal.emit(False)
+                return
+        finally:
+            self.runner = None
+
+        failed = [job for job in self.queue.list() if job.status == RenderStatus.FAILED]
+        self.log_signal.emit(f'[RENDER] Render queue finished, {len(failed)} failed jobs')
+        self.finished_signal.emit(not failed)
@@ -0,0 +1,33 @@
+from PySide6.QtCore import QThread, Signal
+from src.singleinstance import RequestServer
+
+
+class RequestServerThread(QThread):
+    # Not a ProcessThread: it lives as long as the window and has no
+    # process output or session log of its own
+    request_signal = Signal(list)
+
+    def __init__(self):
+        super().__init__()
+        self._is_cancelled = False
+        self.server = RequestServer(self.request_signal.emit)
+
+    def try_start(self) -> bool:
+        try:
+            if not self.server.acquire():
+                return False
+        except OSError:
+            return False
+
+        self.start()
+        return True
+
+    def cancel(self):
+        self._is_cancelled = True
+        self.server.wakeup()
+
+    def run(self):
+        try:
+            self.server.serve(lambda: self._is_cancelled)
+        finally:
+            self.server.close()
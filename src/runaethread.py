@@ -3,8 +3,8 @@ from src.utils import get_ae_install_dir
 from src.runexethread import RunExeThread
 
 class RunAEThread(RunExeThread):
-    def __init__(self):
-        super().__init__(['AfterFX.exe'])
+    def __init__(self, instance: str | None = None):
+        super().__init__(['AfterFX.exe'], instance)
     
     def add_aep_file_arg(self, aep_file: str):
         self.exe_args.append('Z:' + aep_file)
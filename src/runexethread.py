@@ -2,11 +2,13 @@ from src.processthread import ProcessThread
 from src.utils import get_ae_install_dir
 
 class RunExeThread(ProcessThread):
-    def __init__(self, exe_args: list):
+    def __init__(self, exe_args: list, instance: str | None = None):
         super().__init__()
         self.exe_args = exe_args
+        self.instance = instance
     
     def run(self):
+        self.reset_run_state()
         self.run_command(
             ['wine'] + self.exe_args, 
             cwd=get_ae_install_dir(),
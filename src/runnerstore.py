@@ -0,0 +1,122 @@
+import os
+import fcntl
+import shutil
+from pathlib import Path
+from contextlib import contextmanager
+from src.copyengine import copy_tree
+from src.prefixtemplate import fingerprint_tree
+
+COMPLETE_MARKER = '.aegnux-runner'
+
+
+def get_runner_store_dir() -> Path:
+    # Lives next to the aegnux dir, not inside it, so removing an
+    # installation doesn't take the shared runners with it
+    data_home = os.getenv('XDG_DATA_HOME', os.path.expanduser('~/.local/share'))
+    store_dir = Path(data_home).joinpath('aegnux-runners')
+    os.makedirs(store_dir, exist_ok=True)
+
+    return store_dir
+
+
+def get_runner_version(src_dir) -> str:
+    name = os.path.basename(os.path.normpath(src_dir))
+    return f'{name}-{fingerprint_tree(src_dir)[:16]}'
+
+
+def get_runner_path(version: str) -> Path:
+    return get_runner_store_dir().joinpath(version)
+
+
+def has_runner(version: str) -> bool:
+    return get_runner_path(version).joinpath(COMPLETE_MARKER).exists()
+
+
+@contextmanager
+def _locked_store():
+    with open(get_runner_store_dir().joinpath('.lock'), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def ensure_runner(src_dir, version: str | None = None, link_path=None) -> tuple:
+    # Puts a runner into the store once per version. Files are hardlinked
+    # when the store shares a filesystem with src_dir and copied otherwise.
+    # With link_path the installation is linked under the same lock, so a
+    # prune running meanwhile can't remove the runner before the link exists.
+    # Returns (runner path, True if it had to be added)
+    version = version if version is not None else get_runner_version(src_dir)
+    runner_path = get_runner_path(version)
+
+    with _locked_store():
+        added = not has_runner(version)
+        if added:
+            tmp_path = runner_path.with_name(version + '.tmp')
+            shutil.rmtree(tmp_path, True)
+            copy_tree(src_dir, tmp_path, hardlink=True)
+            tmp_path.joinpath(COMPLETE_MARKER).write_text(version)
+
+            shutil.rmtree(runner_path, True)
+            os.replace(tmp_path, runner_path)
+
+        if link_path is not None:
+            _link_runner(version, link_path)
+
+    return runner_path, added
+
+
+def link_runner(version: str, link_path):
+    # Points an installation's runner dir at a version in the store
+    with _locked_store():
+        _link_runner(version, link_path)
+
+
+def _link_runner(version: str, link_path):
+    link_path = Path(link_path)
+    tmp_link = link_path.with_name(link_path.name + '.tmp')
+
+    if os.path.lexists(tmp_link):
+        os.remove(tmp_link)
+    os.symlink(get_runner_path(version), tmp_link)
+
+    if link_path.is_dir() and not link_path.is_symlink():
+        # Installations from before the store kept a full copy here
+        shutil.rmtree(link_path)
+    os.replace(tmp_link, link_path)
+
+
+def get_linked_runner_version(link_path) -> str | None:
+    if not os.path.islink(link_path):
+        return None
+    return os.path.basename(os.readlink(link_path))
+
+
+def list_runners() -> list:
+    return sorted(path.name for path in get_runner_store_dir().iterdir() if path.joinpath(COMPLETE_MARKER).exists())
+
+
+def remove_runner(version: str):
+    with _locked_store():
+        shutil.rmtree(get_runner_path(version), True)
+
+
+def prune_runners(referenced: set, link_paths: list = ()) -> list:
+    # Removes the runners neither referenced nor linked from link_paths.
+    # The links are read under the store lock, an install linking a runner
+    # right now either finishes first or re-adds the runner afterwards
+    removed = []
+    with _locked_store():
+        keep = set(referenced)
+        for link_path in link_paths:
+            version = get_linked_runner_version(link_path)
+            if version is not None:
+                keep.add(version)
+
+        for version in list_runners():
+            if version not in keep:
+                shutil.rmtree(get_runner_path(version), True)
+                removed.append(version)
+    return removed
@@ -0,0 +1,262 @@
+import os
+import re
+import json
+import time
+import zlib
+import fcntl
+import threading
+from datetime import datetime
+from pathlib import Path
+from src.config import (
+    SESSION_LOG_BLOCK_SIZE, SESSION_LOG_FLUSH_SECONDS, SESSION_LOG_MAX_FILE_SIZE,
+    SESSION_LOG_MAX_AGE_DAYS, SESSION_LOG_MAX_TOTAL_SIZE
+)
+from src.logbuffer import get_line_tag
+
+LOG_SUFFIX = '.log.gz'
+INDEX_SUFFIX = '.idx'
+
+
+def get_session_logs_dir() -> Path:
+    state_home = os.getenv('XDG_STATE_HOME', os.path.expanduser('~/.local/state'))
+    logs_dir = Path(state_home).joinpath('aegnux', 'logs')
+    os.makedirs(logs_dir, exist_ok=True)
+
+    return logs_dir
+
+
+def compress_block(data: bytes) -> bytes:
+    # Every block is a complete gzip member, so zcat still reads the whole file
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def decompress_block(data: bytes) -> bytes:
+    return zlib.decompress(data, 16 + zlib.MAX_WBITS)
+
+
+def format_log_time(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp).isoformat(sep=' ', timespec='milliseconds')
+
+
+def list_log_files(logs_dir: Path | None = None) -> list:
+    logs_dir = logs_dir if logs_dir is not None else get_session_logs_dir()
+    return sorted(logs_dir.glob('*' + LOG_SUFFIX))
+
+
+def get_index_path(log_path: Path) -> Path:
+    return log_path.with_name(log_path.name[:-len(LOG_SUFFIX)] + INDEX_SUFFIX)
+
+
+def remove_log_file(log_path: Path):
+    for path in [log_path, get_index_path(log_path)]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def is_log_file_open(log_path: Path) -> bool:
+    # Every SessionLog keeps a shared flock on the part it writes
+    try:
+        with open(log_path, 'rb') as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return True
+    except FileNotFoundError:
+        pass
+    return False
+
+
+def rotate_logs(logs_dir: Path | None = None):
+    # Drops parts older than SESSION_LOG_MAX_AGE_DAYS, then the oldest
+    # parts until everything fits into SESSION_LOG_MAX_TOTAL_SIZE. Parts
+    # still being written, by this process or another, are left alone
+    log_files = []
+    for path in list_log_files(logs_dir):
+        try:
+            log_files.append((path, path.stat()))
+        except FileNotFoundError:
+            pass
+    log_files.sort(key=lambda entry: entry[1].st_mtime)
+
+    min_mtime = time.time() - SESSION_LOG_MAX_AGE_DAYS * 24 * 3600
+    total_size = sum(stat.st_size for _, stat in log_files)
+
+    for path, stat in log_files:
+        if stat.st_mtime >= min_mtime and total_size <= SESSION_LOG_MAX_TOTAL_SIZE:
+            break
+        if is_log_file_open(path):
+            continue
+        remove_log_file(path)
+        total_size -= stat.st_size
+
+
+class SessionLog:
+    # Writes one session as gzip blocks. Next to every part lives an index
+    # with one JSON line per block: offset, size, time range, tags and
+    # line count. Searching only inflates the blocks the index lets through
+
+    def __init__(self, name: str, logs_dir: Path | None = None):
+        self.logs_dir = logs_dir if logs_dir is not None else get_session_logs_dir()
+        self.session_id = f'{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}-{name}'
+        self.part = 0
+
+        self.lines = []
+        self.size = 0
+        self.tags = set()
+        self.first_time = None
+        self.last_time = None
+        self.last_flush_time = time.time()
+
+        self._lock = threading.Lock()
+        self._open_part()
+
+    def _open_part(self):
+        self.log_path = self.logs_dir.joinpath(f'{self.session_id}.{self.part}{LOG_SUFFIX}')
+        self.log_file = open(self.log_path, 'ab')
+        fcntl.flock(self.log_file, fcntl.LOCK_SH)
+        self.index_file = open(get_index_path(self.log_path), 'a')
+
+    def write(self, line: str):
+        self.write_lines([line])
+
+    def write_lines(self, lines: list):
+        with self._lock:
+            if self.log_file is None:
+                return
+
+            current_time = time.time()
+            for line in lines:
+                self.lines.append(f'{format_log_time(current_time)} {line}')
+                self.size += len(line) + 24
+                self.tags.add(get_line_tag(line))
+
+            if self.first_time is None:
+                self.first_time = current_time
+            self.last_time = current_time
+
+            if self.size >= SESSION_LOG_BLOCK_SIZE or current_time - self.last_flush_time >= SESSION_LOG_FLUSH_SECONDS:
+                self._write_block()
+
+    def _write_block(self):
+        self.last_flush_time = time.time()
+        if not self.lines:
+            return
+
+        block = compress_block(('\n'.join(self.lines) + '\n').encode('utf-8', errors='replace'))
+        offset = self.log_file.tell()
+        self.log_file.write(block)
+        self.log_file.flush()
+
+        entry = {
+            'offset': offset,
+            'size': len(block),
+            'first_time': self.first_time,
+            'last_time': self.last_time,
+            'lines': len(self.lines),
+            'tags': sorted(self.tags)
+        }
+        self.index_file.write(json.dumps(entry) + '\n')
+        self.index_file.flush()
+
+        self.lines = []
+        self.size = 0
+        self.tags = set()
+        self.first_time = None
+
+        if offset + len(block) >= SESSION_LOG_MAX_FILE_SIZE:
+            self.log_file.close()
+            self.index_file.close()
+            self.part += 1
+            self._open_part()
+
+    def flush(self):
+        with self._lock:
+            if self.log_file is not None:
+                self._write_block()
+
+    def close(self):
+        with self._lock:
+            if self.log_file is None:
+                return
+
+            self._write_block()
+            self.log_file.close()
+            self.index_file.close()
+            self.log_file = None
+
+            if self.log_path.stat().st_size == 0:
+                remove_log_file(self.log_path)
+
+
+def read_index(log_path: Path) -> list:
+    index_path = get_index_path(log_path)
+    if not index_path.exists():
+        return []
+
+    entries = []
+    with open(index_path) as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                # A crash can leave a half written last line
+                break
+    return entries
+
+
+def is_line_in_range(line: str, since: float | None, until: float | None) -> bool:
+    try:
+        line_time = datetime.fromisoformat(line[:23]).timestamp()
+    except ValueError:
+        return True
+    return (since is None or line_time >= since) and (until is None or line_time <= until)
+
+
+def iter_matching_lines(log_path: Path, pattern: re.Pattern | None = None, tags: set | None = None,
+                        since: float | None = None, until: float | None = None):
+    with open(log_path, 'rb') as f:
+        for entry in read_index(log_path):
+            if since is not None and entry['last_time'] < since:
+                continue
+            if until is not None and entry['first_time'] > until:
+                continue
+            if tags and not tags.intersection(entry['tags']):
+                continue
+
+            f.seek(entry['offset'])
+            data = decompress_block(f.read(entry['size'])).decode('utf-8', errors='replace')
+
+            # Only blocks reaching past the range need a look at every line
+            check_time = (
+                (since is not None and entry['first_time'] < since)
+                or (until is not None and entry['last_time'] > until)
+            )
+
+            for line in data.splitlines():
+                # '<date> <time> [TAG] message'
+                if check_time and not is_line_in_range(line, since, until):
+                    continue
+                message = line[24:]
+                if tags and get_line_tag(message) not in tags:
+                    continue
+                if pattern is not None and not pattern.search(message):
+                    continue
+                yield line
+
+
+def search_sessions(pattern: str | None = None, tags: set | None = None, since: float | None = None,
+                    until: float | None = None, session: str | None = None, logs_dir: Path | None = None):
+    # Yields (log file, line) over every stored session, oldest first
+    regex = re.compile(pattern) if pattern else None
+
+    for log_path in list_log_files(logs_dir):
+        if session is not None and session not in log_path.name:
+            continue
+        if since is not None and log_path.stat().st_mtime < since:
+            continue
+
+        for line in iter_matching_lines(log_path, regex, tags, since, until):
+            yield log_path, line
@@ -0,0 +1,168 @@
+import os
+import json
+import time
+import fcntl
+import socket
+import selectors
+from pathlib import Path
+from src.config import IPC_TIMEOUT, IPC_BACKLOG, IPC_MAX_REQUEST_SIZE
+
+
+def get_socket_path() -> Path:
+    runtime_dir = os.getenv('XDG_RUNTIME_DIR') or f'/tmp/aegnux-{os.getuid()}'
+    socket_dir = Path(runtime_dir).joinpath('aegnux')
+    os.makedirs(socket_dir, mode=0o700, exist_ok=True)
+
+    return socket_dir.joinpath('aegnux.sock')
+
+
+def normalize_args(args: list, cwd: str | None = None) -> list:
+    # The server runs somewhere else, relative project paths have to be
+    # resolved by the sender
+    cwd = cwd or os.getcwd()
+    return [
+        os.path.join(cwd, arg) if '.aep' in arg and not os.path.isabs(arg) and '://' not in arg else arg
+        for arg in args
+    ]
+
+
+def connect_socket(sock: socket.socket, path: Path, deadline: float):
+    # A full backlog makes connect fail with EAGAIN instead of waiting,
+    # which a burst of launches easily runs into
+    while True:
+        try:
+            sock.connect(str(path))
+            return
+        except BlockingIOError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.005)
+
+
+def send_request(args: list, path: Path | None = None, timeout: float = IPC_TIMEOUT) -> bool:
+    # True once a running Aegnux accepted the arguments. False when no one
+    # serves, including a socket left behind by a crashed process
+    path = path if path is not None else get_socket_path()
+    if not os.path.exists(path):
+        return False
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            connect_socket(sock, path, time.monotonic() + timeout)
+            sock.sendall(json.dumps({'args': normalize_args(args)}).encode('utf-8') + b'\n')
+            with sock.makefile('rb') as reply:
+                return reply.readline().strip() == b'ok'
+    except OSError:
+        return False
+
+
+class RequestServer:
+    # Serves the socket for the first Aegnux of a user. Whoever holds the
+    # flock on the lock file serves, so two processes never fight over the
+    # socket and a stale one can be replaced safely.
+    # on_request(args) is called from the thread running serve()
+
+    def __init__(self, on_request, path: Path | None = None):
+        self.path = Path(path) if path is not None else get_socket_path()
+        self.on_request = on_request
+        self._lock_file = None
+        self._socket = None
+        self._selector = None
+        self._wakeup_read, self._wakeup_write = os.pipe()
+        os.set_blocking(self._wakeup_read, False)
+        os.set_blocking(self._wakeup_write, False)
+
+    def acquire(self) -> bool:
+        lock_file = open(self.path.with_suffix('.lock'), 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(str(self.path))
+        sock.listen(IPC_BACKLOG)
+        sock.setblocking(False)
+
+        self._lock_file = lock_file
+        self._socket = sock
+        return True
+
+    def _read_request(self, conn: socket.socket) -> list | None:
+        conn.settimeout(IPC_TIMEOUT)
+        data = b''
+        while not data.endswith(b'\n') and len(data) < IPC_MAX_REQUEST_SIZE:
+            chunk = conn.recv(4096)
+            if not chunk:
+                break
+            data += chunk
+
+        try:
+            args = json.loads(data.decode('utf-8'))['args']
+        except (ValueError, KeyError, TypeError):
+            return None
+        return [str(arg) for arg in args] if isinstance(args, list) else None
+
+    def _handle_connection(self, conn: socket.socket):
+        with conn:
+            try:
+                args = self._read_request(conn)
+                if args is None:
+                    conn.sendall(b'error\n')
+                    return
+                self.on_request(args)
+                conn.sendall(b'ok\n')
+            except OSError:
+                pass
+
+    def serve(self, should_stop=None):
+        # Answers requests one at a time until should_stop() or close()
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._socket, selectors.EVENT_READ, 'accept')
+        self._selector.register(self._wakeup_read, selectors.EVENT_READ, 'wakeup')
+
+        try:
+            while self._socket is not None and not (should_stop is not None and should_stop()):
+                for key, _ in self._selector.select():
+                    if key.data == 'wakeup':
+                        while True:
+                            try:
+                                if not os.read(self._wakeup_read, 512):
+                                    break
+                            except BlockingIOError:
+                                break
+                        continue
+
+                    # Accept everything queued up, a burst of launches
+                    # lands here at once
+                    while True:
+                        try:
+                            conn, _ = self._socket.accept()
+                        except (BlockingIOError, InterruptedError):
+                            break
+                        self._handle_connection(conn)
+        finally:
+            self._selector.close()
+            self._selector = None
+
+    def wakeup(self):
+        try:
+            os.write(self._wakeup_write, b'\0')
+        except (BlockingIOError, OSError):
+            pass
+
+    def close(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
@@ -0,0 +1,93 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from src.types import Resource
+from src.config import STEP_GRAPH_WORKERS, STEP_RESOURCE_LIMITS
+
+
+class Step:
+    def __init__(self, name: str, func, deps: list, resource: Resource, weight: int):
+        self.name = name
+        self.func = func
+        self.deps = deps
+        self.resource = resource
+        self.weight = weight
+
+
+class StepGraph:
+    # Runs declared steps as soon as their dependencies are done. Each
+    # resource class has its own concurrency limit, e.g. only one step may
+    # talk to the wineserver at a time. A step returning False stops the graph.
+
+    def __init__(self, max_workers: int = STEP_GRAPH_WORKERS, resource_limits: dict = STEP_RESOURCE_LIMITS):
+        self.max_workers = max_workers
+        self.resource_limits = resource_limits
+        self.steps = {}
+
+    def add(self, name: str, func, deps: list = (), resource: Resource = Resource.CPU, weight: int = 1):
+        for dep in deps:
+            if dep not in self.steps:
+                raise ValueError(f'Step {name} depends on unknown step {dep}')
+
+        self.steps[name] = Step(name, func, list(deps), resource, weight)
+
+    @property
+    def total_weight(self) -> int:
+        return sum(step.weight for step in self.steps.values())
+
+    def run(self, on_step_done=None, is_cancelled=None) -> bool:
+        done = set()
+        running = {}
+        busy = {resource: 0 for resource in Resource}
+        done_weight = 0
+        stopped = False
+        error = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                if not stopped and is_cancelled is not None and is_cancelled():
+                    stopped = True
+
+                if not stopped:
+                    for step in self.steps.values():
+                        if step.name in done or step in running.values():
+                            continue
+                        if len(running) >= self.max_workers:
+                            break
+                        if busy[step.resource] >= self.resource_limits.get(step.resource, 1):
+                            continue
+                        if not all(dep in done for dep in step.deps):
+                            continue
+
+                        busy[step.resource] += 1
+                        running[executor.submit(step.func)] = step
+
+                if not running:
+                    break
+
+                finished, _ = wait(running, timeout=0.1, return_when=FIRST_COMPLETED)
+
+                for future in finished:
+                    step = running.pop(future)
+                    busy[step.resource] -= 1
+
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        if error is None:
+                            error = e
+                        stopped = True
+                        continue
+
+                    if result is False:
+                        stopped = True
+                        continue
+
+                    done.add(step.name)
+                    done_weight += step.weight
+
+                    if on_step_done is not None:
+                        on_step_done(step.name, done_weight, self.total_weight)
+
+        if error is not None:
+            raise error
+
+        return len(done) == len(self.steps)
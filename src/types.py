@@ -3,4 +3,16 @@ from enum import Enum
 class DownloadMethod(Enum):
     ONLINE = 1
     OFFLINE = 2
-    CANCEL = 3
\ No newline at end of file
+    CANCEL = 3
+
+class Resource(Enum):
+    CPU = 1
+    DISK = 2
+    WINESERVER = 3
+
+class RenderStatus(Enum):
+    QUEUED = 1
+    RUNNING = 2
+    DONE = 3
+    FAILED = 4
+    CANCELLED = 5
@@ -1,9 +1,9 @@
 import math
+import functools
 import os
 import shutil
 import subprocess
 from src.types import DownloadMethod
-from PySide6.QtWidgets import QMessageBox
 from pathlib import Path
 
 def format_size(size_bytes):
@@ -18,7 +18,9 @@ def format_size(size_bytes):
     
     return f"{s} {size_name[i]}"
 
+@functools.cache
 def is_nvidia_present():
+    # The hardware doesn't change while we run, lspci only has to run once
     if shutil.which('nvidia-smi'):
         return True
     
@@ -40,6 +42,9 @@ def is_nvidia_present():
     return False
 
 def show_download_method_dialog(title: str, message: str) -> DownloadMethod:
+    # Qt is imported here so the CLI entry points can use utils without it
+    from PySide6.QtWidgets import QMessageBox
+
     dialog = QMessageBox()
     dialog.setWindowTitle(title)
     dialog.setText(message)
@@ -60,54 +65,92 @@ def show_download_method_dialog(title: str, message: str) -> DownloadMethod:
     
     return DownloadMethod.CANCEL
 
-def get_aegnux_installation_dir():
-    data_home = os.getenv('XDG_DATA_HOME', os.path.expanduser('~/.local/share'))
-    aegnux_dir = Path(data_home).joinpath('aegnux')
-
-    if not os.path.exists(aegnux_dir):
-        os.makedirs(aegnux_dir)
+class Layout:
+    # Resolves the installation's directories once. A directory is created
+    # on first use and then served from memory until invalidate(), which
+    # install and remove call after deleting things. root points it
+    # somewhere else, e.g. at a test tree
+
+    DIRS = {
+        'ae': ('root', 'AE'),
+        'wineprefix': ('root', 'wineprefix'),
+        'cep': ('wineprefix', 'drive_c/Program Files (x86)/Common Files/Adobe/CEP'),
+        'tools': ('root', 'tools'),
+    }
+
+    def __init__(self, root=None):
+        if root is None:
+            data_home = os.getenv('XDG_DATA_HOME', os.path.expanduser('~/.local/share'))
+            root = Path(data_home).joinpath('aegnux')
+        self.root = Path(root)
+        self._dirs = {}
+
+    def invalidate(self):
+        self._dirs = {}
+
+    def get_dir(self, name: str) -> Path:
+        path = self._dirs.get(name)
+        if path is not None:
+            return path
+
+        if name == 'root':
+            path = self.root
+        else:
+            parent, relative = self.DIRS[name]
+            path = self.get_dir(parent).joinpath(relative)
+
+        os.makedirs(path, exist_ok=True)
+        self._dirs[name] = path
+        return path
+
+    def get_runner_dir(self) -> Path:
+        path = self._dirs.get('runner')
+        if path is not None:
+            return path
+
+        # A symlink into the shared runner store once installed. Not created
+        # here, link_runner would have to replace a stray empty directory
+        path = self.get_dir('root').joinpath('runner')
+        self._dirs['runner'] = path
+        return path
+
+_layout = None
+
+def get_layout() -> Layout:
+    global _layout
+    if _layout is None:
+        _layout = Layout()
+    return _layout
+
+def set_layout(layout: Layout | None):
+    # None goes back to the default root on the next get_layout()
+    global _layout
+    _layout = layout
+
+def invalidate_layout():
+    get_layout().invalidate()
 
-    return aegnux_dir
+def get_aegnux_installation_dir():
+    return get_layout().get_dir('root')
 
 def get_ae_install_dir():
-    aegnux_dir = get_aegnux_installation_dir()
-    ae_dir = aegnux_dir.joinpath('AE')
-
-    if not os.path.exists(ae_dir):
-        os.makedirs(ae_dir)
-
-    return ae_dir
+    return get_layout().get_dir('ae')
 
 def get_ae_plugins_dir():
     ae_dir = get_ae_install_dir()
     return ae_dir.joinpath('Plug-ins')
 
 def get_wineprefix_dir():
-    aegnux_dir = get_aegnux_installation_dir()
-    wineprefix_dir = aegnux_dir.joinpath('wineprefix')
-
-    if not os.path.exists(wineprefix_dir):
-        os.makedirs(wineprefix_dir)
-
-    return wineprefix_dir
+    return get_layout().get_dir('wineprefix')
 
 def get_cep_dir():
-    wineprefix_dir = get_wineprefix_dir()
-    cep_dir = wineprefix_dir.joinpath('drive_c/Program Files (x86)/Common Files/Adobe/CEP')
-
-    if not os.path.exists(cep_dir):
-        os.makedirs(cep_dir)
-
-    return cep_dir
+    return get_layout().get_dir('cep')
 
 def get_wine_runner_dir():
-    aegnux_dir = get_aegnux_installation_dir()
-    runner_dir = aegnux_dir.joinpath('runner')
-
-    if not os.path.exists(runner_dir):
-        os.makedirs(runner_dir)
+    return get_layout().get_runner_dir()
 
-    return runner_dir
+def get_aegnux_tools_dir():
+    return get_layout().get_dir('tools')
 
 def get_wine_bin():
     runner_dir = get_wine_runner_dir()
@@ -118,20 +161,20 @@ def get_wineserver_bin():
     return runner_dir.joinpath('bin/wineserver')
 
 def get_winetricks_bin():
-    runner_dir = get_wine_runner_dir()
-    return runner_dir.joinpath('bin/winetricks')
+    tools_dir = get_aegnux_tools_dir()
+    return tools_dir.joinpath('bin/winetricks')
 
 def get_cabextract_bin():
-    runner_dir = get_wine_runner_dir()
-    return runner_dir.joinpath('bin/cabextract')
+    tools_dir = get_aegnux_tools_dir()
+    return tools_dir.joinpath('bin/cabextract')
 
 def get_vcr_dir_path():
-    runner_dir = get_wine_runner_dir()
-    return runner_dir.joinpath('vcr')
+    tools_dir = get_aegnux_tools_dir()
+    return tools_dir.joinpath('vcr')
 
 def get_msxml_dir_path():
-    runner_dir = get_wine_runner_dir()
-    return runner_dir.joinpath('msxml')
+    tools_dir = get_aegnux_tools_dir()
+    return tools_dir.joinpath('msxml')
 
 def get_aegnux_installed_flag_path():
     hades = get_aegnux_installation_dir()
@@ -146,7 +189,7 @@ def mark_aegnux_as_installed():
 
 def get_wine_bin_path_env(old_path: str | None):
     old_path = old_path if old_path is not None else os.getenv('PATH')
-    return f'{get_wine_runner_dir().as_posix()}/bin:{old_path}'
+    return f'{get_wine_runner_dir().as_posix()}/bin:{get_aegnux_tools_dir().as_posix()}/bin:{old_path}'
 
 def get_mhtb_install_dir():
     wineprefix_dir = get_wineprefix_dir()
@@ -214,13 +257,3 @@ def check_aegnux_tip_marked():
 def mark_aegnux_tip_as_shown():
     with open(get_aegnux_tip_marked_flag_path(), 'w') as f:
         f.write('Press ALT+T to open up a terminal')
-
-
-def get_private_plugins_unpack_path():
-    aegnux_dir = get_aegnux_installation_dir()
-    ppu_dir = aegnux_dir.joinpath('private-plugins')
-
-    if not os.path.exists(ppu_dir):
-        os.makedirs(ppu_dir)
-
-    return ppu_dir
\ No newline at end of file
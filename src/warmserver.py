@@ -0,0 +1,89 @@
+import os
+import subprocess
+from pathlib import Path
+from src.config import WARM_WINESERVER_IDLE_TIMEOUT
+from src.utils import get_wineprefix_dir, get_wine_bin_path_env, get_aegnux_installation_dir
+from src.winehive import is_wineserver_running
+
+AUTOSTART_FILE_NAME = 'aegnux-warm.desktop'
+# Next to this checkout, wherever the current directory happens to be
+RUN_SCRIPT_PATH = Path(__file__).resolve().parent.parent.joinpath('run.sh')
+
+
+def get_warm_launch_flag_path():
+    return get_aegnux_installation_dir().joinpath('warm_launch')
+
+
+def check_warm_launch_enabled():
+    return os.path.exists(get_warm_launch_flag_path())
+
+
+def get_autostart_entry_path() -> Path:
+    config_home = os.getenv('XDG_CONFIG_HOME', os.path.expanduser('~/.config'))
+    return Path(config_home).joinpath('autostart', AUTOSTART_FILE_NAME)
+
+
+def set_warm_launch_enabled(enabled: bool):
+    # Warm launch also starts the wineserver at login through an autostart entry
+    autostart_path = get_autostart_entry_path()
+
+    if not enabled:
+        for path in [get_warm_launch_flag_path(), autostart_path]:
+            if os.path.exists(path):
+                os.remove(path)
+        return
+
+    with open(get_warm_launch_flag_path(), 'w') as f:
+        f.write('keep it warm')
+
+    os.makedirs(autostart_path.parent, exist_ok=True)
+    with open(autostart_path, 'w') as f:
+        f.write('[Desktop Entry]\n')
+        f.write('Type=Application\n')
+        f.write('Name=Aegnux warm launch\n')
+        f.write(f'Exec="{RUN_SCRIPT_PATH}" --warm\n')
+        f.write('NoDisplay=true\n')
+        f.write('X-GNOME-Autostart-enabled=true\n')
+
+
+def get_warm_env() -> dict:
+    env = os.environ.copy()
+    env['WINEPREFIX'] = get_wineprefix_dir().as_posix()
+    env['PATH'] = get_wine_bin_path_env(env.get('PATH', os.defpath))
+    env.setdefault('WINEDEBUG', '-all')
+    return env
+
+
+def start_warm_wineserver(idle_timeout: int = WARM_WINESERVER_IDLE_TIMEOUT, prewarm: bool = True) -> bool:
+    # wineserver -pN stays alive N seconds after the last wine process exits,
+    # so AE sessions reuse it and it still goes away on its own when idle.
+    # Returns False if a wineserver already serves the prefix
+    if is_wineserver_running(get_wineprefix_dir()):
+        return False
+
+    env = get_warm_env()
+    subprocess.run(['wineserver', f'-p{idle_timeout}'], env=env)
+
+    if prewarm:
+        # Starts the prefix services and pulls wine's DLLs into the page cache
+        subprocess.Popen(
+            ['wine', 'cmd', '/c', 'exit'],
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+
+    return True
+
+
+def warm_up() -> int:
+    # Entry point for `run.sh --warm`, used by the autostart entry
+    if not check_warm_launch_enabled():
+        return 0
+
+    if start_warm_wineserver():
+        print(f'[WARM] Started a persistent wineserver, idle timeout {WARM_WINESERVER_IDLE_TIMEOUT}s')
+    else:
+        print('[WARM] Wineserver is already running')
+    return 0
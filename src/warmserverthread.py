@@ -0,0 +1,33 @@
+from PySide6.QtCore import QThread, Signal
+from src.warmserver import check_warm_launch_enabled, start_warm_wineserver
+
+
+class WarmServerThread(QThread):
+    # Not a ProcessThread: it runs a short wineserver call or two and has no
+    # output worth a session log. Starting can take a while with a cold
+    # page cache, so it never happens on the GUI thread
+    log_signal = Signal(str)
+
+    def __init__(self):
+        super().__init__()
+        self.requested = False
+        # A request that came in just as run() returned is picked up here
+        self.finished.connect(self._restart_if_requested)
+
+    def request(self):
+        self.requested = True
+        if not self.isRunning():
+            self.start()
+
+    def _restart_if_requested(self):
+        if self.requested:
+            self.start()
+
+    def run(self):
+        # Nothing is cached between requests: the server may have been killed
+        # (KillAE, install steps) or timed out since, start_warm_wineserver
+        # checks whether one is running every time
+        while self.requested:
+            self.requested = False
+            if check_warm_launch_enabled() and start_warm_wineserver():
+                self.log_signal.emit('[WARM] Started a persistent wineserver for faster AE launches')
@@ -0,0 +1,332 @@
+import os
+import time
+import fcntl
+import socket
+import contextlib
+from pathlib import Path
+from src.registry import normalize_key, unescape_reg_string, DLL_OVERRIDES_KEY
+
+# Which hive file holds which registry root, longest prefix first
+HIVE_FILES = [
+    ('HKEY_USERS\\.DEFAULT', 'userdef.reg'),
+    ('HKEY_CURRENT_USER', 'user.reg'),
+    ('HKEY_CLASSES_ROOT', 'system.reg', 'Software\\Classes'),
+    ('HKEY_LOCAL_MACHINE', 'system.reg')
+]
+
+WINE_ESCAPES = {
+    '\a': 'a', '\b': 'b', '\x1b': 'e', '\f': 'f',
+    '\n': 'n', '\r': 'r', '\t': 't', '\v': 'v'
+}
+WINE_UNESCAPES = {v: k for k, v in WINE_ESCAPES.items()}
+
+
+def escape_wine_string(value: str, special: str) -> str:
+    result = []
+    for char in value:
+        if char == '\\' or char in special:
+            result.append('\\' + char)
+        elif char in WINE_ESCAPES:
+            result.append('\\' + WINE_ESCAPES[char])
+        elif ord(char) < 0x20 or ord(char) > 0x7e:
+            result.append(f'\\x{ord(char):04x}')
+        else:
+            result.append(char)
+    return ''.join(result)
+
+
+def unescape_wine_string(value: str) -> str:
+    result = []
+    i = 0
+    while i < len(value):
+        char = value[i]
+        i += 1
+        if char != '\\' or i >= len(value):
+            result.append(char)
+            continue
+
+        char = value[i]
+        i += 1
+        if char == 'x':
+            digits = ''
+            while i < len(value) and len(digits) < 4 and value[i] in '0123456789abcdefABCDEF':
+                digits += value[i]
+                i += 1
+            result.append(chr(int(digits, 16)) if digits else 'x')
+        elif char in '01234567':
+            digits = char
+            while i < len(value) and len(digits) < 3 and value[i] in '01234567':
+                digits += value[i]
+                i += 1
+            result.append(chr(int(digits, 8)))
+        else:
+            result.append(WINE_UNESCAPES.get(char, char))
+    return ''.join(result)
+
+
+def find_closing_quote(line: str, start: int) -> int:
+    i = start
+    while i < len(line):
+        if line[i] == '\\':
+            i += 2
+            continue
+        if line[i] == '"':
+            return i
+        i += 1
+    return -1
+
+
+def to_hive_data(data: str) -> str:
+    # .reg strings may contain raw non-ASCII text, the hive wants \x escapes
+    if data.startswith('"') and data.endswith('"'):
+        return '"' + escape_wine_string(unescape_reg_string(data[1:-1]), '"') + '"'
+    return data
+
+
+class HiveKey:
+    def __init__(self, name: str, timestamp: str):
+        self.name = name
+        self.timestamp = timestamp
+        self.meta = []
+        self.values = {}
+
+    def set_raw(self, name: str, data: str):
+        self.values[name.lower()] = (name, data)
+        self.timestamp = str(int(time.time()))
+
+    def get_raw(self, name: str) -> str | None:
+        entry = self.values.get(name.lower())
+        return entry[1] if entry is not None else None
+
+    def delete_value(self, name: str):
+        if self.values.pop(name.lower(), None) is not None:
+            self.timestamp = str(int(time.time()))
+
+
+class WineHive:
+    # Text hive as written by wineserver. Key options (#time, #class, #link)
+    # and value data we don't interpret are carried over as they are.
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.header = []
+        self.keys = {}
+        self.load()
+
+    def load(self):
+        self.header = []
+        self.keys = {}
+        current = None
+
+        with open(self.path, encoding='utf-8', errors='surrogateescape') as f:
+            lines = f.read().split('\n')
+
+        pending = ''
+        for line in lines:
+            if pending:
+                line = pending + line.lstrip()
+                pending = ''
+
+            if current is not None and line.endswith('\\') and not line.startswith('['):
+                pending = line[:-1]
+                continue
+
+            if line.startswith('['):
+                end = line.rfind(']')
+                name = unescape_wine_string(line[1:end])
+                current = HiveKey(name, line[end + 1:].strip())
+                self.keys[name.lower()] = current
+                continue
+
+            if current is None:
+                self.header.append(line)
+                continue
+
+            if not line:
+                continue
+
+            if line.startswith('#'):
+                current.meta.append(line)
+                continue
+
+            if line.startswith('@='):
+                current.values[''] = ('', line[2:])
+                continue
+
+            if line.startswith('"'):
+                end = find_closing_quote(line, 1)
+                name = unescape_wine_string(line[1:end])
+                current.values[name.lower()] = (name, line[end + 2:])
+
+        while self.header and self.header[-1] == '':
+            self.header.pop()
+
+    def get_key(self, name: str) -> HiveKey | None:
+        return self.keys.get(name.strip('\\').lower())
+
+    def get_or_create_key(self, name: str) -> HiveKey:
+        name = name.strip('\\')
+        key = self.get_key(name)
+        if key is None:
+            key = HiveKey(name, str(int(time.time())))
+            self.keys[name.lower()] = key
+        return key
+
+    def get_raw(self, key: str, name: str) -> str | None:
+        hive_key = self.get_key(key)
+        return hive_key.get_raw(name) if hive_key is not None else None
+
+    def get_string(self, key: str, name: str) -> str | None:
+        data = self.get_raw(key, name)
+        if data is None or not data.startswith('"'):
+            return None
+        return unescape_wine_string(data[1:-1])
+
+    def get_values(self, key: str) -> dict:
+        hive_key = self.get_key(key)
+        if hive_key is None:
+            return {}
+
+        values = {}
+        for name, data in hive_key.values.values():
+            values[name] = unescape_wine_string(data[1:-1]) if data.startswith('"') else data
+        return values
+
+    def set_raw(self, key: str, name: str, data: str):
+        self.get_or_create_key(key).set_raw(name, to_hive_data(data))
+
+    def delete_key(self, key: str):
+        prefix = key.strip('\\').lower()
+        for name in list(self.keys):
+            if name == prefix or name.startswith(prefix + '\\'):
+                del self.keys[name]
+
+    def render(self) -> str:
+        lines = list(self.header) + ['']
+
+        for key in self.keys.values():
+            header = f'[{escape_wine_string(key.name, "[]")}]'
+            lines.append(f'{header} {key.timestamp}' if key.timestamp else header)
+            lines.extend(key.meta)
+            for name, data in key.values.values():
+                if name:
+                    lines.append(f'"{escape_wine_string(name, chr(34))}"={data}')
+                else:
+                    lines.append(f'@={data}')
+            lines.append('')
+
+        return '\n'.join(lines)
+
+    def save(self):
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8', errors='surrogateescape') as f:
+            f.write(self.render())
+        os.replace(tmp_path, self.path)
+
+
+def resolve_hive(key: str) -> tuple:
+    # Maps a full registry path to (hive file name, path relative to the hive)
+    key = normalize_key(key)
+    upper_key = key.upper()
+
+    for entry in HIVE_FILES:
+        root, hive_file = entry[0], entry[1]
+        if upper_key == root.upper() or upper_key.startswith(root.upper() + '\\'):
+            relative = key[len(root) + 1:]
+            if len(entry) > 2:
+                relative = f'{entry[2]}\\{relative}' if relative else entry[2]
+            return hive_file, relative
+
+    raise ValueError(f'Registry root of {key} is not stored in a hive file')
+
+
+def get_wineserver_socket_path(prefix) -> Path:
+    stat = os.stat(prefix)
+    server_dir = f'server-{stat.st_dev:x}-{stat.st_ino:x}'
+    return Path(f'/tmp/.wine-{os.getuid()}').joinpath(server_dir, 'socket')
+
+
+def is_wineserver_running(prefix) -> bool:
+    socket_path = get_wineserver_socket_path(prefix)
+    if not socket_path.exists():
+        return False
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path.as_posix())
+        except OSError:
+            return False
+    return True
+
+
+@contextlib.contextmanager
+def hold_wineserver_lock(prefix):
+    # wineserver holds a write lock on this file for as long as it runs, and
+    # a starting one waits for it. Yields False if a server holds it already
+    server_dir = get_wineserver_socket_path(prefix).parent
+    os.makedirs(server_dir.parent, mode=0o700, exist_ok=True)
+    os.makedirs(server_dir, mode=0o700, exist_ok=True)
+
+    fd = os.open(server_dir.joinpath('lock'), os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        try:
+            fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            yield False
+            return
+        yield True
+    finally:
+        os.close(fd)
+
+
+def has_hives(prefix) -> bool:
+    return all(Path(prefix).joinpath(name).exists() for name in ['user.reg', 'system.reg'])
+
+
+def apply_transaction_offline(prefix, transaction) -> bool:
+    # Writes a RegistryTransaction straight into the hive files. Only safe
+    # while no wineserver serves the prefix, it would overwrite our edits,
+    # so the server lock is held from the check until the hives are saved
+    if not has_hives(prefix):
+        return False
+
+    with hold_wineserver_lock(prefix) as locked:
+        if not locked or is_wineserver_running(prefix):
+            return False
+        write_transaction(prefix, transaction)
+    return True
+
+
+def write_transaction(prefix, transaction):
+    hives = {}
+
+    def get_hive(hive_file: str) -> WineHive:
+        if hive_file not in hives:
+            hives[hive_file] = WineHive(Path(prefix).joinpath(hive_file))
+        return hives[hive_file]
+
+    for key in transaction.deleted_keys.values():
+        hive_file, relative = resolve_hive(key)
+        get_hive(hive_file).delete_key(relative)
+
+    for key, values in transaction.keys.values():
+        hive_file, relative = resolve_hive(key)
+        hive = get_hive(hive_file)
+        hive_key = hive.get_or_create_key(relative)
+        for name, data in values.items():
+            if data == '-':
+                hive_key.delete_value(name)
+            else:
+                hive.set_raw(relative, name, data)
+
+    for hive in hives.values():
+        hive.save()
+
+
+def get_dll_overrides(prefix) -> dict:
+    user_hive = Path(prefix).joinpath('user.reg')
+    if not user_hive.exists():
+        return {}
+
+    _, relative = resolve_hive(DLL_OVERRIDES_KEY)
+    return WineHive(user_hive).get_values(relative)
@@ -0,0 +1,44 @@
+import os
+import src.artifactcache as artifactcache
+from src.artifactcache import ArtifactCache, hash_file
+
+
+def make_file(path, data: bytes):
+    path.write_bytes(data)
+    return path
+
+
+def test_lookup_skips_rehash_of_unchanged_object(tmp_path, monkeypatch):
+    cache = ArtifactCache(tmp_path.joinpath('cache'))
+    object_path = cache.store('asset', make_file(tmp_path.joinpath('asset.zip'), b'data'))
+
+    monkeypatch.setattr(artifactcache, 'hash_file', lambda path: 'not-called')
+    assert cache.lookup('asset') == object_path
+
+
+def test_lookup_discards_modified_object(tmp_path):
+    cache = ArtifactCache(tmp_path.joinpath('cache'))
+    object_path = cache.store('asset', make_file(tmp_path.joinpath('asset.zip'), b'data'))
+
+    object_path.write_bytes(b'corrupted')
+    assert cache.lookup('asset') is None
+    assert not object_path.exists()
+
+
+def test_store_leaves_no_temp_files(tmp_path):
+    cache = ArtifactCache(tmp_path.joinpath('cache'))
+    source = make_file(tmp_path.joinpath('asset.zip'), b'data')
+    object_path = cache.store('asset', source, move=True)
+
+    assert not source.exists()
+    assert os.listdir(object_path.parent) == [object_path.name]
+    assert hash_file(object_path) == object_path.name
+
+
+def test_file_digest_does_not_store(tmp_path):
+    cache = ArtifactCache(tmp_path.joinpath('cache'))
+    source = make_file(tmp_path.joinpath('asset.zip'), b'data')
+
+    assert cache.file_digest(source) == hash_file(source)
+    assert cache.lookup('asset.zip') is None
+    assert os.listdir(cache.objects_dir) == []
@@ -0,0 +1,66 @@
+import socket
+import threading
+import pytest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from src.downloader import SegmentedDownload
+
+PAYLOAD = b'x' * 1024
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    head_status = 200
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_payload_headers(self, status: int):
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(PAYLOAD) if status == 200 else 0))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.end_headers()
+
+    def do_HEAD(self):
+        self.send_payload_headers(self.head_status)
+
+    def do_GET(self):
+        self.send_payload_headers(200)
+        self.wfile.write(PAYLOAD)
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def serve(head_status: int) -> str:
+        handler = type('Handler', (RangeHandler,), {'head_status': head_status})
+        server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f'http://127.0.0.1:{server.server_address[1]}/file.bin'
+
+    yield serve
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_probe_detects_range_support(serve, tmp_path):
+    download = SegmentedDownload(serve(200), tmp_path.joinpath('file.bin'))
+    assert download.probe()
+    assert download.total == len(PAYLOAD)
+
+
+@pytest.mark.parametrize('head_status', [403, 405])
+def test_probe_falls_back_when_head_is_rejected(serve, tmp_path, head_status):
+    download = SegmentedDownload(serve(head_status), tmp_path.joinpath('file.bin'))
+    assert not download.probe()
+
+
+def test_probe_falls_back_when_server_is_unreachable(tmp_path):
+    # A port that was just free, nothing listens there
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+
+    download = SegmentedDownload(f'http://127.0.0.1:{port}/file.bin', tmp_path.joinpath('file.bin'))
+    assert not download.probe()
@@ -0,0 +1,51 @@
+import pytest
+from src.utils import Layout, set_layout, get_wineprefix_dir
+from src.instances import (
+    get_instance_dir, get_instance_prefix_dir, instance_exists,
+    list_instances, remove_instance, get_instance_arg
+)
+
+
+@pytest.fixture
+def root(tmp_path):
+    root = tmp_path.joinpath('aegnux')
+    set_layout(Layout(root=root))
+    yield root
+    set_layout(None)
+
+
+def make_instance(name: str):
+    prefix_dir = get_instance_prefix_dir(name)
+    prefix_dir.mkdir(parents=True)
+    prefix_dir.joinpath('system.reg').write_text('WINE REGISTRY Version 2\n')
+
+
+def test_instances_live_under_the_layout_root(root):
+    assert get_wineprefix_dir() == root.joinpath('wineprefix')
+    assert get_instance_prefix_dir(None) == root.joinpath('wineprefix')
+    assert get_instance_prefix_dir('work') == root.joinpath('instances', 'work', 'wineprefix')
+
+
+def test_list_and_remove_instances(root):
+    make_instance('work')
+    make_instance('test')
+    # Without a system.reg it's a leftover, not an instance
+    get_instance_dir('broken').mkdir()
+
+    assert list_instances() == ['test', 'work']
+    assert instance_exists('work')
+    assert not instance_exists('broken')
+
+    remove_instance('work')
+    assert list_instances() == ['test']
+    assert not root.joinpath('instances', 'work').exists()
+
+
+def test_invalid_instance_names(root):
+    for name in ['', '../base', '.hidden', 'a/b']:
+        with pytest.raises(ValueError):
+            get_instance_dir(name)
+
+    assert get_instance_arg(['aegnux', '--instance=work']) == 'work'
+    assert get_instance_arg(['aegnux', '--instance=../base']) is None
+    assert get_instance_arg(['aegnux']) is None
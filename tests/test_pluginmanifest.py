@@ -0,0 +1,73 @@
+import zipfile
+from src.pluginmanifest import PluginManifest, get_archive_entries, get_pack_id
+
+
+def make_pack(path, names: list):
+    with zipfile.ZipFile(path, 'w') as zip_ref:
+        for name in names:
+            zip_ref.writestr(name, f'{path.name}:{name}')
+    return path
+
+
+def install(manifest: PluginManifest, zip_path, routes: list, pack: str):
+    # What PluginThread does, minus wine and the installers
+    entries = get_archive_entries(zip_path)
+    plan = manifest.plan_sync(entries, routes, pack)
+    with zipfile.ZipFile(zip_path) as zip_ref:
+        for info, destination in plan.writes:
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            destination.write_bytes(zip_ref.read(info))
+            manifest.record_file(destination, info, pack)
+    manifest.record_pack(pack, zip_path)
+    return plan
+
+
+def test_pack_ids():
+    assert get_pack_id('Private-Plugins v1.2.zip') == get_pack_id('private_plugins-1.3.zip') == 'private-plugins'
+    assert get_pack_id('/tmp/Plugins_v2.zip') == 'plugins'
+    assert get_pack_id('Plugins-Part1.zip') != get_pack_id('Plugins-Part2.zip')
+    assert get_pack_id('disk1.zip') != get_pack_id('disk2.zip')
+    assert get_pack_id('Plugins v1.2.zip', keep_version=True) == 'plugins-v1.2'
+
+
+def test_sibling_packs_keep_each_others_files(tmp_path):
+    manifest = PluginManifest(tmp_path.joinpath('manifest.json'))
+    routes = [('aex/', tmp_path.joinpath('Plug-ins'))]
+    part1 = make_pack(tmp_path.joinpath('Plugins-Part1.zip'), ['aex/One.aex'])
+    part2 = make_pack(tmp_path.joinpath('Plugins-Part2.zip'), ['aex/Two.aex'])
+
+    install(manifest, part1, routes, get_pack_id(part1))
+    assert manifest.get_replaced_archive(part2) is None
+
+    plan = install(manifest, part2, routes, get_pack_id(part2))
+    assert plan.removals == []
+    assert tmp_path.joinpath('Plug-ins/One.aex').exists()
+
+
+def test_new_version_replaces_the_old_one(tmp_path):
+    manifest = PluginManifest(tmp_path.joinpath('manifest.json'))
+    routes = [('aex/', tmp_path.joinpath('Plug-ins'))]
+    old = make_pack(tmp_path.joinpath('Plugins v1.2.zip'), ['aex/One.aex', 'aex/Old.aex'])
+    new = make_pack(tmp_path.joinpath('Plugins v1.3.zip'), ['aex/One.aex'])
+
+    install(manifest, old, routes, get_pack_id(old))
+    manifest.save()
+    manifest = PluginManifest(manifest.path)
+    assert manifest.get_replaced_archive(new) == 'Plugins v1.2.zip'
+    assert manifest.get_replaced_archive(old) is None
+
+    plan = install(manifest, new, routes, get_pack_id(new))
+    assert plan.removals == [tmp_path.joinpath('Plug-ins/Old.aex')]
+
+
+
+def test_declined_replacement_keeps_the_old_version(tmp_path):
+    manifest = PluginManifest(tmp_path.joinpath('manifest.json'))
+    routes = [('aex/', tmp_path.joinpath('Plug-ins'))]
+    old = make_pack(tmp_path.joinpath('Plugins v1.2.zip'), ['aex/Old.aex'])
+    new = make_pack(tmp_path.joinpath('Plugins v1.3.zip'), ['aex/New.aex'])
+
+    install(manifest, old, routes, get_pack_id(old))
+    plan = install(manifest, new, routes, get_pack_id(new, keep_version=True))
+    assert plan.removals == []
+    assert tmp_path.joinpath('Plug-ins/Old.aex').exists()
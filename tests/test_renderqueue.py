@@ -0,0 +1,119 @@
+import os
+import sys
+import subprocess
+import pytest
+from conftest import ROOT_DIR
+from src.types import RenderStatus
+from src.utils import Layout, set_layout
+from src.renderqueue import RenderJob, RenderQueue, RenderQueueRunner, get_process_start_time
+
+FAKE_AERENDER = os.path.join(ROOT_DIR, 'benchmarks', 'fake_aerender.py')
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    set_layout(Layout(root=tmp_path.joinpath('aegnux')))
+    monkeypatch.setenv('AEGNUX_AERENDER', FAKE_AERENDER)
+    monkeypatch.setenv('FAKE_AERENDER_FRAMES', '10')
+    monkeypatch.setenv('FAKE_AERENDER_DELAY', '0')
+    yield RenderQueue(tmp_path.joinpath('render_queue.json'))
+    set_layout(None)
+
+
+def run_queue(queue: RenderQueue, should_stop=None, **kwargs) -> list:
+    events = []
+    runner = RenderQueueRunner(queue, on_event=lambda event, job: events.append((event, job.id)), **kwargs)
+    runner.run(should_stop)
+    return events
+
+
+def set_failures(tmp_path, monkeypatch, count: int):
+    fail_file = tmp_path.joinpath('fail')
+    fail_file.write_text(str(count))
+    monkeypatch.setenv('FAKE_AERENDER_FAIL_FILE', fail_file.as_posix())
+
+
+def test_render_done(queue):
+    job = queue.add(RenderJob('project.aep', 'Comp 1'))
+
+    assert run_queue(queue) == [('started', job.id), *[('progress', job.id)] * 11, ('done', job.id)]
+
+    job = queue.get(job.id)
+    assert job.status == RenderStatus.DONE
+    assert job.attempts == 1
+    assert job.frame == job.total_frames == 10
+
+
+def test_failed_render_is_retried(queue, tmp_path, monkeypatch):
+    set_failures(tmp_path, monkeypatch, 1)
+    job = queue.add(RenderJob('project.aep', max_retries=2))
+
+    events = [event for event, _ in run_queue(queue) if event != 'progress']
+    assert events == ['started', 'retry', 'started', 'done']
+
+    job = queue.get(job.id)
+    assert job.status == RenderStatus.DONE
+    assert job.attempts == 2
+    assert job.error is None
+
+
+def test_render_fails_after_retries(queue, tmp_path, monkeypatch):
+    set_failures(tmp_path, monkeypatch, 5)
+    job = queue.add(RenderJob('project.aep', max_retries=1))
+
+    events = [event for event, _ in run_queue(queue) if event != 'progress']
+    assert events == ['started', 'retry', 'started', 'failed']
+
+    job = queue.get(job.id)
+    assert job.status == RenderStatus.FAILED
+    assert job.attempts == 2
+    assert 'Fake failure' in job.error
+
+
+def test_stopped_run_requeues_jobs(queue, monkeypatch):
+    monkeypatch.setenv('FAKE_AERENDER_STARTUP', '30')
+    job = queue.add(RenderJob('project.aep'))
+
+    # Stops once aerender is running
+    assert run_queue(queue, lambda: queue.get(job.id).status == RenderStatus.RUNNING) == [('started', job.id)]
+
+    job = queue.get(job.id)
+    assert job.status == RenderStatus.QUEUED
+    assert job.attempts == 0
+
+
+def test_claim_requeues_jobs_of_dead_owners(queue):
+    dead = subprocess.Popen([sys.executable, '-c', 'pass'])
+    dead.wait()
+
+    stale = RenderJob('dead.aep')
+    stale.status = RenderStatus.RUNNING
+    stale.owner_pid = dead.pid
+
+    # Our pid, but recorded for a process that started at another time
+    recycled = RenderJob('recycled.aep')
+    recycled.status = RenderStatus.RUNNING
+    recycled.owner_pid = os.getpid()
+    recycled.owner_start_time = get_process_start_time(os.getpid()) - 1
+
+    live = RenderJob('live.aep')
+    live.status = RenderStatus.RUNNING
+    live.owner_pid = os.getpid()
+    live.owner_start_time = get_process_start_time(os.getpid())
+
+    queue.add_many([live, stale, recycled])
+
+    claimed = [queue.claim_next(), queue.claim_next(), queue.claim_next()]
+    assert [job.id if job else None for job in claimed] == [stale.id, recycled.id, None]
+    assert queue.get(live.id).status == RenderStatus.RUNNING
+
+
+def test_from_dict_ignores_unknown_fields(queue):
+    data = RenderJob('project.aep').to_dict()
+    data['build_args'] = 'not a method'
+    data['__class__'] = 'nope'
+
+    job = RenderJob.from_dict(data)
+    assert callable(job.build_args)
+    assert type(job) is RenderJob
+    assert job.project == data['project']
@@ -0,0 +1,111 @@
+import os
+import shutil
+import pytest
+from conftest import FIXTURES_DIR
+from src.registry import RegistryTransaction
+from src.winehive import WineHive, apply_transaction_offline, hold_wineserver_lock, get_dll_overrides
+
+
+@pytest.fixture
+def prefix(tmp_path):
+    prefix = tmp_path.joinpath('wineprefix')
+    shutil.copytree(os.path.join(FIXTURES_DIR, 'prefix'), prefix)
+    return prefix
+
+
+def load_transaction(*names) -> RegistryTransaction:
+    transaction = RegistryTransaction()
+    for name in names:
+        transaction.merge_reg_file(os.path.join(FIXTURES_DIR, name))
+    return transaction
+
+
+def test_parse_reg_files():
+    transaction = load_transaction('changes.reg', 'unicode.reg')
+
+    _, desktop = transaction.keys['hkey_current_user\\control panel\\desktop']
+    assert desktop == {'FontSmoothing': '"2"', 'FontSmoothingType': 'dword:00000002'}
+
+    _, overrides = transaction.keys['hkey_current_user\\software\\wine\\dlloverrides']
+    assert overrides == {'msxml3': '"native,builtin"', '*d3d11': '-'}
+
+    _, csxs = transaction.keys['hkey_current_user\\software\\adobe\\csxs.11']
+    assert csxs['Owner'] == '"Łukasz Ünïcödé"'
+    assert list(transaction.deleted_keys.values()) == ['HKEY_CURRENT_USER\\Software\\Wine\\Untouched']
+
+
+def test_unchanged_hive_renders_stable(prefix):
+    hive = WineHive(prefix.joinpath('user.reg'))
+    rendered = hive.render()
+
+    hive.save()
+    assert WineHive(prefix.joinpath('user.reg')).render() == rendered
+    assert hive.get_raw('Software\\Wine\\Untouched', 'Binary') == 'hex:01,02,03,04,05'
+    assert '#time=1da0000000000000' in hive.get_key('Control Panel\\Desktop').meta
+
+
+def test_apply_offline_round_trip(prefix):
+    assert apply_transaction_offline(prefix, load_transaction('changes.reg', 'unicode.reg'))
+
+    user = WineHive(prefix.joinpath('user.reg'))
+    assert user.get_values('Control Panel\\Desktop') == {
+        'FontSmoothing': '2',
+        'WheelScrollLines': '3',
+        'FontSmoothingType': 'dword:00000002'
+    }
+    assert get_dll_overrides(prefix) == {'msxml3': 'native,builtin'}
+    assert user.get_key('Software\\Wine\\Untouched') is None
+
+    # Non-ASCII goes into the hive as \x escapes and reads back unchanged
+    assert user.get_raw('Software\\Adobe\\CSXS.11', 'Owner') == '"\\x0141ukasz \\x00dcn\\x00efc\\x00f6d\\x00e9"'
+    assert user.get_string('Software\\Adobe\\CSXS.11', 'Owner') == 'Łukasz Ünïcödé'
+
+    system = WineHive(prefix.joinpath('system.reg'))
+    assert system.get_string('Software\\Classes\\.aep', '') == 'AfterEffects.Project.24'
+    assert system.get_values('Software\\Microsoft\\Windows NT\\CurrentVersion\\Fonts') == {
+        'Arial (TrueType)': 'arial.ttf',
+        'Times New Roman (TrueType)': 'times.ttf'
+    }
+
+
+def test_written_reg_file_parses_back(tmp_path):
+    transaction = load_transaction('changes.reg', 'unicode.reg')
+    reg_path = tmp_path.joinpath('out.reg')
+    transaction.write(reg_path)
+
+    assert reg_path.read_bytes().startswith(b'\xff\xfe')
+
+    parsed = RegistryTransaction()
+    parsed.merge_reg_file(reg_path)
+    assert parsed.keys == transaction.keys
+    assert parsed.deleted_keys == transaction.deleted_keys
+
+
+def test_apply_offline_skips_locked_prefix(prefix):
+    before = prefix.joinpath('user.reg').read_bytes()
+
+    with hold_wineserver_lock(prefix) as locked:
+        assert locked
+        # Another process holding the lock looks like a running wineserver
+        pid = os.fork()
+        if pid == 0:
+            os._exit(0 if not apply_transaction_offline(prefix, load_transaction('changes.reg')) else 1)
+        _, status = os.waitpid(pid, 0)
+
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert prefix.joinpath('user.reg').read_bytes() == before
+
+
+def test_delete_key_drops_pending_subkeys(prefix):
+    transaction = RegistryTransaction()
+    transaction.set_value('HKEY_CURRENT_USER\\Software\\Wine\\Untouched\\Sub', 'Name', 'value')
+    transaction.set_value('HKEY_CURRENT_USER\\Software\\Wine\\UntouchedSibling', 'Name', 'value')
+    transaction.delete_key('HKEY_CURRENT_USER\\Software\\Wine\\Untouched')
+
+    assert list(transaction.keys) == ['hkey_current_user\\software\\wine\\untouchedsibling']
+    assert apply_transaction_offline(prefix, transaction)
+
+    user = WineHive(prefix.joinpath('user.reg'))
+    assert user.get_key('Software\\Wine\\Untouched') is None
+    assert user.get_key('Software\\Wine\\Untouched\\Sub') is None
+    assert user.get_string('Software\\Wine\\UntouchedSibling', 'Name') == 'value'
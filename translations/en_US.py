@@ -36,9 +36,27 @@ STRINGS = {
     'plugininst_action': 'Install private plugins from ZIP',
     'plugin_note': 'Private plugins note',
     'plugin_note_text': 'Those plugins are available at https://t.me/Aegnux',
+    'plugin_replace_title': 'Replace plugin pack',
+    'plugin_replace_text': '{new} looks like a new version of {old}. Remove the files {old} installed that {new} doesn\'t have?\n\nNo keeps both installed.',
     'done_title': 'Done!',
     'done_ae': 'AE has been installed.',
     'done_plugins': 'The plugins have been installed.',
     'mhtb_not_found_title': 'Mister Horse Product Manager Not Found',
-    'mhtb_not_found_text': 'Mister Horse Product Manager is not installed in the Wine prefix. Please install it first.'
+    'mhtb_not_found_text': 'Mister Horse Product Manager is not installed in the Wine prefix. Please install it first.',
+    'warm_action': 'Keep Wine warm between launches',
+    'log_filter_all': 'All',
+    'instances_menu': 'Instances',
+    'new_instance_action': 'New instance...',
+    'new_instance_title': 'New instance',
+    'new_instance_text': 'Name of the new instance (letters, digits, dots, dashes and underscores):',
+    'invalid_instance_name': 'This name is invalid or already taken.',
+    'instance_run_action': 'Run After Effects',
+    'instance_kill_action': 'Kill',
+    'instance_remove_action': 'Remove',
+    'instance_remove_text': 'Remove the instance {name} and its Wine prefix?',
+    'instance_running_text': 'Stop the instance before removing it.',
+    'render_action': 'Render with aerender...',
+    'render_project_title': 'Select a project to render',
+    'render_comp_text': 'Composition to render (leave empty to use the project render queue):',
+    'render_output_title': 'Render output file'
 }
\ No newline at end of file
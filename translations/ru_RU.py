@@ -36,8 +36,26 @@ STRINGS = {
     'plugininst_action': 'Установить приватные плагины из ZIP',
     'plugin_note': 'Замечание к приватным плагинам',
     'plugin_note_text': 'Эти плагины доступны здесь: https://t.me/Aegnux',
+    'plugin_replace_title': 'Замена набора плагинов',
+    'plugin_replace_text': '{new} похож на новую версию {old}. Удалить файлы, установленные из {old}, которых нет в {new}?\n\n«Нет» оставит оба набора.',
     'done_ae': 'AE был установлен.',
     'done_plugins': 'Плагины были установлены.',
     'mhtb_not_found_title': 'Mister Horse Product Manager не найден',
-    'mhtb_not_found_text': 'Mister Horse Product Manager не установлен в префиксе Wine. Пожалуйста, сначала установите его.'
+    'mhtb_not_found_text': 'Mister Horse Product Manager не установлен в префиксе Wine. Пожалуйста, сначала установите его.',
+    'warm_action': 'Держать Wine запущенным между запусками',
+    'log_filter_all': 'Все',
+    'instances_menu': 'Экземпляры',
+    'new_instance_action': 'Новый экземпляр...',
+    'new_instance_title': 'Новый экземпляр',
+    'new_instance_text': 'Имя нового экземпляра (буквы, цифры, точки, дефисы и подчёркивания):',
+    'invalid_instance_name': 'Это имя недопустимо или уже занято.',
+    'instance_run_action': 'Запустить After Effects',
+    'instance_kill_action': 'Остановить',
+    'instance_remove_action': 'Удалить',
+    'instance_remove_text': 'Удалить экземпляр {name} вместе с его префиксом Wine?',
+    'instance_running_text': 'Остановите экземпляр перед удалением.',
+    'render_action': 'Рендер через aerender...',
+    'render_project_title': 'Выберите проект для рендера',
+    'render_comp_text': 'Композиция для рендера (оставьте пустым, чтобы использовать очередь рендера проекта):',
+    'render_output_title': 'Файл результата рендера'
 }
\ No newline at end of file
@@ -36,8 +36,26 @@ STRINGS = {
     'plugininst_action': 'Встановити приватні плагіни з ZIP',
     'plugin_note': 'Примітка до приватних плагінів',
     'plugin_note_text': 'Ці плагіни доступні тут: https://t.me/Aegnux',
+    'plugin_replace_title': 'Заміна набору плагінів',
+    'plugin_replace_text': '{new} схожий на нову версію {old}. Видалити файли, встановлені з {old}, яких немає в {new}?\n\n«Ні» залишить обидва набори.',
     'done_ae': 'AE було встановлено.',
     'done_plugins': 'Плагіни було встановлено.',
     'mhtb_not_found_title': 'Mister Horse Product Manager не знайдено',
-    'mhtb_not_found_text': 'Mister Horse Product Manager не встановлено в префіксі Wine. Будь ласка, спочатку встановіть його.'
+    'mhtb_not_found_text': 'Mister Horse Product Manager не встановлено в префіксі Wine. Будь ласка, спочатку встановіть його.',
+    'warm_action': 'Тримати Wine запущеним між запусками',
+    'log_filter_all': 'Усі',
+    'instances_menu': 'Екземпляри',
+    'new_instance_action': 'Новий екземпляр...',
+    'new_instance_title': 'Новий екземпляр',
+    'new_instance_text': "Ім'я нового екземпляра (літери, цифри, крапки, дефіси та підкреслення):",
+    'invalid_instance_name': "Це ім'я недійсне або вже зайняте.",
+    'instance_run_action': 'Запустити After Effects',
+    'instance_kill_action': 'Зупинити',
+    'instance_remove_action': 'Видалити',
+    'instance_remove_text': 'Видалити екземпляр {name} разом із його префіксом Wine?',
+    'instance_running_text': 'Зупиніть екземпляр перед видаленням.',
+    'render_action': 'Рендер через aerender...',
+    'render_project_title': 'Виберіть проєкт для рендера',
+    'render_comp_text': 'Композиція для рендера (залиште порожнім, щоб використати чергу рендера проєкту):',
+    'render_output_title': 'Файл результату рендера'
 }
@@ -0,0 +1,74 @@
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QPlainTextEdit, QComboBox
+from PySide6.QtCore import QTimer, Slot
+from translations import gls
+from src.config import LOG_VIEW_MAX_LINES, LOG_FRAME_INTERVAL_MS
+from src.logbuffer import LogBuffer
+
+
+class LogView(QWidget):
+    # Lines are queued and painted once per frame. The text edit keeps at
+    # most LOG_VIEW_MAX_LINES blocks, the full history lives in the LogBuffer
+
+    def __init__(self):
+        super().__init__()
+        self.buffer = LogBuffer()
+        self.pending = []
+        self.current_tag = None
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.filter_box = QComboBox()
+        self.filter_box.addItem(gls('log_filter_all'), None)
+        self.filter_box.currentIndexChanged.connect(self._filter_changed)
+        layout.addWidget(self.filter_box)
+
+        self.text_edit = QPlainTextEdit()
+        self.text_edit.setReadOnly(True)
+        self.text_edit.setMaximumBlockCount(LOG_VIEW_MAX_LINES)
+        self.text_edit.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        layout.addWidget(self.text_edit)
+
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(LOG_FRAME_INTERVAL_MS)
+        self.flush_timer.timeout.connect(self.flush)
+
+    @Slot(str)
+    def append_line(self, line: str):
+        self.append_lines([line])
+
+    @Slot(list)
+    def append_lines(self, lines: list):
+        for line in lines:
+            tag = self.buffer.append(line)
+            if tag and self.filter_box.findData(tag) == -1:
+                self.filter_box.addItem(tag, tag)
+
+            if self.current_tag is None or tag == self.current_tag:
+                self.pending.append(line)
+
+        if self.pending and not self.flush_timer.isActive():
+            self.flush_timer.start()
+
+    @Slot()
+    def flush(self):
+        if not self.pending:
+            return
+
+        lines = self.pending[-LOG_VIEW_MAX_LINES:]
+        self.pending.clear()
+        self.text_edit.appendPlainText('\n'.join(lines))
+
+    @Slot(int)
+    def _filter_changed(self, index: int):
+        self.current_tag = self.filter_box.itemData(index)
+        self.pending.clear()
+        self.text_edit.setPlainText('\n'.join(self.buffer.filter(self.current_tag)[-LOG_VIEW_MAX_LINES:]))
+        self.text_edit.verticalScrollBar().setValue(self.text_edit.verticalScrollBar().maximum())
+
+    def reset_last_error(self):
+        self.buffer.last_error = None
+
+    def get_last_error(self) -> str:
+        return self.buffer.get_last_error()
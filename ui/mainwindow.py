@@ -1,13 +1,14 @@
 from PySide6.QtWidgets import (
     QVBoxLayout, QWidget, QHBoxLayout,
     QLabel, QMainWindow, QPushButton, QMessageBox,
-    QSpacerItem, QSizePolicy, QTextEdit, QProgressBar
+    QSpacerItem, QSizePolicy, QProgressBar
 )
 from PySide6.QtCore import Qt, QSize
 from PySide6.QtGui import QIcon, QPixmap
 from translations import gls
 from src.config import AE_ICON_PATH, STYLES_PATH
 from src.utils import check_aegnux_installed
+from ui.logview import LogView
 
 class MainWindowUI(QMainWindow):
     def __init__(self):
@@ -109,10 +110,9 @@ class MainWindowUI(QMainWindow):
         action_col.addLayout(destruction_row)
 
 
-        self.logs_edit = QTextEdit()
+        self.logs_edit = LogView()
         self.logs_edit.setObjectName('logs_edit')
-        self.logs_edit.setFixedHeight(140)
-        self.logs_edit.setReadOnly(True)
+        self.logs_edit.setFixedHeight(170)
         self.logs_edit.hide()
         action_col.addWidget(self.logs_edit)
 